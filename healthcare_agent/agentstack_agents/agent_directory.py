@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from agentstack_sdk.platform import PlatformClient
+from beeai_framework.adapters.agentstack.agents import AgentStackAgent
+from beeai_framework.memory import BaseMemory
+from beeai_framework.tools.handoff import HandoffTool
+
+from .tracing import inject_trace_context, tracer
+
+logger = logging.getLogger(__name__)
+
+# Specialists the concierge hands off to, by their Agent Stack name
+SPECIALISTS = ("PolicyAgent", "ResearchAgent", "ProviderAgent")
+
+
+class TracedAgentStackAgent(AgentStackAgent):
+    """
+    Agent Stack agent that sends the current trace context in the metadata of every
+    message, so the specialist's spans join the concierge's trace.
+    """
+
+    async def _get_metadata(self, client: PlatformClient) -> dict[str, Any]:
+        return inject_trace_context(await super()._get_metadata(client))
+
+    @classmethod
+    def _copy(cls, agent: AgentStackAgent, memory: BaseMemory) -> "TracedAgentStackAgent":
+        return cls(
+            url=agent._agent._url,
+            agent_card=agent._agent.agent_card,
+            memory=memory,
+            auth_token=agent._auth_token,
+            agent_stack_url=agent._agent_stack_url,
+        )
+
+    @classmethod
+    async def from_agent_stack(cls, *args, **kwargs) -> list["TracedAgentStackAgent"]:
+        return [cls._copy(agent, agent.memory) for agent in await super().from_agent_stack(*args, **kwargs)]
+
+    async def clone(self) -> "TracedAgentStackAgent":
+        # HandoffTool clones its target for every run; the clone must keep sending the trace context
+        cloned = self._copy(self, await self.memory.clone())
+        cloned.emitter = await self.emitter.clone()
+        return cloned
+
+
+class AgentDirectory:
+    """
+    Cached discovery of the specialist agents deployed on Agent Stack, and one reusable
+    handoff tool per specialist.
+
+    Within `ttl_seconds` the cached list is used as is. After that the cached list is still
+    returned immediately while a single background task refreshes it (stale-while-
+    revalidate), up to `max_stale_seconds`; past that, or before the first successful
+    discovery, callers wait for discovery, bounded by `timeout`. A failed refresh keeps
+    serving the last known agents.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = float(os.getenv("CONCIERGE_DISCOVERY_TTL_SECONDS", 60)),
+        max_stale_seconds: float = float(os.getenv("CONCIERGE_DISCOVERY_MAX_STALE_SECONDS", 900)),
+        timeout: float = float(os.getenv("CONCIERGE_DISCOVERY_TIMEOUT", 10)),
+        discover: Callable[[], Awaitable[list[AgentStackAgent]]] = TracedAgentStackAgent.from_agent_stack,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.timeout = timeout
+        self.discover = discover
+        self._agents: dict[str, AgentStackAgent] = {}
+        self._tools: dict[str, HandoffTool] = {}
+        self._loaded_at: float | None = None
+        self._refresh: asyncio.Task | None = None
+
+    @property
+    def age(self) -> float | None:
+        return None if self._loaded_at is None else time.monotonic() - self._loaded_at
+
+    async def handoff_tools(self) -> dict[str, HandoffTool]:
+        """Handoff tools of the specialists that are currently deployed, by specialist name."""
+        with tracer.start_as_current_span("discover_specialists") as span:
+            if span.is_recording() and self.age is not None:
+                span.set_attribute("discovery.cache_age_seconds", self.age)
+            await self._ensure_fresh()
+            span.set_attribute("discovery.specialists", sorted(self._tools))
+        return dict(self._tools)
+
+    async def _ensure_fresh(self) -> None:
+        age = self.age
+        if age is not None and age < self.ttl_seconds:
+            return
+        refresh = self._start_refresh()
+        if age is not None and age < self.max_stale_seconds:
+            # Serve what we have; the refresh finishes in the background
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(refresh), self.timeout)
+        except Exception as e:
+            if self._loaded_at is None:
+                raise
+            logger.warning("Agent discovery failed (%s); using agents discovered %.0f s ago", e, age)
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._load())
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Background agent discovery failed: %s", task.exception())
+
+    async def _load(self) -> None:
+        started = time.perf_counter()
+        agents = {agent.name: agent for agent in await self.discover() if agent.name in SPECIALISTS}
+        # HandoffTool clones its target for every run, so one tool per specialist serves all sessions
+        self._agents = agents
+        self._tools = {name: HandoffTool(agent) for name, agent in agents.items()}
+        self._loaded_at = time.monotonic()
+        missing = [name for name in SPECIALISTS if name not in agents]
+        logger.info(
+            "Discovered specialists %s in %.2f s%s",
+            sorted(agents),
+            time.perf_counter() - started,
+            f"; missing {missing}" if missing else "",
+        )
+
+    async def aclose(self) -> None:
+        if self._refresh is not None and not self._refresh.done():
+            self._refresh.cancel()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from math import ceil
+
+from beeai_framework.backend import ChatModel
+from beeai_framework.backend.message import AnyMessage, AssistantMessage, ToolMessage, UserMessage
+
+from .handoff_fanout import ConsultSpecialistsTool, split_sections
+from .session_memory import Session
+from .tracing import trace_run, tracer
+
+logger = logging.getLogger(__name__)
+
+# Tool calls that are bookkeeping rather than specialist answers
+INTERNAL_TOOLS = {"think", "final_answer"}
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and a healthcare concierge.\n"
+    "Update the summary with the new exchanges below. Keep the user's situation, location, plan, "
+    "symptoms, preferences and any open questions; drop pleasantries. Answer with the updated summary "
+    "only, in at most {words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew exchanges:\n{exchanges}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Same rough 4-characters-per-token estimate BeeAI's TokenMemory uses, plus per-message overhead
+    return ceil(len(text) / 4) + 4
+
+
+@dataclass
+class Turn:
+    """One user message and everything the concierge did to answer it."""
+
+    messages: list[AnyMessage]
+
+    @property
+    def question(self) -> str:
+        return next((msg.text for msg in self.messages if isinstance(msg, UserMessage)), "")
+
+    @property
+    def answer(self) -> str:
+        for msg in reversed(self.messages):
+            if not isinstance(msg, AssistantMessage):
+                continue
+            for call in msg.get_tool_calls():
+                if call.tool_name == "final_answer":
+                    try:
+                        return str(json.loads(call.args).get("response", ""))
+                    except (ValueError, AttributeError):
+                        return call.args
+            if not msg.get_tool_calls() and msg.text:
+                return msg.text
+        return ""
+
+    def handoff_facts(self, max_chars: int) -> list[dict]:
+        """Specialist handoffs of this turn as compact {agent, task, result} records."""
+        calls = {
+            call.id: call
+            for msg in self.messages
+            if isinstance(msg, AssistantMessage)
+            for call in msg.get_tool_calls()
+            if call.tool_name not in INTERNAL_TOOLS
+        }
+        facts = []
+        for msg in self.messages:
+            if not isinstance(msg, ToolMessage):
+                continue
+            for result in msg.get_tool_results():
+                call = calls.get(result.tool_call_id)
+                if call is None:
+                    continue
+                try:
+                    args = json.loads(call.args)
+                except ValueError:
+                    args = {}
+                if not isinstance(args, dict):
+                    args = {}
+                if call.tool_name == ConsultSpecialistsTool.name:
+                    # One fact per specialist of a parallel consultation
+                    tasks = {item.get("agent"): item.get("task", "") for item in args.get("tasks", []) if isinstance(item, dict)}
+                    for agent, text in split_sections(str(result.result)).items():
+                        facts.append(self._fact(agent, str(tasks.get(agent, "")), text, max_chars))
+                else:
+                    facts.append(self._fact(call.tool_name, str(args.get("task", call.args)), str(result.result), max_chars))
+        return facts
+
+    @staticmethod
+    def _fact(agent: str, task: str, result: str, max_chars: int) -> dict:
+        text = " ".join(result.split())
+        return {
+            "agent": agent,
+            "task": task[:200],
+            "result": text if len(text) <= max_chars else f"{text[:max_chars]}...",
+        }
+
+
+def split_turns(messages: list[AnyMessage]) -> list[Turn]:
+    turns: list[Turn] = []
+    for msg in messages:
+        if isinstance(msg, UserMessage) or not turns:
+            turns.append(Turn([msg]))
+        else:
+            turns[-1].messages.append(msg)
+    return turns
+
+
+@dataclass
+class BudgetReport:
+    """What went into the conversation part of this turn's prompt."""
+
+    tokens: int
+    budget: int
+    summary_tokens: int
+    summarized_turns: int
+    facts: int
+    recent_turns: int
+
+    def describe(self) -> str:
+        return (
+            f"~{self.tokens:,} of {self.budget:,} tokens: summary of {self.summarized_turns} earlier turn(s) "
+            f"(~{self.summary_tokens:,} tokens), {self.facts} specialist fact(s), {self.recent_turns} recent turn(s) verbatim"
+        )
+
+
+class ConversationBudget:
+    """
+    Builds a token-bounded view of a session's conversation for the agent.
+
+    The most recent turns are kept verbatim (question and final answer). Older turns are
+    folded into a rolling summary that is stored on the session and only extended with
+    the turns that newly fall out of the window. That summarization call runs in the
+    background after the turn, so neither the answer nor the next turn waits for it;
+    until it finishes the previous summary stands and the turns stay verbatim. What
+    specialists answered is kept as short structured facts instead of full tool
+    transcripts. Folded turns are removed from the session memory.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = int(os.getenv("CONCIERGE_MEMORY_TOKEN_BUDGET", 4000)),
+        recent_turns: int = int(os.getenv("CONCIERGE_RECENT_TURNS", 3)),
+        summary_words: int = int(os.getenv("CONCIERGE_SUMMARY_WORDS", 250)),
+        max_facts: int = int(os.getenv("CONCIERGE_MAX_FACTS", 12)),
+        fact_chars: int = int(os.getenv("CONCIERGE_FACT_CHARS", 500)),
+    ) -> None:
+        self.token_budget = token_budget
+        self.recent_turns = max(1, recent_turns)
+        self.summary_words = summary_words
+        self.max_facts = max_facts
+        self.fact_chars = fact_chars
+
+    async def view(self, session: Session, llm: ChatModel) -> tuple[list[AnyMessage], BudgetReport]:
+        """Messages to seed the agent's memory with for this turn, within the token budget. Never waits for the LLM."""
+        turns = split_turns(session.memory.messages)
+        if len(turns) > self.recent_turns:
+            # Turns synced from the store, or left by a fold that is still running or failed: fold them
+            # in the background like after a turn, and until then keep them verbatim as far as the budget allows
+            self.compact_in_background(session, llm)
+
+        while True:
+            facts = self._facts(session, turns)
+            messages = self._render(session.summary, facts, turns)
+            tokens = sum(estimate_tokens(msg.text) for msg in messages)
+            if tokens <= self.token_budget or len(turns) <= 1:
+                break
+            # Over budget: leave the oldest verbatim turn out of this prompt. It stays in memory and is
+            # folded into the summary once it leaves the recent window, never on the turn's critical path
+            turns = turns[1:]
+
+        while tokens > self.token_budget and facts:
+            # Still over with a single turn left: keep only the newest facts that fit
+            facts = facts[1:]
+            messages = self._render(session.summary, facts, turns)
+            tokens = sum(estimate_tokens(msg.text) for msg in messages)
+
+        return messages, BudgetReport(
+            tokens=tokens,
+            budget=self.token_budget,
+            summary_tokens=estimate_tokens(session.summary) if session.summary else 0,
+            summarized_turns=session.summarized_turns,
+            facts=len(facts),
+            recent_turns=len(turns),
+        )
+
+    def compact_in_background(self, session: Session, llm: ChatModel) -> None:
+        """Start folding the turns that left the recent window, unless a fold of this session is already running."""
+        if session.compaction is None or session.compaction.done():
+            session.compaction = asyncio.create_task(self.compact(session, llm), name="compact-memory")
+
+    async def compact(self, session: Session, llm: ChatModel) -> None:
+        """Fold turns that left the recent window, including turns added while a fold was running."""
+        with tracer.start_as_current_span("compact_memory"):
+            try:
+                while len(turns := split_turns(session.memory.messages)) > self.recent_turns:
+                    if not await self._fold(session, turns[: -self.recent_turns], llm):
+                        break
+            except Exception as e:
+                logger.warning("Conversation compaction failed: %s", e)
+
+    def _facts(self, session: Session, turns: list[Turn]) -> list[dict]:
+        facts = [*session.facts, *(fact for turn in turns for fact in turn.handoff_facts(self.fact_chars))]
+        return facts[-self.max_facts :]
+
+    def _render(self, summary: str, facts: list[dict], turns: list[Turn]) -> list[AnyMessage]:
+        messages: list[AnyMessage] = []
+        if summary or facts:
+            context = ["Context from earlier in this conversation."]
+            if summary:
+                context.append(f"Summary: {summary}")
+            if facts:
+                context.append("What the specialists already answered:")
+                context.extend(f"- {fact['agent']} (asked: {fact['task']}): {fact['result']}" for fact in facts)
+            messages.append(UserMessage("\n".join(context)))
+        for turn in turns:
+            messages.append(UserMessage(turn.question))
+            if answer := turn.answer:
+                messages.append(AssistantMessage(answer))
+        return messages
+
+    async def _fold(self, session: Session, turns: list[Turn], llm: ChatModel) -> bool:
+        """Fold `turns` into the session's summary and facts; False if the summary could not be written."""
+        exchanges = "\n".join(f"User: {turn.question}\nConcierge: {turn.answer}" for turn in turns)
+        try:
+            response = await trace_run(llm.run([
+                UserMessage(SUMMARY_PROMPT.format(words=self.summary_words, summary=session.summary or "(none)", exchanges=exchanges))
+            ]))
+            summary = response.get_text_content().strip()
+        except Exception as e:
+            # Never lose the turns: they stay in memory verbatim and are folded by a later attempt
+            logger.warning("Conversation summary failed, keeping %d turn(s) unfolded: %s", len(turns), e)
+            return False
+        # Apply everything at once, so a turn reading the session sees the old or the new summary, never half of it
+        session.facts = [*session.facts, *(fact for turn in turns for fact in turn.handoff_facts(self.fact_chars))][-self.max_facts :]
+        # Keep the summary within its word budget even if the model ran long
+        words = summary.split()
+        session.summary = " ".join(words[-self.summary_words * 2 :]) if len(words) > self.summary_words * 2 else summary
+        session.summarized_turns += len(turns)
+        await session.memory.delete_many([msg for turn in turns for msg in turn.messages])
+        return True
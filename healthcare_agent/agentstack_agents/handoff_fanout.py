@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from pydantic import BaseModel, Field
+
+from beeai_framework.context import RunContext
+from beeai_framework.emitter import Emitter
+from beeai_framework.tools import StringToolOutput, Tool, ToolError, ToolRunOptions
+from beeai_framework.tools.handoff import HandoffTool
+
+from .handoff_resilience import HandoffResilience
+from .handoff_stream import streamed_attempts
+from .tracing import set_error, tracer, within_run
+
+logger = logging.getLogger(__name__)
+
+# Heading that starts each specialist's section in the combined output
+SECTION = re.compile(r"^### (?P<agent>\w+) \((?P<status>\d+\.\d s|unavailable)\)$", re.MULTILINE)
+
+
+class SpecialistTask(BaseModel):
+    agent: str = Field(description="Name of the specialist agent to consult.")
+    task: str = Field(description="Clearly defined task for the specialist, with everything it needs from the conversation.")
+
+
+class ConsultSpecialistsSchema(BaseModel):
+    tasks: list[SpecialistTask] = Field(description="One task per specialist to consult.", min_length=1)
+
+
+@dataclass
+class HandoffOutcome:
+    """What one specialist returned, or why it did not."""
+
+    agent: str
+    task: str
+    seconds: float
+    text: str = ""
+    error: str | None = None
+    hedged: bool = False
+    hedge_won: bool = False
+
+    @property
+    def status(self) -> str:
+        """Short status for the trajectory, e.g. "response, 2.1 s, hedge won"."""
+        parts = ["error" if self.error else "response", f"{self.seconds:.1f} s"]
+        if self.hedged:
+            parts.append("hedge won" if self.hedge_won else "hedged")
+        return ", ".join(parts)
+
+
+def split_sections(text: str) -> dict[str, str]:
+    """Answers of the specialists that responded in a consult_specialists result, by agent name."""
+    matches = list(SECTION.finditer(text))
+    return {
+        match.group("agent"): text[match.end() : matches[i + 1].start() if i + 1 < len(matches) else len(text)].strip()
+        for i, match in enumerate(matches)
+        if match.group("status") != "unavailable"
+    }
+
+
+class ConsultSpecialistsTool(Tool[ConsultSpecialistsSchema, ToolRunOptions, StringToolOutput]):
+    """
+    Hands tasks to several specialists at once. The handoffs run concurrently, each
+    under the shared resilience layer (latency budget, hedging, circuit breaker); a
+    specialist that fails, times out or is skipped by its breaker is reported in its
+    section of the result while the others' answers are still returned.
+    """
+
+    name = "consult_specialists"
+
+    def __init__(
+        self,
+        handoffs: dict[str, HandoffTool],
+        resilience: HandoffResilience,
+        on_delta: Callable[[str, str], None] | None = None,
+        options: dict | None = None,
+    ) -> None:
+        self.handoffs = handoffs
+        self.resilience = resilience
+        # Receives (agent, text) for specialist output as it streams in
+        self.on_delta = on_delta
+        # Outcomes of every consultation this tool ran, for the trajectory
+        self.outcomes: list[HandoffOutcome] = []
+        super().__init__(options)
+
+    @property
+    def description(self) -> str:
+        specialists = "; ".join(f"{name}: {tool.description}" for name, tool in self.handoffs.items())
+        return (
+            "Consult several specialist agents in parallel, giving each its own task. "
+            f"Available specialists - {specialists}"
+        )
+
+    @property
+    def input_schema(self) -> type[ConsultSpecialistsSchema]:
+        return ConsultSpecialistsSchema
+
+    def _create_emitter(self) -> Emitter:
+        return Emitter.root().child(namespace=["tool", "handoff", "fanout"], creator=self)
+
+    async def _consult(self, agent: str, task: str) -> HandoffOutcome:
+        started = time.perf_counter()
+        with tracer.start_as_current_span(f"handoff {agent}", attributes={"gen_ai.agent.name": agent}) as span:
+            try:
+                # Runs inside this tool's run context, so the handoff sees the concierge's memory
+                on_delta = (lambda text: self.on_delta(agent, text)) if self.on_delta else None
+                result = await self.resilience.call(agent, streamed_attempts(self.handoffs[agent], task, on_delta, agent=agent))
+                span.set_attributes({"handoff.hedged": result.hedged, "handoff.hedge_won": result.hedge_won})
+                return HandoffOutcome(agent, task, result.seconds, text=result.text, hedged=result.hedged, hedge_won=result.hedge_won)
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                # The other specialists still answer, so the failure is recorded rather than raised
+                set_error(span, e)
+        logger.warning("Handoff to %s failed: %s", agent, error)
+        return HandoffOutcome(agent, task, time.perf_counter() - started, error=error)
+
+    async def _run(self, input: ConsultSpecialistsSchema, options: ToolRunOptions | None, context: RunContext) -> StringToolOutput:
+        unknown = sorted({item.agent for item in input.tasks} - set(self.handoffs))
+        if unknown:
+            raise ToolError(f"Unknown specialist(s) {', '.join(unknown)}. Available: {', '.join(self.handoffs)}.")
+
+        # Several tasks for the same specialist become one handoff
+        tasks: dict[str, list[str]] = {}
+        for item in input.tasks:
+            tasks.setdefault(item.agent, []).append(item.task)
+        # The handoff spans nest under this tool's span
+        with within_run(context):
+            outcomes = await asyncio.gather(*(self._consult(agent, "\n".join(parts)) for agent, parts in tasks.items()))
+        self.outcomes.extend(outcomes)
+
+        if all(outcome.error for outcome in outcomes):
+            raise ToolError("No specialist answered: " + "; ".join(f"{o.agent} {o.error}" for o in outcomes))
+
+        sections = []
+        for outcome in outcomes:
+            if outcome.error:
+                sections.append(
+                    f"### {outcome.agent} (unavailable)\n"
+                    f"Unavailable ({outcome.error}). Answer without it and tell the user this part could not be checked."
+                )
+            else:
+                sections.append(f"### {outcome.agent} ({outcome.seconds:.1f} s)\n{outcome.text}")
+        return StringToolOutput("\n\n".join(sections))
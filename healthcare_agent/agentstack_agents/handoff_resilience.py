@@ -0,0 +1,277 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from opentelemetry import trace
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a specialist whose circuit breaker is open."""
+
+
+def parse_budgets(value: str) -> dict[str, float]:
+    """Parse "PolicyAgent=60,ResearchAgent=90" into per-agent seconds."""
+    budgets = {}
+    for item in value.split(","):
+        name, _, seconds = item.partition("=")
+        if name.strip() and seconds.strip():
+            budgets[name.strip()] = float(seconds)
+    return budgets
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls, for percentiles."""
+
+    def __init__(self, window: int) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, q: float) -> float | None:
+        """Nearest-rank percentile (q in 0-100), or None without samples."""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_seconds`. Then a single trial call is let through (half-open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        return 0.0 if self.opened_at is None else max(0.0, self.reset_seconds - (time.monotonic() - self.opened_at))
+
+    def release(self) -> None:
+        """Give up a trial call without a verdict, so another call can try."""
+        self.trial_running = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+
+@dataclass
+class AgentHealth:
+    """Latency, outcome counts and circuit breaker of one specialist."""
+
+    latencies: LatencyTracker
+    breaker: CircuitBreaker
+    # Whether each of the most recent calls sent a hedge, to cap the extra load
+    recent_hedges: deque[bool] = field(default_factory=lambda: deque(maxlen=100))
+    calls: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+
+    def describe(self) -> str:
+        if len(self.latencies):
+            p50, p95, p99 = (self.latencies.percentile(q) for q in (50, 95, 99))
+            latency = f"p50 {p50:.1f} s, p95 {p95:.1f} s, p99 {p99:.1f} s"
+        else:
+            latency = "no successful calls yet"
+        return (
+            f"{latency} ({self.calls} calls, {self.hedges} hedged, {self.hedge_wins} won by the hedge, "
+            f"{self.timeouts} timed out, {self.failures - self.timeouts} failed, {self.rejected} skipped); "
+            f"circuit {self.breaker.state}"
+        )
+
+
+@dataclass
+class CallResult:
+    text: str
+    seconds: float
+    hedged: bool = False
+    hedge_won: bool = False
+
+
+class HandoffResilience:
+    """
+    Deadlines, hedging and circuit breaking for specialist handoffs, shared across turns.
+
+    Each call gets its agent's latency budget. Once the agent has enough history, a
+    call still running past its p95 latency gets one duplicate (hedged) request, and
+    whichever answers first wins; hedges are capped at a share of recent calls so a
+    slow agent is not flooded. A failed first attempt is retried the same way. The
+    handoffs only read data, so a duplicate request is safe. An agent that keeps
+    failing or timing out is skipped by its circuit breaker until a trial call succeeds.
+    """
+
+    def __init__(
+        self,
+        default_budget: float = float(os.getenv("CONCIERGE_HANDOFF_TIMEOUT_SECONDS", 90)),
+        budgets: dict[str, float] | None = None,
+        hedge_percentile: float = float(os.getenv("CONCIERGE_HEDGE_PERCENTILE", 95)),
+        hedge_min_samples: int = int(os.getenv("CONCIERGE_HEDGE_MIN_SAMPLES", 20)),
+        hedge_min_delay: float = float(os.getenv("CONCIERGE_HEDGE_MIN_DELAY_SECONDS", 1)),
+        hedge_max_ratio: float = float(os.getenv("CONCIERGE_HEDGE_MAX_RATIO", 0.1)),
+        breaker_failures: int = int(os.getenv("CONCIERGE_BREAKER_FAILURES", 3)),
+        breaker_reset_seconds: float = float(os.getenv("CONCIERGE_BREAKER_RESET_SECONDS", 30)),
+        latency_window: int = int(os.getenv("CONCIERGE_LATENCY_WINDOW", 200)),
+    ) -> None:
+        self.default_budget = default_budget
+        self.budgets = budgets if budgets is not None else parse_budgets(
+            os.getenv("CONCIERGE_HANDOFF_BUDGETS", "PolicyAgent=60,ResearchAgent=90,ProviderAgent=45")
+        )
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        self.breaker_failures = breaker_failures
+        self.breaker_reset_seconds = breaker_reset_seconds
+        self.latency_window = latency_window
+        self.agents: dict[str, AgentHealth] = {}
+
+    def health(self, agent: str) -> AgentHealth:
+        if agent not in self.agents:
+            self.agents[agent] = AgentHealth(
+                LatencyTracker(self.latency_window),
+                CircuitBreaker(self.breaker_failures, self.breaker_reset_seconds),
+            )
+        return self.agents[agent]
+
+    def budget(self, agent: str) -> float:
+        return self.budgets.get(agent, self.default_budget)
+
+    def hedge_delay(self, agent: str) -> float | None:
+        """Seconds after which a still-running call is hedged, or None if it should not be."""
+        health = self.health(agent)
+        if len(health.latencies) < max(1, self.hedge_min_samples):
+            return None
+        delay = max(self.hedge_min_delay, health.latencies.percentile(self.hedge_percentile))
+        return delay if delay < self.budget(agent) else None
+
+    def _may_hedge(self, health: AgentHealth) -> bool:
+        recent = health.recent_hedges
+        return self.hedge_max_ratio > 0 and (not recent or sum(recent) / len(recent) < self.hedge_max_ratio)
+
+    async def call(
+        self, agent: str, attempt: Callable[[], Awaitable[str]], may_hedge: Callable[[], bool] | None = None
+    ) -> CallResult:
+        """
+        Run `attempt` for `agent` within its budget, hedged and behind its circuit breaker.
+        `may_hedge` is asked before each hedge or retry; returning False waits for the first attempt instead.
+        """
+        health = self.health(agent)
+        if not health.breaker.allow():
+            health.rejected += 1
+            trace.get_current_span().set_attribute("handoff.circuit", health.breaker.state)
+            raise CircuitOpenError(f"{agent} is failing; skipped for the next {health.breaker.retry_in():.0f} s")
+
+        health.calls += 1
+        budget = self.budget(agent)
+        hedge_after = self.hedge_delay(agent)
+        started = time.monotonic()
+        deadline = started + budget
+        primary = asyncio.ensure_future(attempt())
+        pending = {primary}
+        hedged = False
+        error: BaseException | None = None
+
+        try:
+            while pending:
+                now = time.monotonic()
+                wake = deadline if hedged or hedge_after is None else min(deadline, started + hedge_after)
+                done, pending = await asyncio.wait(pending, timeout=max(0.0, wake - now), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        finished = time.monotonic()
+                        # The call's own latency: when a hedge wins, the primary took at least this long, and
+                        # recording only the hedge would leave the slow calls out of the percentiles
+                        health.latencies.add(finished - started)
+                        health.breaker.record_success()
+                        health.recent_hedges.append(hedged)
+                        hedge_won = task is not primary
+                        health.hedge_wins += hedge_won
+                        return CallResult(task.result(), finished - started, hedged=hedged, hedge_won=hedge_won)
+                    error = task.exception()
+
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                # Hedge a slow call, or retry a failed one, once
+                slow = hedge_after is not None and now - started >= hedge_after
+                if not hedged and (slow or not pending):
+                    if not self._may_hedge(health) or (may_hedge is not None and not may_hedge()):
+                        # Over the hedge allowance, or vetoed by the caller: wait for the first attempt until the deadline
+                        hedge_after = None
+                        continue
+                    hedged = True
+                    health.hedges += 1
+                    logger.info("Hedging %s after %.1f s (%s)", agent, now - started, "failed" if not pending else "slow")
+                    trace.get_current_span().add_event(
+                        "hedge", {"hedge.after_seconds": now - started, "hedge.reason": "failed" if not pending else "slow"}
+                    )
+                    pending.add(asyncio.ensure_future(attempt()))
+        except asyncio.CancelledError:
+            # The turn was abandoned; this says nothing about the agent's health
+            health.breaker.release()
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_consume_exception)
+
+        health.recent_hedges.append(hedged)
+        health.failures += 1
+        health.breaker.record_failure()
+        if error is None or time.monotonic() >= deadline:
+            health.timeouts += 1
+            # A timed-out call took at least its whole budget; dropping it would make p95 look faster than it is
+            health.latencies.add(budget)
+            raise TimeoutError(f"no answer within its {budget:g} s budget")
+        raise error
+
+    def describe(self, agents: list[str]) -> str:
+        return "\n".join(f"{agent}: {self.health(agent).describe()}" for agent in agents)
+
+
+def _consume_exception(task: asyncio.Future) -> None:
+    # Abandoned attempts may still fail while being cancelled; do not log that as unretrieved
+    if not task.cancelled():
+        task.exception()
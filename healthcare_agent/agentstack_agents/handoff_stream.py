@@ -0,0 +1,185 @@
+import asyncio
+import contextlib
+import itertools
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import Any
+
+from a2a.types import Message, Role, TaskState, TaskStatusUpdateEvent
+from a2a.utils.message import get_message_text
+from beeai_framework.adapters.agentstack.agents.events import AgentStackAgentUpdateEvent
+from beeai_framework.emitter import EmitterOptions, EventMeta
+from beeai_framework.memory import BaseMemory
+from beeai_framework.tools.handoff import HandoffTool
+from opentelemetry.trace import SpanKind
+
+from .tracing import tracer
+
+
+class SupersededError(Exception):
+    """Raised by an exclusive attempt that finished after another attempt had started streaming."""
+
+
+def update_text(event: AgentStackAgentUpdateEvent) -> str:
+    """Answer text carried by one streamed update of a specialist, if any."""
+    value = event.value
+    if isinstance(value, Message):
+        message = value
+    elif isinstance(value, tuple) and isinstance(value[1], TaskStatusUpdateEvent):
+        status = value[1].status
+        # Only in-progress output; a failed task's status message is an error, not part of the answer
+        message = status.message if status.state == TaskState.working else None
+    else:
+        message = None
+    if message is None or message.role != Role.agent:
+        return ""
+    # Trajectory and citation updates carry metadata only
+    return get_message_text(message, delimiter="")
+
+
+async def run_handoff(
+    handoff: HandoffTool,
+    task: str,
+    on_delta: Callable[[str], None] | None = None,
+    memory: BaseMemory | None = None,
+) -> str:
+    """
+    Run a handoff and return the specialist's whole answer, passing each piece of text
+    to `on_delta` as it arrives.
+
+    Specialists stream their answer as many small status messages, and the handoff's own
+    output is only the last of them, so the streamed pieces are joined instead. The
+    handoff's output is used when the specialist did not stream. `memory` is only needed
+    outside an agent run, where no agent state provides the conversation.
+    """
+    pieces: list[str] = []
+
+    async def collect(data: Any, event: EventMeta) -> None:
+        if isinstance(data, AgentStackAgentUpdateEvent) and (text := update_text(data)):
+            pieces.append(text)
+            if on_delta is not None:
+                on_delta(text)
+
+    run = handoff.run({"task": task}).on(
+        lambda event: event.name == "update", collect, EmitterOptions(match_nested=True)
+    )
+    if memory is not None:
+        run = run.context({"state": {"memory": memory}})
+    output = await run
+    return "".join(pieces) or output.get_text_content()
+
+
+def streamed_attempts(
+    handoff: HandoffTool,
+    task: str,
+    on_delta: Callable[[str], None] | None = None,
+    memory: BaseMemory | None = None,
+    agent: str | None = None,
+    exclusive: bool = False,
+) -> Callable[[], Awaitable[str]]:
+    """
+    Attempt factory for `HandoffResilience.call`. When a call is hedged, only the
+    attempt that produced text first is streamed, so the two answers never interleave.
+    With `exclusive`, only that attempt may also return the answer: the others fail with
+    `SupersededError`, for callers that show the streamed text as the answer itself.
+    Each attempt is its own span, which the specialist's spans continue.
+    """
+    numbers = itertools.count()
+    leader: int | None = None
+    # The handoff tool's own name is lowercased; spans use the specialist's name
+    agent = agent or handoff.name
+
+    async def attempt() -> str:
+        number = next(numbers)
+
+        def forward(text: str) -> None:
+            nonlocal leader
+            if leader is None:
+                leader = number
+            if leader == number and on_delta is not None:
+                on_delta(text)
+
+        with tracer.start_as_current_span(
+            f"invoke_agent {agent}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "gen_ai.operation.name": "invoke_agent",
+                "gen_ai.agent.name": agent,
+                "handoff.attempt": number,
+                "payload.input_chars": len(task),
+            },
+        ) as span:
+            try:
+                text = await run_handoff(handoff, task, forward, memory)
+            except asyncio.CancelledError:
+                # The other attempt answered first, or the turn was abandoned
+                span.set_attribute("handoff.cancelled", True)
+                raise
+            if exclusive and leader is not None and leader != number:
+                # Its answer would not continue the text already streamed from the other attempt
+                span.set_attribute("handoff.superseded", True)
+                raise SupersededError(f"another {agent} attempt is already streaming its answer")
+            span.set_attribute("payload.output_chars", len(text))
+            return text
+
+    return attempt
+
+
+class SpecialistStream:
+    """
+    Specialist output as it arrives, merged with the events of the run that consults
+    the specialists, so a generator can pass both on while the run is still waiting
+    for the handoffs.
+    """
+
+    def __init__(self) -> None:
+        self._items: deque[tuple[str, Any]] = deque()
+        self._ready = asyncio.Event()
+
+    def _push(self, kind: str, value: Any) -> None:
+        self._items.append((kind, value))
+        self._ready.set()
+
+    def emit(self, agent: str, text: str) -> None:
+        self._push("delta", (agent, text))
+
+    async def merge(self, events: AsyncIterator[Any]) -> AsyncIterator[tuple[str, Any]]:
+        """
+        Yield ("event", item) for each item of `events` and ("delta", (agent, text)) for
+        specialist output, in arrival order. Consecutive pieces from the same specialist
+        are joined, so a slow consumer gets fewer, larger updates.
+        """
+
+        async def pump() -> None:
+            try:
+                async for item in events:
+                    self._push("event", item)
+            except Exception as e:
+                self._push("error", e)
+            finally:
+                self._push("done", None)
+
+        task = asyncio.create_task(pump())
+        try:
+            while True:
+                if not self._items:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                kind, value = self._items.popleft()
+                if kind == "delta":
+                    agent, text = value
+                    while self._items and self._items[0][0] == "delta" and self._items[0][1][0] == agent:
+                        text += self._items.popleft()[1][1]
+                    yield kind, (agent, text)
+                elif kind == "event":
+                    yield kind, value
+                elif kind == "error":
+                    raise value
+                else:
+                    break
+        finally:
+            if not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
@@ -1,8 +1,13 @@
+import hashlib
 import json
+import logging
 import os
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Annotated
 
-from a2a.types import Message, Role
+from a2a.types import Message
 from a2a.utils.message import get_message_text
 from agentstack_sdk.a2a.types import AgentMessage
 from agentstack_sdk.server import Server
@@ -24,32 +29,74 @@ from beeai_framework.agents.types import AgentExecutionConfig
 from beeai_framework.backend import ChatModelParameters
 from beeai_framework.backend.message import AssistantMessage, UserMessage
 from beeai_framework.memory import UnconstrainedMemory
-from beeai_framework.tools.think import ThinkTool
 from beeai_framework.tools.handoff import HandoffTool
-from beeai_framework.adapters.agentstack.agents import AgentStackAgent
+from beeai_framework.tools.think import ThinkTool
 from beeai_framework.adapters.agentstack.agents.types import AgentStackAgentStatus
+from opentelemetry import trace
 
+from .agent_directory import SPECIALISTS, AgentDirectory
+from .conversation_budget import ConversationBudget
+from .handoff_fanout import ConsultSpecialistsTool
+from .handoff_resilience import HandoffResilience
+from .handoff_stream import SpecialistStream, streamed_attempts
+from .intent_router import IntentRouter
+from .session_memory import SessionMemoryManager
+from .tracing import configure_tracing, trace_run, traced_agent, tracer
 
-server = Server()
-memories: dict[str, UnconstrainedMemory] = {}
-
-
-def get_memory(context: RunContext) -> UnconstrainedMemory:
-    # Keep a per-session memory object so the conversation stays stateful
-    """Get or create session memory keyed by context id."""
-    context_id = getattr(context, "context_id", getattr(context, "session_id", "default"))
-    if context_id not in memories:
-        memories[context_id] = UnconstrainedMemory()
-    return memories[context_id]
 
+server = Server()
+# Bounded per-session memories, kept in sync with each context's stored history
+session_memories = SessionMemoryManager()
+# "budgeted" sends a token-bounded view of the conversation to the LLM, "full" the whole memory
+MEMORY_MODE = os.getenv("CONCIERGE_MEMORY_MODE", "budgeted")
+conversation_budget = ConversationBudget()
+# Specialist discovery is cached; handoff tools are shared by every session
+agent_directory = AgentDirectory()
+# Per-specialist latency budgets, hedging, circuit breakers and latency percentiles
+handoff_resilience = HandoffResilience()
+# Local intent classifier that picks the specialists for a turn, so most turns skip LLM planning
+intent_router = IntentRouter() if os.getenv("CONCIERGE_INTENT_ROUTER", "true").lower() == "true" else None
+# Show specialist output in the trajectory while it streams in
+STREAM_HANDOFFS = os.getenv("CONCIERGE_STREAM_HANDOFFS", "true").lower() == "true"
+# Send a single routed specialist's answer to the user directly instead of having the concierge rephrase it
+DIRECT_RELAY = os.getenv("CONCIERGE_DIRECT_RELAY", "false").lower() == "true"
+
+logger = logging.getLogger(__name__)
+
+# When each specialist should be used, added to the instructions only if it is deployed
+SPECIALIST_INSTRUCTIONS = {
+    "PolicyAgent": "Consult the PolicyAgent when there are specific questions pertaining to the user's policy details.",
+    "ResearchAgent": "Consult the ResearchAgent when you need information about symptoms, health conditions, treatments, or procedures using up-to-date web resources.",
+    "ProviderAgent": "Consult the ProviderAgent when you need information about the providers in network.",
+}
+
+# Chat model clients reused across turns, one per LLM configuration
+_llm_clients: OrderedDict[tuple[str, str, str], OpenAIChatModel] = OrderedDict()
+LLM_CLIENT_CACHE_SIZE = int(os.getenv("CONCIERGE_LLM_CLIENT_CACHE_SIZE", 8))
+
+
+def get_llm_client(llm_config) -> OpenAIChatModel:
+    """Return the cached chat model for an LLM configuration, building it on first use."""
+    key = (
+        llm_config.api_model,
+        llm_config.api_base,
+        hashlib.sha256(llm_config.api_key.encode()).hexdigest(),
+    )
+    client = _llm_clients.get(key)
+    if client is not None:
+        _llm_clients.move_to_end(key)
+        return client
 
-def to_framework_message(message: Message):
-    # Normalize A2A messages into BeeAI message types
-    """Convert A2A Message to BeeAI Framework Message format."""
-    message_text = get_message_text(message)
-    if message.role == Role.agent:
-        return AssistantMessage(message_text)
-    return UserMessage(message_text)
+    client = _llm_clients[key] = OpenAIChatModel(
+        model_id=llm_config.api_model,
+        base_url=llm_config.api_base,
+        api_key=llm_config.api_key,
+        parameters=ChatModelParameters(temperature=0, stream=True),
+        tool_choice_support={"auto", "required"},
+    )
+    while len(_llm_clients) > LLM_CLIENT_CACHE_SIZE:
+        _llm_clients.popitem(last=False)
+    return client
 
 
 def summarize_for_trajectory(data: object, limit: int = 400) -> str:
@@ -84,10 +131,15 @@ def summarize_for_trajectory(data: object, limit: int = 400) -> str:
             AgentDetailTool(
                 name="Think",
                 description="Plans the best approach before responding.",
-            )
+            ),
+            AgentDetailTool(
+                name="Consult Specialists",
+                description="Hands tasks to the policy, research and provider agents in parallel.",
+            ),
         ],
     ),
 )
+@traced_agent("HealthcareConcierge")
 async def healthcare_concierge(
     message: Message,
     context: RunContext,
@@ -107,13 +159,6 @@ async def healthcare_concierge(
         content="Setting up your Healthcare Concierge.",
     )
 
-    # Attach existing session memory and backfill prior messages for multiturn conversations
-    memory = get_memory(context)
-
-    # Load existing history into BeeAI memory
-    history = [msg async for msg in context.load_history() if isinstance(msg, Message) and msg.parts]
-    await memory.add_many(to_framework_message(item) for item in history)
-
     # Configure the LLM from extension fulfillment
     if not llm or not llm.data:
         yield trajectory.trajectory_metadata(title="LLM Error", content="LLM extension missing.")
@@ -127,106 +172,271 @@ async def healthcare_concierge(
         return
 
 
-    llm_client = OpenAIChatModel(
-        model_id=llm_config.api_model,
-        base_url=llm_config.api_base,
-        api_key=llm_config.api_key,
-        parameters=ChatModelParameters(temperature=0, stream=True),
-        tool_choice_support={"auto", "required"},
-    )
-
+    llm_client = get_llm_client(llm_config)
+    user_prompt = get_message_text(message)
 
-    # Make other AgentStack agents discoverable that have been deployed to the platform and make them available via handoff tools
-    agents = await AgentStackAgent.from_agent_stack()
-    handoff_agents = {a.name: a for a in agents if a.name in {"PolicyAgent", "ResearchAgent", "ProviderAgent"}}
-    print([a.name for a in agents])
-    policy_handoff = HandoffTool(handoff_agents["PolicyAgent"])
-    research_handoff = HandoffTool(handoff_agents["ResearchAgent"])
-    provider_handoff = HandoffTool(handoff_agents["ProviderAgent"])
+    # Handoff tools for the AgentStack specialists deployed on the platform (discovery is cached)
+    try:
+        handoffs = await agent_directory.handoff_tools()
+    except Exception as e:
+        logger.warning("Agent discovery failed: %s", e)
+        handoffs = {}
+
+    # Classify the message locally; a confident route replaces the LLM planning step
+    route = intent_router.route(user_prompt) if intent_router else None
+    routed = route is not None and route.confident
+    if route is not None:
+        yield trajectory.trajectory_metadata(
+            title="Routing",
+            content=f"{route.describe()}; {'skipping the planning step' if routed else 'planning with the LLM'}.",
+        )
+    needed = route.specialists if routed else list(SPECIALISTS)
+    trace.get_current_span().set_attributes({"concierge.routed": routed, "concierge.specialists": needed})
+    selected = {name: handoffs[name] for name in needed if name in handoffs}
+
+    missing = [name for name in needed if name not in handoffs]
+    if missing:
+        yield trajectory.trajectory_metadata(
+            title="Specialists Unavailable",
+            content=f"Continuing without {', '.join(missing)}.",
+        )
 
     think_tool=ThinkTool()
+    specialist_stream = SpecialistStream()
+    # Runs the planned handoffs concurrently, each under its own timeout
+    consult_tool = ConsultSpecialistsTool(selected, handoff_resilience, on_delta=specialist_stream.emit if STREAM_HANDOFFS else None)
+    # With a single routed specialist the concierge would only rephrase its answer
+    relay_to = next(iter(selected)) if DIRECT_RELAY and routed and len(route.specialists) == 1 and selected else None
+
+    if routed:
+        # The router already chose the specialists: consult them first, without a planning step
+        tools = [consult_tool] if selected else []
+        requirements = [ConditionalRequirement(consult_tool, force_at_step=1, max_invocations=1)] if selected else []
+        consult_instruction = (
+            "Start by consulting the specialists with a single consult_specialists call, "
+            "giving each one a clearly defined task."
+        )
+    else:
+        tools = [think_tool, *([consult_tool] if selected else [])]
+        requirements = [ConditionalRequirement(think_tool, force_at_step=1),
+                        *([ConditionalRequirement(consult_tool, min_invocations=1, max_invocations=1)] if selected else []),
+                        ]
+        consult_instruction = (
+            "After thinking, consult all the specialists you need in a single consult_specialists call, "
+            "giving each one a clearly defined task, so they work in parallel."
+        )
 
     # High-level agent instruction for tone and routing behavior
-    instructions = (
-        "You are a friendly healthcare concierge. "
-        "Answer questions about plan coverage, in-network providers, and costs. "
-        "Hand off your task to the PolicyAgent when there are specific questions pertaining to the user's policy details."
-        "Hand off your task to the ResearchAgent when you need information about symptoms, health conditions, treatments, or procedures using up-to-date web resources."
-        "Hand off your task to the ProviderAgent when you need information about the providers in network."
-        "If unsure, ask clarifying questions before giving guidance."
-    )
-
-    #BeeAI Requirement agent with conditional requirements
-    agent = RequirementAgent(
-        llm=llm_client,
-        name="HealthcareConcierge",
-        memory=memory,
-        tools=[think_tool, policy_handoff, research_handoff, provider_handoff],
-        requirements=[ConditionalRequirement(think_tool, force_at_step=1),
-                      ConditionalRequirement(policy_handoff, min_invocations=1, max_invocations=1),
-                      ConditionalRequirement(research_handoff, min_invocations=1, max_invocations=1),
-                      ConditionalRequirement(provider_handoff, min_invocations=1, max_invocations=1),
-                      ],
-        role="Healthcare Concierge",
-        instructions=instructions,
-    )
-
-    user_prompt = get_message_text(message)
+    instructions = " ".join([
+        "You are a friendly healthcare concierge.",
+        "Answer questions about plan coverage, in-network providers, and costs.",
+        *(SPECIALIST_INSTRUCTIONS[name] for name in selected),
+        *([consult_instruction] if selected else []),
+        *(
+            [f"The {', '.join(missing)} {'is' if len(missing) == 1 else 'are'} unavailable right now; "
+             "tell the user which part of the question you cannot answer yet instead of guessing."]
+            if missing else []
+        ),
+        "If unsure, ask clarifying questions before giving guidance.",
+    ])
+
+    # Attach this conversation's session memory, synced with any stored history it has not seen yet
+    async with session_memories.session(context) as session:
+        # Record the incoming message; it reaches memory with the rest of the turn, and a failed turn is rolled back
+        await context.store(message)
+        session.mark_stored()
+
+        if MEMORY_MODE == "budgeted":
+            # Seed a per-turn memory with the recent turns, the rolling summary and specialist facts
+            with tracer.start_as_current_span("conversation_memory"):
+                view, report = await conversation_budget.view(session, llm_client)
+            memory = UnconstrainedMemory()
+            await memory.add_many(view)
+            yield trajectory.trajectory_metadata(title="Conversation Memory", content=report.describe())
+        else:
+            view, memory = [], session.memory
+
+        response_text = ""
+        # Latest run state, for the token usage of the whole turn
+        run_state = None
+        # Streamed specialist output is grouped per specialist and turn in the trajectory
+        stream_group = uuid.uuid4().hex[:8]
+
+        if relay_to:
+            # One specialist answers the whole question: stream its answer to the user as it is
+            # written, without concierge LLM calls to phrase the task or rephrase the answer
+            yield trajectory.trajectory_metadata(
+                title="Direct Relay",
+                content=f"Relaying the {relay_to} answer without rewriting it.",
+            )
+            relay_stream = SpecialistStream()
+            relay_streamed = False
+
+            def relay_delta(text: str) -> None:
+                nonlocal relay_streamed
+                relay_streamed = True
+                relay_stream.emit(relay_to, text)
+
+            # Exclusive: once the user has part of one attempt's answer, a duplicate's answer cannot replace it
+            attempt = streamed_attempts(selected[relay_to], user_prompt, relay_delta, memory, agent=relay_to, exclusive=True)
+
+            async def relay():
+                # A hedge started after text has streamed could never be used, so do not send one
+                yield await handoff_resilience.call(relay_to, attempt, may_hedge=lambda: not relay_streamed)
+
+            try:
+                async for kind, item in relay_stream.merge(relay()):
+                    if kind == "delta":
+                        response_text += item[1]
+                        yield item[1]
+                    elif rest := item.text[len(response_text) :]:
+                        # Whatever was not streamed, e.g. from a specialist that answers in one message; the
+                        # winning attempt is the one that streamed, so its answer continues the streamed text
+                        response_text += rest
+                        yield rest
+            except Exception as e:
+                logger.warning("Direct relay from %s failed: %s", relay_to, e)
+                if response_text:
+                    notice = f"\n\n(The {relay_to} stopped responding, so this answer may be incomplete.)"
+                    response_text += notice
+                    yield notice
+                yield trajectory.trajectory_metadata(
+                    title="Direct Relay (error)",
+                    content=f"{e}; {'the answer may be incomplete' if response_text else 'answering with the concierge instead'}.",
+                )
+            yield trajectory.trajectory_metadata(title="Specialist Health", content=handoff_resilience.describe([relay_to]))
+            if response_text:
+                # The concierge agent did not run, so record the turn in memory here
+                await memory.add_many([UserMessage(user_prompt), AssistantMessage(response_text)])
+
+        if not response_text:
+            #BeeAI Requirement agent with conditional requirements
+            agent = RequirementAgent(
+                llm=llm_client,
+                name="HealthcareConcierge",
+                memory=memory,
+                tools=tools,
+                requirements=requirements,
+                role="Healthcare Concierge",
+                instructions=instructions,
+            )
 
-    response_text = ""
-
-    def handle_final_answer_stream(data, meta) -> None:
-        nonlocal response_text
-        # Accumulate streamed final answer text
-        if getattr(data, "delta", None):
-            response_text += data.delta
-
-    # Run the agent loop and stream trajectory + final answer updates
-    async for event, meta in agent.run(
-        user_prompt,
-        execution=AgentExecutionConfig(max_iterations=20, max_retries_per_step=2),
-    ).on("final_answer", handle_final_answer_stream):
-        if meta.name == "final_answer":
-            if getattr(event, "delta", None):
-                yield event.delta
-            elif getattr(event, "text", None):
-                response_text += event.text
-        elif meta.name == "success" and event.state.steps:
-            step = event.state.steps[-1]
-            if step.tool and step.tool.name == "think":
-                thoughts = step.input.get("thoughts", "Planning response.")
-                yield trajectory.trajectory_metadata(title="Thinking", content=thoughts)
-            elif step.tool:
-                tool_name = step.tool.name
-                if tool_name != "final_answer":
+            # Specialist outcomes already shown in the trajectory
+            reported_outcomes = 0
+
+            def handle_final_answer_stream(data, meta) -> None:
+                nonlocal response_text
+                # Accumulate streamed final answer text
+                if getattr(data, "delta", None):
+                    response_text += data.delta
+
+            # Run the agent loop and stream trajectory + final answer updates, with specialist output as it arrives
+            # Handoffs are traced by the consult tool, one span per attempt
+            async for kind, item in specialist_stream.merge(trace_run(agent.run(
+                user_prompt,
+                execution=AgentExecutionConfig(max_iterations=20, max_retries_per_step=2),
+            ), ignore=(HandoffTool,)).on("final_answer", handle_final_answer_stream)):
+                if kind == "delta":
+                    specialist, text = item
                     yield trajectory.trajectory_metadata(
-                        title=f"{tool_name} (request)",
-                        content=summarize_for_trajectory(step.input),
+                        title=f"{specialist} (streaming)",
+                        content=text,
+                        group_id=f"{specialist}-{stream_group}",
                     )
+                    continue
+                event, meta = item
+                if meta.name == "final_answer":
+                    if getattr(event, "delta", None):
+                        yield event.delta
+                    elif getattr(event, "text", None):
+                        response_text += event.text
+                elif meta.name == "success" and event.state.steps:
+                    run_state = event.state
+                    step = event.state.steps[-1]
+                    if step.tool and step.tool.name == "think":
+                        thoughts = step.input.get("thoughts", "Planning response.")
+                        yield trajectory.trajectory_metadata(title="Thinking", content=thoughts)
+                    elif step.tool and step.tool.name == consult_tool.name:
+                        # One request/response pair per specialist, with how long it took
+                        for outcome in consult_tool.outcomes[reported_outcomes:]:
+                            yield trajectory.trajectory_metadata(
+                                title=f"{outcome.agent} (request)",
+                                content=summarize_for_trajectory(outcome.task),
+                            )
+                            yield trajectory.trajectory_metadata(
+                                title=f"{outcome.agent} ({outcome.status})",
+                                content=outcome.error or summarize_for_trajectory(outcome.text),
+                            )
+                        consulted = [outcome.agent for outcome in consult_tool.outcomes[reported_outcomes:]]
+                        if consulted:
+                            yield trajectory.trajectory_metadata(
+                                title="Specialist Health",
+                                content=handoff_resilience.describe(consulted),
+                            )
+                        reported_outcomes = len(consult_tool.outcomes)
+                        if getattr(step, "error", None):
+                            yield trajectory.trajectory_metadata(
+                                title=f"{consult_tool.name} (error)",
+                                content=step.error.explain(),
+                            )
+                    elif step.tool:
+                        tool_name = step.tool.name
+                        if tool_name != "final_answer":
+                            yield trajectory.trajectory_metadata(
+                                title=f"{tool_name} (request)",
+                                content=summarize_for_trajectory(step.input),
+                            )
+
+                            if getattr(step, "error", None):
+                                yield trajectory.trajectory_metadata(
+                                    title=f"{tool_name} (error)",
+                                    content=step.error.explain(),
+                                )
+                            else:
+                                output_text = (
+                                    step.output.get_text_content() if getattr(step, "output", None) else "No output"
+                                )
+                                yield trajectory.trajectory_metadata(
+                                    title=f"{tool_name} (response)",
+                                    content=summarize_for_trajectory(output_text),
+                                )
+
+        # Persist the final response in conversation history; the run already added it to memory
+        await context.store(AgentMessage(text=response_text))
+        session.mark_stored()
+
+        if run_state is not None:
+            usage = run_state.usage
+            yield trajectory.trajectory_metadata(
+                title="Token Usage",
+                content=f"Prompt tokens this turn: {usage.prompt_tokens:,} over {run_state.iteration} step(s); completion tokens: {usage.completion_tokens:,}",
+            )
+
+        if MEMORY_MODE == "budgeted":
+            # Keep this turn in the session; turns that left the recent window are folded in the
+            # background, so neither this task nor the conversation's next turn waits for it
+            await session.memory.add_many(memory.messages[len(view) :])
+            conversation_budget.compact_in_background(session, llm_client)
 
-                    if getattr(step, "error", None):
-                        yield trajectory.trajectory_metadata(
-                            title=f"{tool_name} (error)",
-                            content=step.error.explain(),
-                        )
-                    else:
-                        output_text = (
-                            step.output.get_text_content() if getattr(step, "output", None) else "No output"
-                        )
-                        yield trajectory.trajectory_metadata(
-                            title=f"{tool_name} (response)",
-                            content=summarize_for_trajectory(output_text),
-                        )
-
-    # Persist the final response in conversation history
-    await context.store(AgentMessage(text=response_text))
+@asynccontextmanager
+async def lifespan(app):
+    # Discover the specialists at startup so the first turn does not wait for it
+    try:
+        await agent_directory.handoff_tools()
+    except Exception as e:
+        logger.warning("Agent discovery at startup failed: %s", e)
+    try:
+        yield
+    finally:
+        await agent_directory.aclose()
 
 # Start the server and run the agent
 def run() -> None:
     """Start the AgentStack server for the healthcare concierge."""
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", 8000))
-    server.run(host=host, port=port)
+    configure_tracing("HealthcareConcierge")
+    server.run(host=host, port=port, lifespan_fn=lifespan)
 
 
 if __name__ == "__main__":
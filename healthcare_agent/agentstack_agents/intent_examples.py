@@ -0,0 +1,234 @@
+"""
+Labeled queries and keywords the intent router is trained on when it starts.
+
+Each example lists every specialist the query needs; an empty tuple means the
+concierge can answer on its own (greetings, thanks, questions about itself).
+Keep the held-out queries in benchmarks/intent_queries.jsonl out of this list.
+"""
+
+POLICY = "PolicyAgent"
+RESEARCH = "ResearchAgent"
+PROVIDER = "ProviderAgent"
+
+# Terms that on their own point strongly at one specialist (plurals are stemmed away)
+KEYWORDS = {
+    POLICY: [
+        "deductible", "copay", "copayment", "coinsurance", "out of pocket", "premium", "covered", "coverage",
+        "cover", "benefit", "plan", "policy", "prior authorization", "preauthorization", "referral", "claim",
+        "formulary", "tier", "in network cost", "out of network", "reimburse", "sbc", "allowed amount",
+        "maximum", "eob", "billing", "cost", "pay for", "insurance", "excluded", "exclusion",
+        "limit", "owe", "hsa", "fsa", "ppo", "hmo",
+    ],
+    RESEARCH: [
+        "symptom", "treatment", "treat", "condition", "disease", "diagnosis", "side effect",
+        "cause", "risk", "prevent", "recovery", "procedure", "surgery", "therapy", "medication",
+        "chronic", "infection", "pain", "signs", "syndrome", "disorder", "cure", "remedy",
+        "causing", "diagnosed", "manage", "safe", "heal",
+    ],
+    PROVIDER: [
+        "doctor", "physician", "specialist", "provider", "clinic", "in network",
+        "cardiologist", "dermatologist", "neurologist", "pediatrician", "psychiatrist", "oncologist",
+        "orthopedic", "ob gyn", "gynecologist", "zip", "accepting", "appointment", "board certified",
+        "hospital affiliation", "speaks", "spanish", "closest", "zipcode",
+    ],
+}
+
+EXAMPLES: list[tuple[str, tuple[str, ...]]] = [
+    # Policy: costs, coverage rules and plan terms
+    ("What is my deductible?", (POLICY,)),
+    ("How much is the individual deductible on my plan?", (POLICY,)),
+    ("What's the family out-of-pocket maximum?", (POLICY,)),
+    ("How much is a primary care visit copay?", (POLICY,)),
+    ("What do I pay for a specialist visit?", (POLICY,)),
+    ("Is urgent care covered and what is the copay?", (POLICY,)),
+    ("How much does an emergency room visit cost under my plan?", (POLICY,)),
+    ("Does my plan cover preventive care at no cost?", (POLICY,)),
+    ("What is the coinsurance for inpatient hospital stays?", (POLICY,)),
+    ("Do I need a referral to see a specialist?", (POLICY,)),
+    ("Which services need prior authorization?", (POLICY,)),
+    ("Is out-of-network care covered at all?", (POLICY,)),
+    ("What are the prescription drug tiers and copays?", (POLICY,)),
+    ("How much is a generic drug on my plan?", (POLICY,)),
+    ("Does the plan cover mental health outpatient visits?", (POLICY,)),
+    ("Are chiropractic visits covered?", (POLICY,)),
+    ("Is acupuncture covered by my insurance?", (POLICY,)),
+    ("Does my insurance cover hearing aids?", (POLICY,)),
+    ("Is dental care for children included?", (POLICY,)),
+    ("Does the plan pay for eyeglasses?", (POLICY,)),
+    ("How many physical therapy visits are covered per year?", (POLICY,)),
+    ("What does my plan pay for an MRI?", (POLICY,)),
+    ("How much will lab work cost me?", (POLICY,)),
+    ("Is bariatric surgery excluded from coverage?", (POLICY,)),
+    ("What's the cost of having a baby under this plan?", (POLICY,)),
+    ("Does the deductible apply to specialist visits?", (POLICY,)),
+    ("What does the summary of benefits say about home health care?", (POLICY,)),
+    ("Are infertility treatments covered?", (POLICY,)),
+    ("How do I file a claim for an out of network visit?", (POLICY,)),
+    ("What is the premium for my policy?", (POLICY,)),
+    ("Does my plan cover ambulance services?", (POLICY,)),
+    ("What are the limits on skilled nursing facility care?", (POLICY,)),
+    ("Is a telehealth visit cheaper than an office visit?", (POLICY,)),
+    ("Which plan am I on and what are its benefits?", (POLICY,)),
+    ("How much is the copay for a specialty drug?", (POLICY,)),
+    ("Does coverage differ for in-network and out-of-network providers?", (POLICY,)),
+    ("Are routine eye exams covered for adults?", (POLICY,)),
+    ("Is weight loss medication on the formulary?", (POLICY,)),
+    ("What will I owe after insurance for outpatient surgery?", (POLICY,)),
+    ("Do I have to meet my deductible before coinsurance kicks in?", (POLICY,)),
+    ("Is hospice care covered?", (POLICY,)),
+    ("Can I get reimbursed for a flu shot at a pharmacy?", (POLICY,)),
+    ("What's excluded from my health plan?", (POLICY,)),
+    ("Does my plan have an HSA?", (POLICY,)),
+    ("How much does a diagnostic test like an x-ray cost me?", (POLICY,)),
+    ("Is rehabilitation after an injury covered?", (POLICY,)),
+    ("How much does a dentist visit cost me?", (POLICY,)),
+    ("What is the visit limit for occupational therapy?", (POLICY,)),
+    ("Will insurance pay if I go to an out-of-state hospital?", (POLICY,)),
+    ("How much is a walk-in clinic visit?", (POLICY,)),
+    ("Are behavioral health services limited on this plan?", (POLICY,)),
+    ("How much is an MRI?", (POLICY,)),
+    ("How much is a specialist visit?", (POLICY,)),
+    ("What is coinsurance?", (POLICY,)),
+    ("What is an HMO and is my plan one?", (POLICY,)),
+    ("How much is an ambulance ride?", (POLICY,)),
+
+    # Research: conditions, symptoms, treatments, procedures
+    ("What are the symptoms of type 2 diabetes?", (RESEARCH,)),
+    ("What causes migraines?", (RESEARCH,)),
+    ("How is high blood pressure treated?", (RESEARCH,)),
+    ("Is a persistent cough a sign of something serious?", (RESEARCH,)),
+    ("What are the side effects of metformin?", (RESEARCH,)),
+    ("How long is recovery from knee replacement surgery?", (RESEARCH,)),
+    ("What is atrial fibrillation?", (RESEARCH,)),
+    ("How can I lower my cholesterol naturally?", (RESEARCH,)),
+    ("What are early signs of a stroke?", (RESEARCH,)),
+    ("Is psoriasis contagious?", (RESEARCH,)),
+    ("What treatments exist for chronic back pain?", (RESEARCH,)),
+    ("How do I know if I have the flu or a cold?", (RESEARCH,)),
+    ("What is the difference between an MRI and a CT scan?", (RESEARCH,)),
+    ("What happens during a colonoscopy?", (RESEARCH,)),
+    ("Are there new treatments for Alzheimer's disease?", (RESEARCH,)),
+    ("What are the risk factors for heart disease?", (RESEARCH,)),
+    ("How is asthma diagnosed in children?", (RESEARCH,)),
+    ("What does an elevated A1C mean?", (RESEARCH,)),
+    ("Can anxiety cause chest pain?", (RESEARCH,)),
+    ("What are the stages of breast cancer?", (RESEARCH,)),
+    ("How effective is physical therapy for a rotator cuff tear?", (RESEARCH,)),
+    ("What should I eat with celiac disease?", (RESEARCH,)),
+    ("Why do my joints ache in the morning?", (RESEARCH,)),
+    ("How do antidepressants work?", (RESEARCH,)),
+    ("Is it safe to take ibuprofen every day?", (RESEARCH,)),
+    ("What is a normal resting heart rate?", (RESEARCH,)),
+    ("How do I treat a sprained ankle at home?", (RESEARCH,)),
+    ("What are common symptoms of thyroid problems?", (RESEARCH,)),
+    ("What is eczema and how is it managed?", (RESEARCH,)),
+    ("How serious is pneumonia in older adults?", (RESEARCH,)),
+    ("What is a hernia?", (RESEARCH,)),
+    ("What is sciatica and what causes it?", (RESEARCH,)),
+    ("How is kidney stone pain treated?", (RESEARCH,)),
+    ("What does a high white blood cell count mean?", (RESEARCH,)),
+    ("How is Lyme disease different from the flu?", (RESEARCH,)),
+    ("What are the options for treating sleep apnea?", (RESEARCH,)),
+    ("How do I prevent kidney stones?", (RESEARCH,)),
+    ("What does a dermatologist treat?", (RESEARCH,)),
+    ("My child has a rash and a fever, what could it be?", (RESEARCH,)),
+    ("What's the latest research on long COVID?", (RESEARCH,)),
+    ("How does chemotherapy affect the body?", (RESEARCH,)),
+    ("What are the warning signs of depression?", (RESEARCH,)),
+    ("I've been dizzy for a week, what might cause that?", (RESEARCH,)),
+    ("What is the recovery time for a hernia repair?", (RESEARCH,)),
+    ("How is ADHD treated in adults?", (RESEARCH,)),
+    ("Are statins safe long term?", (RESEARCH,)),
+    ("What is preeclampsia?", (RESEARCH,)),
+    ("What helps with seasonal allergies?", (RESEARCH,)),
+    ("Explain what an echocardiogram checks for.", (RESEARCH,)),
+    ("How do you manage irritable bowel syndrome?", (RESEARCH,)),
+    ("What's the difference between type 1 and type 2 diabetes?", (RESEARCH,)),
+    ("Is a low carb diet good for weight loss?", (RESEARCH,)),
+    ("What could be causing my fatigue?", (RESEARCH,)),
+
+    # Provider: finding in-network doctors by specialty, place and attributes
+    ("Find me a cardiologist in Atlanta.", (PROVIDER,)),
+    ("Are there any in-network dermatologists near 30309?", (PROVIDER,)),
+    ("I need a pediatrician close to me.", (PROVIDER,)),
+    ("Which neurologists are in network?", (PROVIDER,)),
+    ("Can you list psychiatrists accepting new patients?", (PROVIDER,)),
+    ("Find an orthopedic surgeon near Chicago.", (PROVIDER,)),
+    ("Is Dr. Sarah Mitchell in my network?", (PROVIDER,)),
+    ("Who is the closest oncologist to my zip code?", (PROVIDER,)),
+    ("I'm looking for an OB-GYN who speaks Spanish.", (PROVIDER,)),
+    ("Show me board certified internal medicine doctors.", (PROVIDER,)),
+    ("What's the phone number for an in-network cardiologist?", (PROVIDER,)),
+    ("Which doctors are affiliated with Emory University Hospital?", (PROVIDER,)),
+    ("Find a doctor within 10 miles of 10001.", (PROVIDER,)),
+    ("I moved to Denver, who can be my new primary care physician?", (PROVIDER,)),
+    ("Are there emergency medicine physicians in my area?", (PROVIDER,)),
+    ("List providers in Boston.", (PROVIDER,)),
+    ("I need a female doctor near Seattle.", (PROVIDER,)),
+    ("Who are the in-network specialists for neurology in Texas?", (PROVIDER,)),
+    ("Find a children's doctor in Miami.", (PROVIDER,)),
+    ("Is there a psychiatrist nearby who does telehealth appointments?", (PROVIDER,)),
+    ("Which dermatologist has the most years of experience?", (PROVIDER,)),
+    ("Where is the nearest in-network clinic?", (PROVIDER,)),
+    ("Can you recommend a heart doctor near 94110?", (PROVIDER,)),
+    ("I want to book an appointment with an in-network OB/GYN.", (PROVIDER,)),
+    ("Does Dr. Patel accept my insurance?", (PROVIDER,)),
+    ("Find a provider who speaks Mandarin.", (PROVIDER,)),
+    ("Who can I see for skin issues around Phoenix?", (PROVIDER,)),
+    ("Look up cancer doctors in network near me.", (PROVIDER,)),
+    ("Which orthopedists practice at Piedmont Atlanta Hospital?", (PROVIDER,)),
+    ("Find me a new family doctor.", (PROVIDER,)),
+    ("What providers are available in Georgia?", (PROVIDER,)),
+    ("Where did Dr. Mitchell go to medical school?", (PROVIDER,)),
+    ("List pediatricians in Denver, CO.", (PROVIDER,)),
+    ("List dermatologists accepting new patients in Houston.", (PROVIDER,)),
+    ("Show me family doctors in Austin, TX.", (PROVIDER,)),
+
+    # Two specialists
+    ("Find an in-network cardiologist near me and tell me what the visit will cost.", (POLICY, PROVIDER)),
+    ("I need a dermatologist in Atlanta; how much is the specialist copay?", (POLICY, PROVIDER)),
+    ("Is a psychiatrist covered and who is in network nearby?", (POLICY, PROVIDER)),
+    ("Which pediatricians are in network and does my plan cover well child visits?", (POLICY, PROVIDER)),
+    ("Do I need a referral to see an orthopedic surgeon, and can you find one in Chicago?", (POLICY, PROVIDER)),
+    ("What's my copay for an OB-GYN visit and who can I see near 30309?", (POLICY, PROVIDER)),
+    ("Find an in-network neurologist and check if an EEG needs prior authorization.", (POLICY, PROVIDER)),
+    ("Who is an in-network oncologist near me and what will chemotherapy cost?", (POLICY, PROVIDER)),
+    ("How much is a dermatology visit and which dermatologists are near 94110?", (POLICY, PROVIDER)),
+    ("What are the treatment options for sleep apnea and does my plan cover a CPAP machine?", (POLICY, RESEARCH)),
+    ("Is physical therapy effective for back pain and how many visits does my plan cover?", (POLICY, RESEARCH)),
+    ("What is a colonoscopy like and is it covered as preventive care?", (POLICY, RESEARCH)),
+    ("How is infertility treated and does my insurance pay for IVF?", (POLICY, RESEARCH)),
+    ("What are the symptoms of depression and is therapy covered?", (POLICY, RESEARCH)),
+    ("Is bariatric surgery a good option for diabetes, and would my plan cover it?", (POLICY, RESEARCH)),
+    ("What do statins do and what tier is atorvastatin on my formulary?", (POLICY, RESEARCH)),
+    ("How long is recovery from a hip replacement and how much will the surgery cost me?", (POLICY, RESEARCH)),
+    ("What is a knee arthroscopy and does my plan cover it?", (POLICY, RESEARCH)),
+    ("I have chest pain when I exercise; what could it be and which cardiologists are nearby?", (RESEARCH, PROVIDER)),
+    ("What causes eczema flare ups and can you find a dermatologist in Atlanta?", (RESEARCH, PROVIDER)),
+    ("My son might have ADHD; what are the signs and who is a good pediatrician near me?", (RESEARCH, PROVIDER)),
+    ("What are migraine treatments and is there a neurologist in network close by?", (RESEARCH, PROVIDER)),
+    ("Explain what an oncologist does and list the ones near 30309.", (RESEARCH, PROVIDER)),
+    ("What are the symptoms of a torn ACL and which orthopedic doctors can see me?", (RESEARCH, PROVIDER)),
+
+    # All three
+    ("I was just diagnosed with atrial fibrillation; what are my treatment options, who can treat me nearby, and what will it cost?", (POLICY, RESEARCH, PROVIDER)),
+    ("I think I have a thyroid problem. What are the symptoms, which in-network doctor should I see, and how much is a specialist visit?", (POLICY, RESEARCH, PROVIDER)),
+    ("My daughter has asthma; how is it treated, is there a pediatrician near me, and does the plan cover inhalers?", (POLICY, RESEARCH, PROVIDER)),
+    ("I'm pregnant: what prenatal tests are recommended, which OB-GYNs are in network, and what does delivery cost?", (POLICY, RESEARCH, PROVIDER)),
+    ("What are treatments for skin cancer, who are the in-network dermatologists in Atlanta, and is Mohs surgery covered?", (POLICY, RESEARCH, PROVIDER)),
+    ("I have knee pain when running. What might it be, who should I see near 30309, and do I need a referral?", (POLICY, RESEARCH, PROVIDER)),
+
+    # No specialist needed
+    ("Hi!", ()),
+    ("Hello there", ()),
+    ("Good morning", ()),
+    ("Thanks, that's helpful.", ()),
+    ("Thank you so much!", ()),
+    ("Great, thanks for your help", ()),
+    ("That's all I needed, bye.", ()),
+    ("What can you help me with?", ()),
+    ("Who are you?", ()),
+    ("Can you summarize what you told me so far?", ()),
+    ("Perfect, appreciate it.", ()),
+    ("Okay got it", ()),
+]
@@ -0,0 +1,167 @@
+import logging
+import math
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from .agent_directory import SPECIALISTS
+from .intent_examples import EXAMPLES, KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can could do does for from how i i'm if in is it its me my of on or please "
+    "so that the their them there this to was what whats when where which who will with would you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased word tokens with a light plural stemming, so "copays" matches "copay".
+    Five-digit numbers become "zipcode", so any ZIP code is one known term.
+    """
+    tokens = []
+    for token in TOKEN.findall(text.lower().replace("'", "")):
+        if len(token) == 5 and token.isdigit():
+            token = "zipcode"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def terms(text: str) -> list[str]:
+    """Unigrams and bigrams of the non-stopword tokens."""
+    tokens = [token for token in tokenize(text) if token not in STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+@dataclass
+class Route:
+    """Which specialists a message needs, according to the router."""
+
+    # Probability that each specialist is needed
+    scores: dict[str, float]
+    specialists: list[str]
+    # 0 when any specialist is a coin flip, 1 when every decision is certain
+    confidence: float
+    confident: bool
+    seconds: float
+
+    def describe(self) -> str:
+        scores = ", ".join(f"{name} {score:.2f}" for name, score in self.scores.items())
+        chosen = ", ".join(self.specialists) or "no specialist"
+        return f"{chosen} (confidence {self.confidence:.2f}; scores {scores}; {self.seconds * 1000:.1f} ms)"
+
+
+class IntentRouter:
+    """
+    Local classifier that decides which specialists a concierge message needs.
+
+    Messages are turned into TF-IDF vectors over word unigrams and bigrams, plus one
+    keyword-hit feature per specialist, and scored by one logistic regression per
+    specialist. The model is trained with NumPy on the bundled examples when the
+    router is created, which takes a fraction of a second; scoring a message takes
+    well under a millisecond, so no LLM call is spent on routing.
+
+    A route is `confident` when every specialist's probability is far enough from
+    0.5 and the message shares vocabulary with the training data; otherwise the
+    concierge falls back to planning with the LLM.
+    """
+
+    def __init__(
+        self,
+        threshold: float = float(os.getenv("CONCIERGE_ROUTER_THRESHOLD", 0.5)),
+        min_confidence: float = float(os.getenv("CONCIERGE_ROUTER_MIN_CONFIDENCE", 0.6)),
+        examples: list[tuple[str, tuple[str, ...]]] = EXAMPLES,
+        keywords: dict[str, list[str]] = KEYWORDS,
+        labels: tuple[str, ...] = SPECIALISTS,
+        l2: float = 1e-3,
+        epochs: int = 400,
+    ) -> None:
+        self.threshold = threshold
+        self.min_confidence = min_confidence
+        self.labels = labels
+        # Keywords are matched on the same normalized terms as the messages
+        self.keywords = {label: {" ".join(tokenize(keyword)) for keyword in keywords.get(label, [])} for label in labels}
+        self._fit(examples, l2, epochs)
+
+    def _fit(self, examples: list[tuple[str, tuple[str, ...]]], l2: float, epochs: int) -> None:
+        started = time.perf_counter()
+        documents = [Counter(terms(text)) for text, _ in examples]
+        document_frequency = Counter(term for document in documents for term in document)
+        self.vocabulary = {term: i for i, term in enumerate(sorted(document_frequency))}
+        # Smoothed IDF, as in scikit-learn's TfidfVectorizer
+        self.idf = np.array(
+            [math.log((1 + len(documents)) / (1 + document_frequency[term])) + 1 for term in self.vocabulary]
+        )
+
+        x = np.vstack([self._vectorize(text) for text, _ in examples])
+        y = np.array([[label in needed for label in self.labels] for _, needed in examples], dtype=float)
+
+        # One-vs-rest logistic regression, full-batch gradient descent with Adam
+        self.weights = np.zeros((x.shape[1], len(self.labels)))
+        self.bias = np.zeros(len(self.labels))
+        m_w, v_w = np.zeros_like(self.weights), np.zeros_like(self.weights)
+        m_b, v_b = np.zeros_like(self.bias), np.zeros_like(self.bias)
+        rate, beta1, beta2, eps = 0.1, 0.9, 0.999, 1e-8
+        for step in range(1, epochs + 1):
+            error = self._sigmoid(x @ self.weights + self.bias) - y
+            grad_w = x.T @ error / len(x) + l2 * self.weights
+            grad_b = error.mean(axis=0)
+            m_w, v_w = beta1 * m_w + (1 - beta1) * grad_w, beta2 * v_w + (1 - beta2) * grad_w**2
+            m_b, v_b = beta1 * m_b + (1 - beta1) * grad_b, beta2 * v_b + (1 - beta2) * grad_b**2
+            correction1, correction2 = 1 - beta1**step, 1 - beta2**step
+            self.weights -= rate * (m_w / correction1) / (np.sqrt(v_w / correction2) + eps)
+            self.bias -= rate * (m_b / correction1) / (np.sqrt(v_b / correction2) + eps)
+
+        logger.info(
+            "Intent router trained on %d examples, %d terms in %.2f s",
+            len(examples),
+            len(self.vocabulary),
+            time.perf_counter() - started,
+        )
+
+    @staticmethod
+    def _sigmoid(z: np.ndarray) -> np.ndarray:
+        return 1 / (1 + np.exp(-np.clip(z, -30, 30)))
+
+    def _vectorize(self, text: str) -> np.ndarray:
+        counts = Counter(terms(text))
+        tfidf = np.zeros(len(self.vocabulary))
+        for term, count in counts.items():
+            if (i := self.vocabulary.get(term)) is not None:
+                tfidf[i] = (1 + math.log(count)) * self.idf[i]
+        norm = np.linalg.norm(tfidf)
+        if norm:
+            tfidf /= norm
+
+        # Keyword hits per specialist, on a log scale
+        normalized = " " + " ".join(tokenize(text)) + " "
+        hits = [
+            math.log1p(sum(f" {keyword} " in normalized for keyword in self.keywords[label])) for label in self.labels
+        ]
+        return np.concatenate([tfidf, hits])
+
+    def route(self, text: str) -> Route:
+        """Score a message and choose the specialists it needs."""
+        started = time.perf_counter()
+        x = self._vectorize(text)
+        probabilities = self._sigmoid(x @ self.weights + self.bias)
+        scores = {label: float(p) for label, p in zip(self.labels, probabilities)}
+        specialists = [label for label, p in scores.items() if p >= self.threshold]
+
+        # A message with no known terms or keywords gets the model's prior, not a decision
+        confidence = float(np.min(np.abs(2 * probabilities - 1))) if x.any() else 0.0
+        return Route(
+            scores=scores,
+            specialists=specialists,
+            confidence=confidence,
+            confident=confidence >= self.min_confidence,
+            seconds=time.perf_counter() - started,
+        )
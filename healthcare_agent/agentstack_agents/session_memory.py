@@ -0,0 +1,187 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from a2a.types import Message, Role
+from a2a.utils.message import get_message_text
+from agentstack_sdk.server.context import RunContext
+from beeai_framework.backend.message import AssistantMessage, UserMessage
+from beeai_framework.memory import BaseMemory, UnconstrainedMemory
+
+
+def to_framework_message(message: Message):
+    # Normalize A2A messages into BeeAI message types
+    """Convert A2A Message to BeeAI Framework Message format."""
+    message_text = get_message_text(message)
+    if message.role == Role.agent:
+        return AssistantMessage(message_text)
+    return UserMessage(message_text)
+
+
+def context_key(context: RunContext) -> str:
+    return getattr(context, "context_id", getattr(context, "session_id", "default"))
+
+
+@dataclass
+class Session:
+    """Conversation memory of one context and how much of the stored history it already holds."""
+
+    memory: BaseMemory
+    # Number of context history items already reflected in `memory`
+    watermark: int = 0
+    # Whether `watermark` covers the whole stored history: set by reading it, and kept while every
+    # write to it goes through `mark_stored`, so a warm session need not read the history again
+    synced: bool = False
+    last_used: float = field(default_factory=time.monotonic)
+    # Turns of the same conversation run one at a time
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Rolling summary of turns folded out of memory, and what specialists answered in them
+    summary: str = ""
+    summarized_turns: int = 0
+    facts: list[dict] = field(default_factory=list)
+    # Background fold of turns that left the recent window, if one is running
+    compaction: asyncio.Task | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.memory.messages)
+
+    def mark_stored(self, count: int = 1) -> None:
+        """
+        Record messages stored to the context history that are also in memory. A turn that
+        fails is rolled back by the manager, so the next sync reads them from the history.
+        """
+        self.watermark += count
+
+
+@dataclass
+class MemoryStats:
+    sessions: int = 0
+    messages: int = 0
+    created: int = 0
+    # Full reads of a context's stored history; warm sessions skip them
+    history_loads: int = 0
+    evicted_idle: int = 0
+    evicted_lru: int = 0
+
+
+class SessionMemoryManager:
+    """
+    Per-context conversation memories, bounded by session count, idle time and the
+    total number of messages held across all sessions.
+
+    Memory is only a cache of the context history: a new or evicted conversation is
+    rebuilt from `context.load_history()` on its next turn. A warm session does not read
+    the history at all, since everything stored since its last read went through it and
+    is already in memory. That holds while one concierge process serves each context;
+    with `skip_warm_history` off, every turn reads the history and adds what is past
+    the watermark, for replicas that share contexts. A turn that fails leaves memory and watermark
+    as they were before it and marks the session for a read, so whatever the turn stored
+    is picked up from the history, past the watermark, on the next one.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = int(os.getenv("CONCIERGE_MAX_SESSIONS", 256)),
+        idle_ttl_seconds: float = float(os.getenv("CONCIERGE_SESSION_TTL_SECONDS", 3600)),
+        max_total_messages: int = int(os.getenv("CONCIERGE_MAX_MEMORY_MESSAGES", 20_000)),
+        memory_factory: Callable[[], BaseMemory] = UnconstrainedMemory,
+        skip_warm_history: bool = os.getenv("CONCIERGE_SKIP_WARM_HISTORY", "true").lower() == "true",
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_total_messages = max_total_messages
+        self.memory_factory = memory_factory
+        self.skip_warm_history = skip_warm_history
+        self.sessions: OrderedDict[str, Session] = OrderedDict()
+        self.stats = MemoryStats()
+        # Guards looking up, creating and re-registering sessions
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def session(self, context: RunContext) -> AsyncIterator[Session]:
+        """Hold the context's session for one turn, synced with any history it has not seen yet."""
+        key = context_key(context)
+        while True:
+            async with self._lock:
+                session = self.sessions.get(key)
+                if session is None:
+                    session = self.sessions[key] = Session(self.memory_factory())
+                    self.stats.created += 1
+                self.sessions.move_to_end(key)
+            await session.lock.acquire()
+            async with self._lock:
+                current = self.sessions.get(key)
+                if current is None:
+                    # Evicted while waiting for the previous turn to finish; it is still valid
+                    self.sessions[key] = current = session
+                if current is session:
+                    break
+            # Another turn replaced it meanwhile; join that session so the conversation has only one
+            session.lock.release()
+
+        try:
+            await self._sync(session, context)
+            watermark, before = session.watermark, {id(msg) for msg in session.memory.messages}
+            try:
+                yield session
+            except BaseException:
+                await self._rollback(session, watermark, before)
+                raise
+        finally:
+            session.last_used = time.monotonic()
+            self._evict()
+            session.lock.release()
+
+    async def _rollback(self, session: Session, watermark: int, before: set[int]) -> None:
+        """Undo a failed turn: drop what it added to memory and un-see what it stored."""
+        # Kept by identity, since a background fold may have removed older messages meanwhile
+        kept = [msg for msg in session.memory.messages if id(msg) in before]
+        session.memory.reset()
+        await session.memory.add_many(kept)
+        session.watermark = watermark
+        # The failed turn may have stored messages that are no longer in memory
+        session.synced = False
+
+    async def _sync(self, session: Session, context: RunContext) -> None:
+        if session.synced and self.skip_warm_history:
+            return
+        self.stats.history_loads += 1
+        history = [msg async for msg in context.load_history() if isinstance(msg, Message) and msg.parts]
+        if len(history) < session.watermark:
+            # History shrank (context cleared elsewhere); start over from what is stored
+            if session.compaction is not None:
+                session.compaction.cancel()
+            session.memory.reset()
+            session.watermark = 0
+            session.summary, session.summarized_turns, session.facts = "", 0, []
+        unseen = history[session.watermark :]
+        if unseen:
+            await session.memory.add_many(to_framework_message(item) for item in unseen)
+        session.watermark = len(history)
+        session.synced = True
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for key, session in list(self.sessions.items()):
+            if not session.lock.locked() and now - session.last_used > self.idle_ttl_seconds:
+                del self.sessions[key]
+                self.stats.evicted_idle += 1
+
+        total = sum(session.size for session in self.sessions.values())
+        # Least recently used first; sessions in the middle of a turn are never evicted
+        for key, session in list(self.sessions.items()):
+            if len(self.sessions) <= self.max_sessions and total <= self.max_total_messages:
+                break
+            if session.lock.locked():
+                continue
+            del self.sessions[key]
+            total -= session.size
+            self.stats.evicted_lru += 1
+
+        self.stats.sessions = len(self.sessions)
+        self.stats.messages = total
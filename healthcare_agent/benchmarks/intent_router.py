@@ -0,0 +1,103 @@
+"""
+Offline evaluation of the concierge's intent router.
+
+Run from the healthcare_agent directory:
+
+    uv run python benchmarks/intent_router.py [--queries benchmarks/intent_queries.jsonl] [--errors]
+
+The labeled queries (one JSON object per line with "query" and "specialists") are
+held out from the examples the router is trained on. The report shows, for each
+specialist, how often the router chose it when it was needed and when it was not.
+It also shows how many turns are confident enough to skip the LLM planning step,
+and how accurate those turns are. It ends with a sweep over the confidence
+threshold, so CONCIERGE_ROUTER_MIN_CONFIDENCE can be picked from data.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from agentstack_agents.agent_directory import SPECIALISTS
+from agentstack_agents.intent_router import IntentRouter, Route
+
+DEFAULT_QUERIES = Path(__file__).with_name("intent_queries.jsonl")
+
+
+def load_queries(path: Path) -> list[tuple[str, set[str]]]:
+    queries = []
+    for line in path.read_text().splitlines():
+        if line.strip():
+            item = json.loads(line)
+            queries.append((item["query"], set(item["specialists"])))
+    return queries
+
+
+def report_specialists(queries: list[tuple[str, set[str]]], routes: list[Route]) -> None:
+    print(f"{'specialist':15} {'precision':>9} {'recall':>7} {'f1':>6} {'support':>8}")
+    for label in SPECIALISTS:
+        tp = sum(label in needed and label in route.specialists for (_, needed), route in zip(queries, routes))
+        fp = sum(label not in needed and label in route.specialists for (_, needed), route in zip(queries, routes))
+        fn = sum(label in needed and label not in route.specialists for (_, needed), route in zip(queries, routes))
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        print(f"{label:15} {precision:>9.2f} {recall:>7.2f} {f1:>6.2f} {tp + fn:>8}")
+
+
+def summarize(queries: list[tuple[str, set[str]]], routes: list[Route], min_confidence: float) -> dict:
+    confident = [(needed, route) for (_, needed), route in zip(queries, routes) if route.confidence >= min_confidence]
+    return {
+        "confident": len(confident) / len(queries),
+        "exact": sum(set(route.specialists) == needed for needed, route in confident) / len(confident) if confident else 0.0,
+        # A needed specialist left out is the costly mistake: the answer misses part of the question
+        "missed": sum(bool(needed - set(route.specialists)) for needed, route in confident) / len(confident) if confident else 0.0,
+        "handoffs": statistics.mean(len(route.specialists) for _, route in confident) if confident else 0.0,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES, help="labeled JSONL query file")
+    parser.add_argument("--errors", action="store_true", help="list every misrouted query")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    started = time.perf_counter()
+    router = IntentRouter()
+    training = time.perf_counter() - started
+    routes = [router.route(query) for query, _ in queries]
+    latencies = sorted(route.seconds * 1000 for route in routes)
+
+    print(f"{len(queries)} labeled queries from {args.queries}")
+    print(f"Training: {training:.2f} s; routing: median {statistics.median(latencies):.3f} ms, max {latencies[-1]:.3f} ms\n")
+
+    exact = sum(set(route.specialists) == needed for (_, needed), route in zip(queries, routes)) / len(queries)
+    print(f"Exact specialist set on all queries: {exact:.1%}\n")
+    report_specialists(queries, routes)
+
+    summary = summarize(queries, routes, router.min_confidence)
+    print(
+        f"\nAt min confidence {router.min_confidence:g}: {summary['confident']:.1%} of turns skip planning; "
+        f"on those, {summary['exact']:.1%} get the exact specialist set, {summary['missed']:.1%} miss a needed "
+        f"specialist, and {summary['handoffs']:.2f} specialists are consulted per turn (previously {len(SPECIALISTS)})."
+    )
+
+    print(f"\n{'min confidence':>14} {'confident':>10} {'exact':>7} {'missed':>7} {'handoffs':>9}")
+    for threshold in (0.0, 0.2, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9):
+        row = summarize(queries, routes, threshold)
+        print(f"{threshold:>14.1f} {row['confident']:>10.1%} {row['exact']:>7.1%} {row['missed']:>7.1%} {row['handoffs']:>9.2f}")
+
+    if args.errors:
+        print("\nMisrouted queries:")
+        for (query, needed), route in zip(queries, routes):
+            if set(route.specialists) != needed:
+                flag = "confident" if route.confident else "fallback"
+                print(f"- [{flag}] {query}\n    expected {sorted(needed) or 'none'}, got {route.describe()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+
+from agentstack_agents.handoff_resilience import CircuitOpenError, HandoffResilience
+
+
+def resilience(**overrides) -> HandoffResilience:
+    # No hedging unless a test asks for it; generous budget so only deliberate timeouts fire
+    options = dict(
+        default_budget=5,
+        budgets={},
+        hedge_min_samples=1000,
+        hedge_min_delay=0.01,
+        hedge_max_ratio=1,
+        breaker_failures=2,
+        breaker_reset_seconds=3600,
+    )
+    return HandoffResilience(**(options | overrides))
+
+
+class Attempts:
+    """Attempt factory whose n-th attempt runs the n-th behaviour, counting the calls."""
+
+    def __init__(self, *behaviours) -> None:
+        self.behaviours = list(behaviours)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> str:
+        behaviour = self.behaviours[min(self.calls, len(self.behaviours) - 1)]
+        self.calls += 1
+        try:
+            return await behaviour()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+async def answer(text: str = "ok") -> str:
+    return text
+
+
+async def fail() -> str:
+    raise ConnectionError("specialist unreachable")
+
+
+async def hang() -> str:
+    await asyncio.Event().wait()
+    raise AssertionError("unreachable")
+
+
+def test_hedge_wins_over_slow_primary() -> None:
+    async def run() -> None:
+        handoffs = resilience(hedge_min_samples=1)
+        handoffs.health("A").latencies.add(0.01)
+        attempts = Attempts(hang, lambda: answer("hedge"))
+        result = await handoffs.call("A", attempts)
+        await asyncio.sleep(0)
+        assert (result.text, result.hedged, result.hedge_won) == ("hedge", True, True)
+        assert attempts.cancelled == 1
+        health = handoffs.health("A")
+        assert (health.hedges, health.hedge_wins) == (1, 1)
+        # The slow primary's time is what gets recorded, not just the fast hedge's
+        assert health.latencies.samples[-1] == pytest.approx(result.seconds)
+        assert health.latencies.samples[-1] >= 0.01
+
+    asyncio.run(run())
+
+
+def test_fast_failure_is_retried_once() -> None:
+    async def run() -> None:
+        handoffs = resilience()
+        attempts = Attempts(fail, answer)
+        result = await handoffs.call("A", attempts)
+        assert (result.text, result.hedged, result.hedge_won) == ("ok", True, True)
+        assert attempts.calls == 2
+        assert handoffs.health("A").breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_breaker_opens_then_lets_one_trial_through() -> None:
+    async def run() -> None:
+        handoffs = resilience(hedge_max_ratio=0)
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await handoffs.call("A", Attempts(fail))
+        health = handoffs.health("A")
+        assert health.breaker.state == "open"
+
+        skipped = Attempts(answer)
+        with pytest.raises(CircuitOpenError):
+            await handoffs.call("A", skipped)
+        assert skipped.calls == 0 and health.rejected == 1
+
+        health.breaker.reset_seconds = 0
+        assert health.breaker.state == "half-open"
+        release = asyncio.Event()
+
+        async def trial() -> str:
+            await release.wait()
+            return "recovered"
+
+        running = asyncio.create_task(handoffs.call("A", Attempts(trial)))
+        await asyncio.sleep(0)
+        # Only one trial at a time while half-open
+        with pytest.raises(CircuitOpenError):
+            await handoffs.call("A", Attempts(answer))
+        release.set()
+        assert (await running).text == "recovered"
+        assert health.breaker.state == "closed"
+        assert (await handoffs.call("A", Attempts(answer))).text == "ok"
+
+    asyncio.run(run())
+
+
+def test_call_times_out_at_its_budget() -> None:
+    async def run() -> None:
+        handoffs = resilience(budgets={"A": 0.05})
+        attempts = Attempts(hang)
+        with pytest.raises(TimeoutError):
+            await handoffs.call("A", attempts)
+        await asyncio.sleep(0)
+        health = handoffs.health("A")
+        assert (health.timeouts, health.failures) == (1, 1)
+        assert attempts.cancelled == 1
+        # Counted as a budget-length sample, so p95 does not drift below what callers actually wait
+        assert list(health.latencies.samples) == [0.05]
+
+    asyncio.run(run())
+
+
+def test_cancelling_a_trial_call_releases_the_breaker() -> None:
+    async def run() -> None:
+        handoffs = resilience(hedge_max_ratio=0, breaker_failures=1)
+        with pytest.raises(ConnectionError):
+            await handoffs.call("A", Attempts(fail))
+        health = handoffs.health("A")
+        health.breaker.reset_seconds = 0
+
+        trial = asyncio.create_task(handoffs.call("A", Attempts(hang)))
+        await asyncio.sleep(0)
+        assert health.breaker.trial_running
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        # An abandoned turn says nothing about the agent: no failure, and the next call may try
+        assert not health.breaker.trial_running and health.failures == 1
+        assert (await handoffs.call("A", Attempts(answer))).text == "ok"
+
+    asyncio.run(run())
@@ -0,0 +1,38 @@
+import pytest
+
+from agentstack_agents.intent_router import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router() -> IntentRouter:
+    return IntentRouter(threshold=0.5, min_confidence=0.6)
+
+
+@pytest.mark.parametrize(
+    ("query", "specialist"),
+    [
+        ("What is my deductible?", "PolicyAgent"),
+        ("What is a PPO?", "PolicyAgent"),
+        ("How much is an ER visit?", "PolicyAgent"),
+        ("Is acupuncture covered by my insurance?", "PolicyAgent"),
+        ("What are the symptoms of shingles?", "ResearchAgent"),
+        ("How is migraine treated?", "ResearchAgent"),
+        ("What causes high blood pressure?", "ResearchAgent"),
+        ("Find a cardiologist near 10001", "ProviderAgent"),
+        ("List pediatricians in Austin, TX", "ProviderAgent"),
+        ("Is there a dermatologist who speaks Spanish near me?", "ProviderAgent"),
+    ],
+)
+def test_canonical_single_specialist_queries_route_confidently(router: IntentRouter, query: str, specialist: str) -> None:
+    route = router.route(query)
+    assert route.specialists == [specialist], route.describe()
+    assert route.confident, route.describe()
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["Find a good restaurant near me", "List three fun things to do this weekend", "What is the weather like?"],
+)
+def test_generic_phrasing_alone_does_not_pick_a_specialist(router: IntentRouter, query: str) -> None:
+    route = router.route(query)
+    assert not (route.confident and route.specialists), route.describe()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from a2a.types import Message, Part, Role, TextPart
+from beeai_framework.backend.message import AssistantMessage, UserMessage
+
+from agentstack_agents.session_memory import SessionMemoryManager
+
+
+class Context:
+    """Stand-in for a RunContext with an in-memory history that counts reads."""
+
+    def __init__(self, context_id: str = "c") -> None:
+        self.context_id = context_id
+        self.items: list[Message] = []
+        self.loads = 0
+
+    async def load_history(self):
+        self.loads += 1
+        for item in list(self.items):
+            yield item
+
+    async def store(self, message: Message) -> None:
+        self.items.append(message)
+
+
+def message(text: str, role: Role = Role.user) -> Message:
+    return Message(role=role, parts=[Part(root=TextPart(text=text))], message_id=text)
+
+
+async def turn(manager: SessionMemoryManager, context: Context, question: str, answer: str) -> None:
+    async with manager.session(context) as session:
+        await context.store(message(question))
+        session.mark_stored()
+        await context.store(message(answer, Role.agent))
+        session.mark_stored()
+        await session.memory.add_many([UserMessage(question), AssistantMessage(answer)])
+
+
+def texts(manager: SessionMemoryManager, context: Context) -> list[str]:
+    return [msg.text for msg in manager.sessions[context.context_id].memory.messages]
+
+
+def test_warm_session_does_not_read_the_history_again() -> None:
+    async def run() -> None:
+        manager, context = SessionMemoryManager(), Context()
+        context.items = [message("q0"), message("a0", Role.agent)]
+        for i in range(1, 4):
+            await turn(manager, context, f"q{i}", f"a{i}")
+        assert context.loads == 1 and manager.stats.history_loads == 1
+        assert texts(manager, context) == ["q0", "a0", "q1", "a1", "q2", "a2", "q3", "a3"]
+
+    asyncio.run(run())
+
+
+def test_evicted_session_is_rebuilt_from_the_history() -> None:
+    async def run() -> None:
+        manager, context = SessionMemoryManager(), Context()
+        await turn(manager, context, "q1", "a1")
+        manager.sessions.clear()
+        await turn(manager, context, "q2", "a2")
+        assert context.loads == 2
+        assert texts(manager, context) == ["q1", "a1", "q2", "a2"]
+
+    asyncio.run(run())
+
+
+def test_failed_turn_is_rolled_back_and_reread_once() -> None:
+    async def run() -> None:
+        manager, context = SessionMemoryManager(), Context()
+        await turn(manager, context, "q1", "a1")
+        with pytest.raises(RuntimeError):
+            async with manager.session(context) as session:
+                await context.store(message("q2"))
+                session.mark_stored()
+                await session.memory.add_many([UserMessage("partial")])
+                raise RuntimeError("turn failed")
+        assert texts(manager, context) == ["q1", "a1"]
+        # The stored question of the failed turn comes back from the history, exactly once
+        await turn(manager, context, "q3", "a3")
+        await turn(manager, context, "q4", "a4")
+        assert context.loads == 2
+        assert texts(manager, context) == ["q1", "a1", "q2", "q3", "a3", "q4", "a4"]
+
+    asyncio.run(run())
+
+
+def test_reading_every_turn_when_warm_skipping_is_off() -> None:
+    async def run() -> None:
+        manager, context = SessionMemoryManager(skip_warm_history=False), Context()
+        await turn(manager, context, "q1", "a1")
+        # Written by another replica
+        context.items.append(message("elsewhere"))
+        await turn(manager, context, "q2", "a2")
+        assert context.loads == 2
+        assert texts(manager, context) == ["q1", "a1", "elsewhere", "q2", "a2"]
+
+    asyncio.run(run())
@@ -0,0 +1,271 @@
+# Copied into each specialist, which is built from its own directory; keep the copies identical
+# (checked by research_agent/tests/test_shared_modules.py)
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Protocol
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None: ...
+
+
+class MemoryBackend:
+    """Size-bounded LRU with per-entry expiry, local to the process."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteBackend:
+    """
+    Size-bounded LRU with per-entry expiry in a local SQLite file, so answers
+    survive restarts and are shared by every process on the host.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 10_000) -> None:
+        self.max_entries = max_entries
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM answers WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO answers (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl_seconds, now),
+            )
+            # Drop expired rows first, then the least recently used ones beyond the size bound
+            self._connection.execute("DELETE FROM answers WHERE expires_at < ?", (now,))
+            self._connection.execute(
+                "DELETE FROM answers WHERE key IN ("
+                "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+
+
+def normalize_question(question: str) -> str:
+    """Case-, whitespace- and punctuation-insensitive form of a question."""
+    return " ".join(re.findall(r"[a-z0-9$%]+", question.lower()))
+
+
+class SharedStream:
+    """Chunks of one streamed answer so far, for every caller following it."""
+
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+        self.finished = False
+        self.error: BaseException | None = None
+        self._changed = asyncio.Event()
+
+    def push(self, chunk: str) -> None:
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.finished, self.error = True, error
+        self._notify()
+
+    def _notify(self) -> None:
+        # Wake everyone waiting now; later waiters wait on a fresh event
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def follow(self) -> AsyncIterator[str]:
+        """Every chunk from the first, then each new one as it arrives, until the stream ends."""
+        sent = 0
+        while True:
+            if sent < len(self.chunks):
+                sent += 1
+                yield self.chunks[sent - 1]
+            elif self.finished:
+                if self.error is not None:
+                    raise self.error
+                return
+            else:
+                await self._changed.wait()
+
+
+class AnswerCache:
+    """
+    Caches answers by normalized question, model id and data version, and
+    coalesces identical requests that are already in flight so only one
+    upstream LLM call runs for them. Streamed answers are coalesced too:
+    every caller gets the one generation's chunks as they arrive.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float = 3600) -> None:
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stats = CacheStats()
+        self._inflight: dict[str, asyncio.Future[str]] = {}
+        # The in-flight computations that stream, by key
+        self._streams: dict[str, SharedStream] = {}
+
+    @classmethod
+    def from_env(
+        cls, default_sqlite_path: Path, prefix: str = "ANSWER_CACHE", default_ttl_seconds: float = 3600
+    ) -> "AnswerCache | None":
+        """
+        Build the cache from <prefix>_BACKEND (memory, sqlite or off),
+        <prefix>_TTL_SECONDS, <prefix>_MAX_ENTRIES and <prefix>_PATH.
+        """
+        backend_name = os.getenv(f"{prefix}_BACKEND", "memory").lower()
+        ttl_seconds = float(os.getenv(f"{prefix}_TTL_SECONDS", default_ttl_seconds))
+        max_entries = os.getenv(f"{prefix}_MAX_ENTRIES")
+
+        if backend_name == "off":
+            return None
+        if backend_name == "sqlite":
+            path = Path(os.getenv(f"{prefix}_PATH") or default_sqlite_path)
+            return cls(SQLiteBackend(path, int(max_entries or 10_000)), ttl_seconds)
+        if backend_name == "memory":
+            return cls(MemoryBackend(int(max_entries or 1024)), ttl_seconds)
+        raise ValueError(f"Unknown {prefix}_BACKEND {backend_name!r}")
+
+    @staticmethod
+    def make_key(question: str, model_id: str, version: str, api_base: str = "") -> str:
+        # The same model name served by two endpoints or providers must not share answers
+        key = f"{api_base}\0{model_id}\0{version}\0{normalize_question(question)}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        value = self.backend.get(key)
+        if value is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self.backend.set(key, value, self.ttl_seconds)
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached answer, or run `compute` once for all concurrent callers and cache its result."""
+        if (cached := self.get(key)) is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._compute_and_store(key, compute))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats.misses -= 1
+            self.stats.coalesced += 1
+
+        # Shield so one caller giving up does not cancel the call the others are waiting on
+        return await asyncio.shield(task)
+
+    async def stream_or_compute(self, key: str, produce: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """
+        Streaming counterpart of `get_or_compute`: yield the cached answer, or the chunks of
+        one `produce` run shared by all concurrent callers, caching the answer once it completes.
+        A caller joining late gets the chunks produced so far first.
+        """
+        if (cached := self.get(key)) is not None:
+            yield cached
+            return
+
+        task = self._inflight.get(key)
+        if task is None:
+            stream = self._streams[key] = SharedStream()
+            task = asyncio.ensure_future(self._stream_and_store(key, produce, stream))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.stats.misses -= 1
+            self.stats.coalesced += 1
+            stream = self._streams.get(key)
+            if stream is None:
+                # The same question is being answered without streaming; wait for the whole answer
+                yield await asyncio.shield(task)
+                return
+
+        # The generation runs in its own task, so one caller giving up does not stop it for the others
+        async for chunk in stream.follow():
+            yield chunk
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        value = await compute()
+        self.set(key, value)
+        return value
+
+    async def _stream_and_store(self, key: str, produce: Callable[[], AsyncIterator[str]], stream: SharedStream) -> str:
+        try:
+            async for chunk in produce():
+                stream.push(chunk)
+        except BaseException as e:
+            stream.finish(e)
+            raise
+        value = "".join(stream.chunks)
+        # Only a stream that ran to completion is cached
+        self.set(key, value)
+        stream.finish()
+        return value
+
+    def _forget(self, key: str, task: asyncio.Future[str]) -> None:
+        self._inflight.pop(key, None)
+        self._streams.pop(key, None)
+        # Mark a failure as retrieved even when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def snapshot(self) -> dict:
+        return {**asdict(self.stats), "inflight": len(self._inflight)}
@@ -0,0 +1,280 @@
+import re
+from dataclasses import dataclass
+
+# Rows of the standard SBC "Common Medical Event" chart, in template order:
+# (medical event, service as printed in the SBC, phrases in a question that ask about it).
+# Services the parser cannot read with confidence (drug tiers, split outpatient cells) are
+# simply left out of the table and fall through to the LLM.
+STANDARD_SERVICES: list[tuple[str, str, tuple[str, ...]]] = [
+    ("Health care provider's office or clinic", "Primary care visit to treat an injury or illness",
+     ("primary care", "pcp", "primary doctor", "family doctor", "general practitioner", "sick visit")),
+    ("Health care provider's office or clinic", "Specialist visit", ("specialist",)),
+    ("Health care provider's office or clinic", "Preventive care/screening/immunization",
+     ("preventive", "screening", "immunization", "vaccine", "vaccination", "annual physical", "wellness visit")),
+    ("Tests", "Diagnostic test (x-ray, blood work)",
+     ("diagnostic test", "x ray", "xray", "blood work", "bloodwork", "blood test", "lab work", "lab test")),
+    ("Tests", "Imaging (CT/PET scans, MRIs)", ("imaging", "ct scan", "pet scan", "mri", "cat scan")),
+    ("Outpatient surgery", "Facility fee (e.g., ambulatory surgery center)",
+     ("outpatient surgery", "ambulatory surgery", "surgery center")),
+    ("Outpatient surgery", "Physician/surgeon fees", ("outpatient surgery", "outpatient surgeon")),
+    ("Immediate medical attention", "Emergency room care", ("emergency room", "er visit", "emergency care")),
+    ("Immediate medical attention", "Emergency medical transportation", ("ambulance", "emergency transportation")),
+    ("Immediate medical attention", "Urgent care", ("urgent care",)),
+    ("Hospital stay", "Facility fee (e.g., hospital room)", ("hospital stay", "hospital room", "inpatient hospital")),
+    ("Hospital stay", "Physician/surgeon fees", ("hospital stay", "inpatient surgeon", "inpatient physician")),
+    ("Mental health, behavioral health, or substance abuse", "Outpatient services",
+     ("outpatient mental", "outpatient behavioral", "therapy session", "counseling")),
+    ("Mental health, behavioral health, or substance abuse", "Inpatient services",
+     ("inpatient mental", "inpatient behavioral", "inpatient substance", "rehab facility")),
+    ("Pregnancy", "Office visits", ("prenatal", "pregnancy office", "maternity visit", "obstetric")),
+    ("Pregnancy", "Childbirth/delivery professional services",
+     ("childbirth", "delivery", "giving birth", "labor and delivery")),
+    ("Pregnancy", "Childbirth/delivery facility services", ("childbirth", "delivery", "giving birth", "labor and delivery")),
+    ("Recovery or other special health needs", "Home health care", ("home health",)),
+    ("Recovery or other special health needs", "Rehabilitation services",
+     ("rehabilitation", "physical therapy", "occupational therapy")),
+    ("Recovery or other special health needs", "Habilitation services", ("habilitation",)),
+    ("Recovery or other special health needs", "Skilled nursing care", ("skilled nursing", "nursing facility")),
+    ("Recovery or other special health needs", "Durable medical equipment",
+     ("durable medical equipment", "dme", "wheelchair", "crutches", "medical equipment")),
+    ("Recovery or other special health needs", "Hospice services", ("hospice",)),
+    ("Child dental or eye care", "Children's eye exam", ("child eye exam", "children eye exam", "kid eye exam", "pediatric eye")),
+    ("Child dental or eye care", "Children's glasses", ("child glasses", "children glasses", "kid glasses", "pediatric glasses")),
+    ("Child dental or eye care", "Children's dental check-up",
+     ("child dental", "children dental", "kid dental", "pediatric dental")),
+]
+
+# Headings that open each group of rows, used to stop a row's limitations text
+EVENT_HEADINGS = [
+    "If you visit a health care provider's office or clinic",
+    "If you have a test",
+    "If you need drugs to treat your illness or condition",
+    "If you have outpatient surgery",
+    "If you need immediate medical attention",
+    "If you have a hospital stay",
+    "If you need mental health, behavioral health, or substance abuse services",
+    "If you are pregnant",
+    "If you need help recovering or have other special health needs",
+    "If your child needs dental or eye care",
+    "Excluded Services & Other Covered Services",
+]
+
+COST = (
+    r"(?:\d+\s*%\s*coinsurance|No\s*charge|Not\s*covered|\$[\d,]+\s*copay(?:ment)?(?:\s*/\s*[a-z]+)?"
+    r"|Covered\s*as\s*In\s*-\s*Network)"
+    r"(?:\s*(?:after\s+deductible(?:\s+is\s+met)?|deductible\s+does\s+not\s+apply))?"
+)
+# A chart cell: an optional short label such as "Office Visit" followed by a cost
+CELL = re.compile(rf"\s*((?:[A-Za-z]+\s+){{0,3}}?)({COST})", re.IGNORECASE)
+
+PAGE_NOISE = [
+    re.compile(r"\*\s*For more information about limitations and exceptions.*?\.(?=\s|$)", re.IGNORECASE),
+    re.compile(r"\b\d+\s+of\s+\d+\b"),
+    re.compile(
+        r"Common\s*Medical\s*Event\s*Services\s*You\s*May\s*Need.*?\(\s*You\s*will\s*pay\s*the\s*most\s*\)",
+        re.IGNORECASE,
+    ),
+]
+
+NO_LIMITATIONS = re.compile(r"^-+\s*none\s*-+$", re.IGNORECASE)
+
+# A question has to be about cost before the table is allowed to answer it
+COST_INTENT = frozenset(
+    "copay copays copayment coinsurance cost costs pay paying price deductible charge charged "
+    "much oop fee fees".split()
+)
+
+# The table can only state what a service costs. Yes/no questions ("does the deductible apply to
+# urgent care?") and questions with a condition ("... if I have not met my deductible") need the
+# LLM to reason over the chart, so they never take the fast path.
+YES_NO_OPENERS = frozenset("does do did is are was were can could will would should has have".split())
+CONDITIONS = frozenset("if when whenever unless until apply applies applied before after met".split())
+
+CHART_NOTE = "Costs are what you pay after your deductible has been met, if a deductible applies."
+
+
+def _flexible(phrase: str) -> str:
+    """Regex for a phrase that tolerates the odd spacing and quote characters PDF extraction produces."""
+    parts = []
+    for char in phrase:
+        if char.isspace():
+            continue
+        parts.append("['’]" if char in "'’" else re.escape(char))
+    return r"\s*".join(parts)
+
+
+def _normalize_question(question: str) -> str:
+    return " " + re.sub(r"[^a-z0-9]+", " ", question.lower().replace("'s", "")).strip() + " "
+
+
+def _clean(text: str) -> str:
+    text = re.sub(r"\s+", " ", text).strip()
+    return re.sub(r"\s+-\s*(?=[A-Za-z])|(?<=[A-Za-z])-\s+", "-", text)
+
+
+@dataclass(frozen=True)
+class CostShareEntry:
+    """One row of the cost-sharing chart."""
+
+    event: str
+    service: str
+    in_network: str
+    out_of_network: str
+    limitations: str
+    page: int
+    note: str = CHART_NOTE
+
+    def render(self) -> str:
+        text = f"{self.service} ({self.event}): In-network: {self.in_network}. Out-of-network: {self.out_of_network}."
+        if self.limitations:
+            text += f" {self.limitations}"
+        return text
+
+
+class CostShareTable:
+    """
+    Structured index of the SBC cost-sharing chart plus the overall deductible and
+    out-of-pocket limit, able to answer common cost questions without an LLM.
+    """
+
+    def __init__(self, entries: list[tuple[CostShareEntry, tuple[str, ...]]]) -> None:
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_pages(cls, pages: list[str]) -> "CostShareTable":
+        # Concatenate cleaned pages, remembering where each one starts
+        page_starts: list[int] = []
+        text = ""
+        for page in pages:
+            for noise in PAGE_NOISE:
+                page = noise.sub(" ", re.sub(r"\s+", " ", page))
+            page_starts.append(len(text))
+            text += page + " "
+
+        def page_at(position: int) -> int:
+            return sum(1 for start in page_starts if start <= position)
+
+        entries: list[tuple[CostShareEntry, tuple[str, ...]]] = []
+        entries.extend(cls._important_questions(text, page_at))
+
+        # Locate rows in template order so repeated names (facility fee, surgeon fees) resolve to the right event
+        located: list[tuple[int, int, int]] = []
+        cursor = 0
+        for row, (_, service, _) in enumerate(STANDARD_SERVICES):
+            match = re.compile(_flexible(service), re.IGNORECASE).search(text, cursor)
+            if match:
+                located.append((match.start(), match.end(), row))
+                cursor = match.end()
+
+        boundaries = sorted(
+            [start for start, _, _ in located]
+            + [m.start() for heading in EVENT_HEADINGS for m in re.finditer(_flexible(heading), text, re.IGNORECASE)]
+        )
+        for start, end, row in located:
+            event, service, aliases = STANDARD_SERVICES[row]
+            stop = next((b for b in boundaries if b >= end), len(text))
+            entry = cls._parse_row(text[end:stop], event, service, page_at(start))
+            if entry:
+                entries.append((entry, aliases))
+
+        return cls(entries)
+
+    @staticmethod
+    def _parse_row(cells: str, event: str, service: str, page: int) -> CostShareEntry | None:
+        in_network = CELL.match(cells)
+        if not in_network:
+            return None
+        out_of_network = CELL.match(cells, in_network.end())
+        if not out_of_network:
+            return None
+        # Cells with different labels ("Office Visit" vs "Other Outpatient") mean the row is split
+        # into sub-rows that plain text extraction cannot pair up reliably
+        if in_network.group(1).strip().lower() != out_of_network.group(1).strip().lower():
+            return None
+
+        label = in_network.group(1).strip()
+        limitations = _clean(cells[out_of_network.end() :])
+        if NO_LIMITATIONS.match(limitations):
+            limitations = ""
+        return CostShareEntry(
+            event=event,
+            service=f"{service} ({label})" if label else service,
+            in_network=_clean(in_network.group(2)),
+            out_of_network=_clean(out_of_network.group(2)),
+            limitations=limitations,
+            page=page,
+        )
+
+    @staticmethod
+    def _important_questions(text: str, page_at) -> list[tuple[CostShareEntry, tuple[str, ...]]]:
+        amounts = r"(\$[\d,]+)\s*/\s*individual\s*or\s*(\$[\d,]+)\s*/\s*family\s*for\s*"
+        in_network = amounts + r"In\s*-\s*Network"
+        out_of_network = amounts + r"Out\s*-\s*of\s*-\s*Network"
+        questions = [
+            ("What is the overall deductible", "Overall deductible", ("deductible",)),
+            ("What is the out-of-pocket limit for this plan", "Out-of-pocket limit",
+             ("out of pocket", "oop", "maximum out")),
+        ]
+
+        entries = []
+        for question, service, aliases in questions:
+            match = re.search(
+                _flexible(question) + r".{0,40}?" + in_network + r".{0,20}?" + out_of_network,
+                text,
+                re.IGNORECASE,
+            )
+            if not match:
+                continue
+            entry = CostShareEntry(
+                event="Plan-wide",
+                service=service,
+                in_network=f"{match.group(1)} individual / {match.group(2)} family",
+                out_of_network=f"{match.group(3)} individual / {match.group(4)} family",
+                limitations="",
+                page=page_at(match.start()),
+                note="",
+            )
+            entries.append((entry, aliases))
+        return entries
+
+    def lookup(self, question: str) -> list[CostShareEntry]:
+        """
+        Return the rows a plain "how much is X" question is unambiguously about, or an
+        empty list. Only rows matched by the longest alias found in the question are returned.
+        """
+        normalized = _normalize_question(question)
+        words = normalized.split()
+        if not COST_INTENT.intersection(words) and "out of pocket" not in normalized:
+            return []
+        if not words or words[0] in YES_NO_OPENERS or CONDITIONS.intersection(words):
+            return []
+
+        best = 0
+        matches: list[CostShareEntry] = []
+        for entry, aliases in self.entries:
+            score = max((len(alias) for alias in aliases if f" {alias} " in normalized), default=0)
+            if score > best:
+                best, matches = score, [entry]
+            elif score and score == best:
+                matches.append(entry)
+        # More than a handful of rows means the question is broader than a single lookup
+        return matches if len(matches) <= 3 else []
+
+    def answer(self, question: str) -> str | None:
+        """Render a templated answer for a high-confidence match, or None to defer to the LLM."""
+        entries = self.lookup(question)
+        if not entries:
+            return None
+        lines = [entry.render() for entry in entries]
+        notes = {entry.note for entry in entries if entry.note}
+        pages = sorted({entry.page for entry in entries})
+        lines.extend(sorted(notes))
+        lines.append(
+            f"Source: Summary of Benefits and Coverage, page{'s' if len(pages) > 1 else ''} "
+            + ", ".join(str(page) for page in pages)
+            + "."
+        )
+        return "\n".join(lines)
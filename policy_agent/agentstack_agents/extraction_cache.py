@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from .retrieval import Passage, split_into_passages
+
+# Bump whenever extraction or passage splitting changes so stale cache files are ignored
+EXTRACTION_VERSION = 1
+
+# magic, format version, page count, passage count, metadata length
+HEADER = struct.Struct("<4sIIII")
+MAGIC = b"SBCX"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Extraction:
+    """Text extracted from a policy PDF, ready for indexing."""
+
+    sha256: str
+    pages: list[str]
+    passages: list[Passage]
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(page for page in self.pages if page)
+
+
+def default_cache_dir() -> Path:
+    return Path(os.getenv("POLICY_CACHE_DIR") or Path.home() / ".cache" / "policy_agent")
+
+
+def file_sha256(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def extract_pdf_pages(path: Path) -> list[str]:
+    """
+    Extract the text of each PDF page so the LLM can read it.
+    Pages without extractable text come back as empty strings so page numbers stay aligned.
+    """
+    # Imported lazily so warm starts served from the cache never pay for PyPDF2
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(str(path))
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def _u32_array(buffer: memoryview) -> array:
+    values = array("I")
+    values.frombytes(buffer)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def write_cache_file(path: Path, extraction: Extraction) -> None:
+    """
+    Layout: header | page offsets (u32 x pages+1) | passage table (u32 x 4 per passage)
+    | JSON metadata | UTF-8 text blob holding every page and then every passage back to back.
+    """
+    blob = bytearray()
+    page_offsets = array("I", [0])
+    for page in extraction.pages:
+        blob += page.encode("utf-8")
+        page_offsets.append(len(blob))
+
+    sections: list[str] = []
+    section_ids: dict[str, int] = {}
+    passage_table = array("I")
+    for passage in extraction.passages:
+        start = len(blob)
+        blob += passage.text.encode("utf-8")
+        if passage.section not in section_ids:
+            section_ids[passage.section] = len(sections)
+            sections.append(passage.section)
+        passage_table.extend([start, len(blob), passage.page, section_ids[passage.section]])
+
+    metadata = json.dumps({"sha256": extraction.sha256, "sections": sections}).encode("utf-8")
+
+    if sys.byteorder != "little":
+        page_offsets.byteswap()
+        passage_table.byteswap()
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, EXTRACTION_VERSION, len(extraction.pages), len(extraction.passages), len(metadata)))
+        f.write(page_offsets.tobytes())
+        f.write(passage_table.tobytes())
+        f.write(metadata)
+        f.write(blob)
+    # Atomic rename so concurrent replicas never observe a half-written file
+    os.replace(tmp_path, path)
+
+
+def read_cache_file(path: Path) -> Extraction:
+    """
+    Decode a cache file with one plain read. Every page and passage becomes its own
+    `str` anyway, so mapping the file would not save a copy; the file is small.
+    """
+    data = memoryview(path.read_bytes())
+    magic, version, page_count, passage_count, metadata_length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != EXTRACTION_VERSION:
+        raise ValueError(f"Unsupported cache file {path}")
+
+    offset = HEADER.size
+    page_offsets = _u32_array(data[offset : offset + 4 * (page_count + 1)])
+    offset += 4 * (page_count + 1)
+    passage_table = _u32_array(data[offset : offset + 16 * passage_count])
+    offset += 16 * passage_count
+    metadata = json.loads(bytes(data[offset : offset + metadata_length]))
+    blob = data[offset + metadata_length :]
+
+    pages = [str(blob[page_offsets[i] : page_offsets[i + 1]], "utf-8") for i in range(page_count)]
+    sections = metadata["sections"]
+    passages = []
+    for i in range(passage_count):
+        start, end, page, section_id = passage_table[i * 4 : i * 4 + 4]
+        passages.append(Passage(page=page, section=sections[section_id], text=str(blob[start:end], "utf-8")))
+    return Extraction(sha256=metadata["sha256"], pages=pages, passages=passages)
+
+
+def load_extraction(pdf_path: Path, cache_dir: Path | None = None) -> Extraction:
+    """
+    Return the extracted pages and passages for a PDF, reusing the on-disk cache
+    entry for the file's content hash when one exists.
+    """
+    sha256 = file_sha256(pdf_path)
+    cache_path = (cache_dir or default_cache_dir()) / f"{sha256}.v{EXTRACTION_VERSION}.sbcx"
+
+    if cache_path.exists():
+        try:
+            return read_cache_file(cache_path)
+        except (OSError, ValueError, KeyError, struct.error) as e:
+            logger.warning("Ignoring unreadable policy cache %s: %s", cache_path, e)
+
+    pages = extract_pdf_pages(pdf_path)
+    extraction = Extraction(sha256=sha256, pages=pages, passages=split_into_passages(pages))
+    try:
+        write_cache_file(cache_path, extraction)
+    except OSError as e:
+        # A read-only filesystem only costs us the cache, not the answer
+        logger.warning("Could not write policy cache %s: %s", cache_path, e)
+    return extraction
+
+
+if __name__ == "__main__":
+    # Pre-build cache entries, e.g. at image build time: python -m agentstack_agents.extraction_cache [pdf ...]
+    targets = [Path(arg) for arg in sys.argv[1:]] or sorted(Path(__file__).resolve().parent.glob("*.pdf"))
+    for target in targets:
+        extraction = load_extraction(target)
+        print(f"{target.name}: {len(extraction.pages)} pages, {len(extraction.passages)} passages ({extraction.sha256[:12]})")
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from pathlib import Path
+
+from .cost_sharing import CostShareTable
+from .extraction_cache import load_extraction
+from .retrieval import BM25Index, Passage, select_passages
+
+logger = logging.getLogger(__name__)
+
+
+class PolicyDocument:
+    """
+    One plan's extracted text and retrieval index.
+    """
+
+    def __init__(self, plan_id: str, pdf_path: Path) -> None:
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF not found at {pdf_path.resolve()}")
+
+        self.plan_id = plan_id
+        self.pdf_path = pdf_path
+
+        # Load extracted pages and page/section-aware passages, from the on-disk cache when possible
+        extraction = load_extraction(pdf_path)
+        self.sha256 = extraction.sha256
+        self.pages = extraction.pages
+        self.text = extraction.text
+        self.passages: list[Passage] = extraction.passages
+        self.index = BM25Index([passage.text for passage in self.passages])
+
+        # Structured cost-sharing chart for answering common cost questions without the LLM
+        self.cost_sharing = CostShareTable.from_pages(self.pages)
+
+    @cached_property
+    def pdf_bytes(self) -> bytes:
+        # Raw PDF bytes are only read if something actually asks for them
+        return self.pdf_path.read_bytes()
+
+    @cached_property
+    def size_bytes(self) -> int:
+        """Approximate resident size of the text and index, used for LRU accounting."""
+        postings = sum(len(posting) for posting in self.index.postings.values())
+        text = len(self.text) + sum(len(passage.text) for passage in self.passages)
+        return 2 * text + 64 * postings
+
+    def select_context(self, prompt: str, *, top_k: int, token_budget: int, min_coverage: float) -> str:
+        """
+        Return the policy text to send with a question: the best matching passages within
+        the token budget, or the whole document when retrieval is not confident.
+        """
+        passages = select_passages(
+            prompt,
+            self.passages,
+            self.index,
+            top_k=top_k,
+            token_budget=token_budget,
+            min_coverage=min_coverage,
+        )
+        if passages is None:
+            return self.text
+        return "\n\n".join(passage.render() for passage in passages)
+
+
+@dataclass
+class PlanStats:
+    hits: int = 0
+    misses: int = 0
+    loads: int = 0
+    evictions: int = 0
+    last_load_seconds: float = 0.0
+    total_load_seconds: float = 0.0
+
+
+class PlanRegistry:
+    """
+    Maps plan ids to policy PDFs and keeps recently used plans loaded.
+
+    Plans are loaded and indexed on first use. When the loaded plans exceed
+    `max_bytes`, the least recently used ones are evicted and reloaded
+    (from the extraction cache) the next time they are asked for.
+    """
+
+    def __init__(self, plans: dict[str, Path], default_plan: str | None = None, max_bytes: int = 256 * 2**20) -> None:
+        if not plans:
+            raise ValueError("A plan registry needs at least one plan.")
+        if default_plan is not None and default_plan not in plans:
+            raise ValueError(f"Default plan {default_plan!r} is not in the registry.")
+
+        self.plans = plans
+        self.default_plan = default_plan or next(iter(plans))
+        self.max_bytes = max_bytes
+        self._loaded: OrderedDict[str, PolicyDocument] = OrderedDict()
+        self._stats: dict[str, PlanStats] = {plan_id: PlanStats() for plan_id in plans}
+        self._lock = threading.Lock()
+        self._load_locks: dict[str, threading.Lock] = {plan_id: threading.Lock() for plan_id in plans}
+
+    @classmethod
+    def from_directory(cls, directory: Path, **kwargs) -> "PlanRegistry":
+        """Register every PDF in a directory under its file name without the extension."""
+        return cls({path.stem: path for path in sorted(directory.glob("*.pdf"))}, **kwargs)
+
+    @classmethod
+    def from_manifest(cls, manifest_path: Path, **kwargs) -> "PlanRegistry":
+        """
+        Register plans from a JSON manifest such as
+        {"default": "acme-ppo", "plans": {"acme-ppo": "acme/ppo-2026.pdf"}}.
+        Relative paths are resolved against the manifest's directory.
+        """
+        manifest = json.loads(manifest_path.read_text())
+        plans = {plan_id: manifest_path.parent / path for plan_id, path in manifest["plans"].items()}
+        kwargs.setdefault("default_plan", manifest.get("default"))
+        return cls(plans, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "PlanRegistry":
+        """Build the registry from POLICY_PLAN_MANIFEST or POLICY_PLAN_DIR, defaulting to the bundled PDFs."""
+        kwargs = {
+            "default_plan": os.getenv("POLICY_DEFAULT_PLAN"),
+            "max_bytes": int(float(os.getenv("POLICY_PLAN_CACHE_MB", 256)) * 2**20),
+        }
+        if manifest := os.getenv("POLICY_PLAN_MANIFEST"):
+            return cls.from_manifest(Path(manifest), **kwargs)
+        directory = Path(os.getenv("POLICY_PLAN_DIR") or Path(__file__).resolve().parent)
+        return cls.from_directory(directory, **kwargs)
+
+    def get(self, plan_id: str | None = None) -> PolicyDocument:
+        """
+        Return the loaded document for a plan, loading it on a miss.
+        Raises KeyError for plans that are not registered.
+        """
+        plan_id = plan_id or self.default_plan
+        if plan_id not in self.plans:
+            raise KeyError(plan_id)
+
+        with self._lock:
+            document = self._loaded.get(plan_id)
+            if document is not None:
+                self._loaded.move_to_end(plan_id)
+                self._stats[plan_id].hits += 1
+                return document
+            self._stats[plan_id].misses += 1
+
+        # Load outside the registry lock so other plans keep serving; the per-plan lock
+        # makes concurrent misses for the same plan share a single load
+        with self._load_locks[plan_id]:
+            with self._lock:
+                document = self._loaded.get(plan_id)
+            if document is not None:
+                return document
+
+            started = time.perf_counter()
+            document = PolicyDocument(plan_id, self.plans[plan_id])
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                stats = self._stats[plan_id]
+                stats.loads += 1
+                stats.last_load_seconds = elapsed
+                stats.total_load_seconds += elapsed
+                self._loaded[plan_id] = document
+                self._evict(keep=plan_id)
+            logger.info("Loaded plan %s in %.1f ms", plan_id, elapsed * 1000)
+            return document
+
+    def _evict(self, keep: str) -> None:
+        # Caller holds self._lock
+        while self.loaded_bytes > self.max_bytes and len(self._loaded) > 1:
+            plan_id = next(iter(self._loaded))
+            if plan_id == keep:
+                self._loaded.move_to_end(plan_id)
+                continue
+            del self._loaded[plan_id]
+            self._stats[plan_id].evictions += 1
+            logger.info("Evicted plan %s", plan_id)
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(document.size_bytes for document in self._loaded.values())
+
+    def stats(self) -> dict:
+        """Per-plan load times and hit/miss counters plus overall memory use."""
+        with self._lock:
+            return {
+                "loaded": list(self._loaded),
+                "loaded_bytes": self.loaded_bytes,
+                "max_bytes": self.max_bytes,
+                "plans": {plan_id: asdict(stats) for plan_id, stats in self._stats.items()},
+            }
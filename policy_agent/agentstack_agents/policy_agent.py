@@ -1,6 +1,10 @@
 import asyncio
+import hashlib
+import logging
 import os
-from pathlib import Path
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from typing import Annotated, Optional
 
 from a2a.types import Message
@@ -11,93 +15,241 @@ from agentstack_sdk.server import Server
 from agentstack_sdk.server.context import RunContext
 from beeai_framework.adapters.openai import OpenAIChatModel
 from beeai_framework.backend import ChatModelParameters
-from beeai_framework.backend.message import SystemMessage, UserMessage
-from PyPDF2 import PdfReader
+from beeai_framework.backend.message import AnyMessage, SystemMessage, UserMessage
+from opentelemetry import trace
+
+from .answer_cache import AnswerCache
+from .extraction_cache import default_cache_dir
+from .plan_registry import PlanRegistry, PolicyDocument
+from .tracing import configure_tracing, trace_run, traced_agent, tracer
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResponseTiming:
+    """Time to first token and total time of one answer."""
+
+    started: float = field(default_factory=time.perf_counter)
+    first_token: Optional[float] = None
+    finished: Optional[float] = None
+
+    def mark_token(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    @property
+    def ttft_ms(self) -> Optional[float]:
+        return (self.first_token - self.started) * 1000 if self.first_token is not None else None
+
+    @property
+    def total_ms(self) -> Optional[float]:
+        return (self.finished - self.started) * 1000 if self.finished is not None else None
 
 
 class PolicyAgent:
     """
-    A policy agent that reads a benefits PDF and answers coverage questions.
+    A policy agent that reads benefits PDFs and answers coverage questions.
     """
 
     def __init__(
         self,
-        pdf_path: Optional[str] = None,
+        registry: Optional[PlanRegistry] = None,
         system_prompt: str = (
             "You are an expert insurance agent designed to assist with coverage queries. "
             "Use the provided documents to answer questions about insurance policies. "
             "If the information is not available in the documents, respond with \"I don't know\"."
         ),
+        context_token_budget: int = int(os.getenv("POLICY_CONTEXT_TOKEN_BUDGET", 1500)),
+        retrieval_top_k: int = int(os.getenv("POLICY_RETRIEVAL_TOP_K", 8)),
+        retrieval_min_coverage: float = float(os.getenv("POLICY_RETRIEVAL_MIN_COVERAGE", 0.5)),
+        fast_path: bool = os.getenv("POLICY_FAST_PATH", "true").lower() == "true",
+        streaming: bool = os.getenv("POLICY_STREAMING", "false").lower() == "true",
+        answer_cache: Optional[AnswerCache] = None,
     ) -> None:
-        # Configure prompts and load the policy document for reference
+        # Configure prompts and the registry of plan documents; plans are loaded on first use
         self.system_prompt = system_prompt
+        self.context_token_budget = context_token_budget
+        self.retrieval_top_k = retrieval_top_k
+        self.retrieval_min_coverage = retrieval_min_coverage
+        self.fast_path = fast_path
+        self.streaming = streaming
+        self.registry = registry or PlanRegistry.from_env()
 
-        self.pdf_path = Path(pdf_path) if pdf_path else Path(__file__).resolve().parent / "2026AnthemgHIPSBC.pdf"
-        self.pdf_bytes = self._load_pdf(self.pdf_path)
-        self.pdf_text = self._extract_pdf_text(self.pdf_path)
+        # Repeated questions against the same plan and model are answered from the cache
+        self.answer_cache = answer_cache or AnswerCache.from_env(default_cache_dir() / "answers.sqlite")
+        settings = f"{system_prompt}\0{context_token_budget}\0{retrieval_top_k}\0{retrieval_min_coverage}"
+        self._settings_hash = hashlib.sha256(settings.encode()).hexdigest()[:16]
 
-    @staticmethod
-    def _load_pdf(path: Path) -> bytes:
-        # Read the PDF file as raw bytes for tools that might need it
-        if not path.exists():
-            raise FileNotFoundError(f"PDF not found at {path.resolve()}")
-        return path.read_bytes()
+    async def get_document(self, plan_id: Optional[str] = None) -> PolicyDocument:
+        # Loading a plan on a miss parses the PDF, so keep it off the event loop
+        with tracer.start_as_current_span("load_plan", attributes={"policy.plan_id": plan_id or self.registry.default_plan}) as span:
+            document = await asyncio.to_thread(self.registry.get, plan_id)
+            span.set_attribute("payload.document_chars", len(document.text))
+            return document
 
-    @staticmethod
-    def _extract_pdf_text(path: Path) -> str:
+    def select_context(self, prompt: str, document: PolicyDocument) -> str:
         """
-        Extract text content from the PDF so the LLM can read it.
-        Falls back to an empty string if extraction fails.
+        Return the policy text to send with a question: the best matching passages within
+        the token budget, or the whole document when retrieval is not confident.
         """
-        reader = PdfReader(str(path))
-        pages = []
-        for page in reader.pages:
-            text = page.extract_text()
-            if text:
-                pages.append(text)
-        return "\n\n".join(pages)
-
-    def build_prompt(self, prompt: str) -> str:
-        # Build a single prompt with policy text plus the user’s question
+        with tracer.start_as_current_span("select_context") as span:
+            context = document.select_context(
+                prompt,
+                top_k=self.retrieval_top_k,
+                token_budget=self.context_token_budget,
+                min_coverage=self.retrieval_min_coverage,
+            )
+            # How much of the PDF goes into the prompt; the whole document when retrieval was not confident
+            span.set_attributes({
+                "payload.document_chars": len(document.text),
+                "payload.context_chars": len(context),
+                "policy.whole_document": context is document.text,
+            })
+            return context
+
+    def build_prompt(self, prompt: str, document: PolicyDocument) -> str:
+        # Build a single prompt with the relevant policy text plus the user’s question
         return (
             f"{self.system_prompt}\n\n"
             "Reference policy document text below. Use it to answer the question. "
             "If the details are not present, reply with \"I don't know\".\n"
-            f"Policy text:\n{self.pdf_text}\n\n"
+            f"Policy text:\n{self.select_context(prompt, document)}\n\n"
             f"User question: {prompt}"
         )
 
-    async def answer_query(self, prompt: str, llm_config) -> str:
-        """
-        Send the user prompt plus embedded PDF to the LLM provided by the platform extension.
-        """
-        if not llm_config or not llm_config.api_key:
-            return "LLM service not available. Please enable the LLM extension for this agent."
-
+    @staticmethod
+    def _create_llm_client(llm_config, stream: bool) -> OpenAIChatModel:
         # Create the model client from the platform-provided config
-        llm_client = OpenAIChatModel(
+        return OpenAIChatModel(
             model_id=llm_config.api_model,
             base_url=llm_config.api_base,
             api_key=llm_config.api_key,
-            parameters=ChatModelParameters(temperature=0, stream=False),
+            parameters=ChatModelParameters(temperature=0, stream=stream),
             tool_choice_support={"auto", "required"},
         )
 
-        # Ask the LLM with system prompt, policy text, and user question
-        response = await llm_client.run(
-            [
-                SystemMessage(self.system_prompt),
-                SystemMessage(
-                    "Policy document text to consult when answering:\n"
-                    f"{self.pdf_text}"
-                ),
-                UserMessage(prompt),
-            ],
-        )
+    def _build_messages(self, prompt: str, document: PolicyDocument) -> list[AnyMessage]:
+        # System prompt, retrieved policy text, and user question
+        return [
+            SystemMessage(self.system_prompt),
+            SystemMessage(
+                "Policy document text to consult when answering:\n"
+                f"{self.select_context(prompt, document)}"
+            ),
+            UserMessage(prompt),
+        ]
+
+    def cache_key(self, prompt: str, llm_config, document: PolicyDocument) -> str:
+        # The plan's content hash and the prompt/retrieval settings together version the answer
+        version = f"{document.sha256}:{self._settings_hash}"
+        return AnswerCache.make_key(prompt, llm_config.api_model, version, llm_config.api_base)
 
+    async def _complete(self, prompt: str, llm_config, document: PolicyDocument) -> str:
+        llm_client = self._create_llm_client(llm_config, stream=False)
+        response = await trace_run(llm_client.run(self._build_messages(prompt, document)))
         text = response.get_text_content() if hasattr(response, "get_text_content") else None
         return text or "I don't know"
 
+    async def _generate(
+        self, prompt: str, llm_config, plan_id: Optional[str], stream: bool, timing: ResponseTiming
+    ) -> AsyncIterator[str]:
+        try:
+            document = await self.get_document(plan_id)
+        except KeyError:
+            yield f"Unknown plan \"{plan_id}\"."
+            return
+
+        # Common cost questions are answered straight from the plan's cost-sharing table
+        if self.fast_path and (answer := document.cost_sharing.answer(prompt)):
+            trace.get_current_span().set_attribute("policy.fast_path", True)
+            timing.mark_token()
+            yield answer
+            return
+
+        if not llm_config or not llm_config.api_key:
+            yield "LLM service not available. Please enable the LLM extension for this agent."
+            return
+
+        key = self.cache_key(prompt, llm_config, document) if self.answer_cache else None
+
+        if stream:
+            computed = False
+
+            async def produce() -> AsyncIterator[str]:
+                nonlocal computed
+                computed = True
+                # Forward each token delta as soon as the model emits it
+                llm_client = self._create_llm_client(llm_config, stream=True)
+                streamed = False
+                async for event, meta in trace_run(llm_client.run(self._build_messages(prompt, document))):
+                    if meta.name == "new_token" and (delta := event.value.get_text_content()):
+                        streamed = True
+                        yield delta
+                if not streamed:
+                    yield "I don't know"
+
+            # Identical questions already in flight share one generation, and each caller gets its deltas
+            deltas = self.answer_cache.stream_or_compute(key, produce) if key else produce()
+            async for delta in deltas:
+                timing.mark_token()
+                yield delta
+            if key:
+                trace.get_current_span().set_attribute("policy.answer_cache_hit", not computed)
+            return
+
+        if key:
+            computed = False
+
+            async def complete() -> str:
+                nonlocal computed
+                computed = True
+                return await self._complete(prompt, llm_config, document)
+
+            # Identical questions already in flight share one LLM call
+            text = await self.answer_cache.get_or_compute(key, complete)
+            trace.get_current_span().set_attribute("policy.answer_cache_hit", not computed)
+        else:
+            text = await self._complete(prompt, llm_config, document)
+        timing.mark_token()
+        yield text
+
+    async def answer_query(
+        self,
+        prompt: str,
+        llm_config,
+        plan_id: Optional[str] = None,
+        timing: Optional[ResponseTiming] = None,
+    ) -> str:
+        """
+        Send the user prompt plus the relevant passages of the selected plan to the LLM provided by the platform extension.
+        """
+        timing = timing or ResponseTiming()
+        try:
+            return "".join([chunk async for chunk in self._generate(prompt, llm_config, plan_id, False, timing)])
+        finally:
+            timing.finish()
+
+    async def stream_answer(
+        self,
+        prompt: str,
+        llm_config,
+        plan_id: Optional[str] = None,
+        timing: Optional[ResponseTiming] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Like answer_query, but yields the answer as text deltas while the LLM generates it.
+        """
+        timing = timing or ResponseTiming()
+        try:
+            async for chunk in self._generate(prompt, llm_config, plan_id, True, timing):
+                yield chunk
+        finally:
+            timing.finish()
+
 # Create the server and policy agent instance from the class
 server = Server()
 policy_agent = PolicyAgent()
@@ -106,6 +258,7 @@ policy_agent = PolicyAgent()
 @server.agent(
     name="PolicyAgent",
 )
+@traced_agent("PolicyAgent")
 async def policy_agent_wraper(
     input: Message,
     context: RunContext,
@@ -131,14 +284,33 @@ async def policy_agent_wraper(
         yield AgentMessage(text="No LLM configuration available from the extension.")
         return
 
-    # Delegate to the policy agent and stream the answer
-    response = await policy_agent.answer_query(prompt, llm_config)
-    yield AgentMessage(text=response)
+    # Callers pick the employer plan and response mode through message metadata
+    metadata = input.metadata or {}
+    plan_id = metadata.get("plan_id")
+    stream = metadata.get("stream", policy_agent.streaming)
+    timing = ResponseTiming()
+
+    # Delegate to the policy agent and either stream deltas or send one complete message
+    if stream:
+        async for delta in policy_agent.stream_answer(prompt, llm_config, plan_id=plan_id, timing=timing):
+            yield delta
+    else:
+        response = await policy_agent.answer_query(prompt, llm_config, plan_id=plan_id, timing=timing)
+        yield AgentMessage(text=response)
+
+    logger.info(
+        "Policy answer (%s): time to first token %.0f ms, total %.0f ms, answer cache %s",
+        "stream" if stream else "single",
+        timing.ttft_ms or 0.0,
+        timing.total_ms or 0.0,
+        policy_agent.answer_cache.snapshot() if policy_agent.answer_cache else "off",
+    )
 
 # Run the server with 
 def run() -> None:
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", 8000))
+    configure_tracing("PolicyAgent")
     server.run(host=host, port=port)
 
 
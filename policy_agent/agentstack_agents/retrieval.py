@@ -0,0 +1,179 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+# Standard SBC section titles; a line starting with one of these opens a new section
+SECTION_HEADING = re.compile(
+    r"^\s*("
+    r"Important Questions"
+    r"|Common\s+Medical Event"
+    r"|If you (?:visit|have|need|are)\b"
+    r"|If your child\b"
+    r"|Excluded Services"
+    r"|Other Covered Services"
+    r"|Services You\s*r? Plan"
+    r"|Your Rights to Continue Coverage"
+    r"|Your Grievance and Appeals Rights"
+    r"|Does this plan"
+    r"|About these Coverage Examples"
+    r"|Language Access Services"
+    r")",
+    re.IGNORECASE,
+)
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it me my of on or our "
+    "that the their them there this to was what when where which who will with you your "
+    "tell about much many should would could am any have has".split()
+)
+
+# Words that on their own say nothing about which part of the document is relevant
+GENERIC_TERMS = frozenset(
+    "plan policy coverage cover covered benefit summary overview detail information".split()
+)
+
+
+@dataclass(frozen=True)
+class Passage:
+    """A retrievable slice of the policy document."""
+
+    page: int
+    section: str
+    text: str
+
+    def render(self) -> str:
+        header = f"[Page {self.page}" + (f" | {self.section}" if self.section else "") + "]"
+        return f"{header}\n{self.text}"
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, split on non-alphanumerics, drop stop words and fold simple plurals."""
+    tokens = []
+    for token in TOKEN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per LLM token for English prose
+    return len(text) // 4 + 1
+
+
+def split_into_passages(pages: list[str], max_words: int = 120) -> list[Passage]:
+    """
+    Split page texts into passages that never cross a page or section boundary
+    and hold at most roughly `max_words` words.
+    """
+    passages: list[Passage] = []
+    section = ""
+
+    for page_number, page_text in enumerate(pages, start=1):
+        lines: list[str] = []
+        words = 0
+
+        def flush() -> None:
+            nonlocal lines, words
+            text = "\n".join(lines).strip()
+            if text:
+                passages.append(Passage(page=page_number, section=section, text=text))
+            lines, words = [], 0
+
+        for line in page_text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            if SECTION_HEADING.match(stripped):
+                flush()
+                section = re.sub(r"\s+", " ", stripped)[:80]
+            line_words = len(stripped.split())
+            if words and words + line_words > max_words:
+                flush()
+            lines.append(stripped)
+            words += line_words
+        flush()
+
+    return passages
+
+
+class BM25Index:
+    """In-memory Okapi BM25 index over a fixed list of documents."""
+
+    def __init__(self, documents: list[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = {}
+        self.doc_lengths: list[int] = []
+
+        for doc_id, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            self.doc_lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self.postings.setdefault(term, []).append((doc_id, frequency))
+
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        total = len(self.doc_lengths)
+        self.idf = {
+            term: math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in self.postings.items()
+        }
+
+    def search(self, query: str, k: int = 10) -> list[tuple[float, int]]:
+        """Return up to `k` (score, doc_id) pairs, best first."""
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, frequency in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        ranked = sorted(((score, doc_id) for doc_id, score in scores.items()), reverse=True)
+        return ranked[:k]
+
+
+def select_passages(
+    query: str,
+    passages: list[Passage],
+    index: BM25Index,
+    *,
+    top_k: int,
+    token_budget: int,
+    min_coverage: float,
+) -> list[Passage] | None:
+    """
+    Pick the best-scoring passages that fit in `token_budget`, in document order.
+
+    Returns None when retrieval is not confident enough (nothing matched, the
+    question is too broad, or too few query terms are covered) so the caller
+    can fall back to the full document.
+    """
+    query_terms = set(tokenize(query))
+    if not query_terms or query_terms <= GENERIC_TERMS:
+        return None
+
+    selected: list[int] = []
+    used = 0
+    for _, doc_id in index.search(query, k=top_k):
+        cost = estimate_tokens(passages[doc_id].text)
+        if used + cost > token_budget:
+            continue
+        selected.append(doc_id)
+        used += cost
+
+    if not selected:
+        return None
+
+    covered = set()
+    for doc_id in selected:
+        covered.update(query_terms.intersection(tokenize(passages[doc_id].text)))
+    if len(covered) / len(query_terms) < min_coverage:
+        return None
+
+    return [passages[doc_id] for doc_id in sorted(selected)]
@@ -0,0 +1,301 @@
+# Copied into each agent, which is built from its own directory; keep the copies identical
+# (checked by research_agent/tests/test_shared_modules.py)
+import base64
+import functools
+import json
+import logging
+import os
+import threading
+from collections.abc import AsyncGenerator, Callable, Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from a2a.types import Message
+from a2a.utils.message import get_message_text
+from beeai_framework.backend import ChatModel
+from beeai_framework.context import Run
+from beeai_framework.context import RunContext as BeeRunContext
+from beeai_framework.emitter import EmitterOptions, EventMeta
+from beeai_framework.tools import Tool
+from google.protobuf.json_format import MessageToDict
+from opentelemetry import trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import Span, SpanKind, Status, StatusCode
+from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# A2A message metadata key that carries the W3C trace context from one agent to the next
+TRACE_CONTEXT_KEY = "trace_context"
+
+# Spans go to the no-op tracer until configure_tracing installs a provider
+tracer = trace.get_tracer("agentstack_agents")
+_propagator = TraceContextTextMapPropagator()
+_enabled = False
+# Spans of BeeAI runs in progress by run id, so code inside a tool can nest its spans under the tool's span
+_run_spans: dict[str, Span] = {}
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """
+    Appends each batch of spans to a file as one line of OTLP/JSON, the format the
+    OpenTelemetry Collector's file exporter writes and its otlpjsonfile receiver reads.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        request = MessageToDict(encode_spans(spans), use_integers_for_enums=True)
+        # OTLP/JSON encodes ids as hex, where the protobuf JSON mapping would use base64
+        for resource in request.get("resourceSpans", []):
+            for scope in resource.get("scopeSpans", []):
+                for span in scope.get("spans", []):
+                    for item in (span, *span.get("links", [])):
+                        for key in ("traceId", "spanId", "parentSpanId"):
+                            if item.get(key):
+                                item[key] = base64.b64decode(item[key]).hex()
+        try:
+            with self._lock, self.path.open("a", encoding="utf-8") as file:
+                file.write(json.dumps(request, separators=(",", ":")) + "\n")
+        except OSError as e:
+            logger.warning("Could not write traces to %s: %s", self.path, e)
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def configure_tracing(
+    service_name: str,
+    exporters: str = os.getenv("TRACING_EXPORTER", "none"),
+    sample_ratio: float = float(os.getenv("TRACING_SAMPLE_RATIO", 1.0)),
+    trace_file: str = os.getenv("TRACING_FILE", "traces.jsonl"),
+) -> TracerProvider | None:
+    """
+    Install a tracer provider that exports to `exporters`, a comma-separated list of
+    "file" (OTLP/JSON lines in `trace_file`) and "otlp" (an OTLP/HTTP collector, configured
+    through the standard OTEL_EXPORTER_OTLP_* variables). With "none" nothing is installed
+    and every span is a no-op.
+
+    A fraction `sample_ratio` of new traces is recorded. Spans that continue a caller's
+    trace follow the caller's decision, so a trace is kept or dropped as a whole.
+    """
+    global _enabled
+    names = {name.strip().lower() for name in exporters.split(",")} - {"", "none"}
+    if not names:
+        return None
+
+    provider = TracerProvider(
+        resource=Resource.create({SERVICE_NAME: service_name}),
+        sampler=ParentBased(TraceIdRatioBased(sample_ratio)),
+    )
+    for name in sorted(names):
+        if name == "file":
+            exporter = OTLPJsonFileExporter(Path(trace_file))
+        elif name == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+            exporter = OTLPSpanExporter()
+        else:
+            raise ValueError(f"Unknown trace exporter {name!r}; use file, otlp or none")
+        # Spans are exported in batches from a background thread, off the request path
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _enabled = True
+    logger.info("Tracing %s to %s, sampling %.0f%% of traces", service_name, ", ".join(sorted(names)), sample_ratio * 100)
+    return provider
+
+
+def payload_size(value: Any) -> int:
+    """Characters in a payload: text as is, anything else as compact JSON."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, BaseModel):
+        return len(value.model_dump_json())
+    try:
+        return len(json.dumps(value, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return len(str(value))
+
+
+def inject_trace_context(metadata: dict[str, Any] | None) -> dict[str, Any] | None:
+    """Add the current trace context to outgoing A2A message metadata."""
+    carrier: dict[str, str] = {}
+    _propagator.inject(carrier)
+    if not carrier:
+        return metadata
+    return {**(metadata or {}), TRACE_CONTEXT_KEY: carrier}
+
+
+def traced_agent(name: str) -> Callable:
+    """
+    Decorator for an Agent Stack agent function: each run becomes an `invoke_agent` span
+    that continues the caller's trace when the incoming message carries one, with the
+    input size, the output size and the time of the first streamed output.
+    """
+
+    def decorator(fn: Callable[..., AsyncGenerator]) -> Callable[..., AsyncGenerator]:
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            message = next((value for value in (*args, *kwargs.values()) if isinstance(value, Message)), None)
+            carrier = (message.metadata or {}).get(TRACE_CONTEXT_KEY) if message is not None else None
+            parent = _propagator.extract(carrier) if isinstance(carrier, dict) else None
+
+            with tracer.start_as_current_span(
+                f"invoke_agent {name}",
+                context=parent,
+                kind=SpanKind.SERVER,
+                attributes={"gen_ai.operation.name": "invoke_agent", "gen_ai.agent.name": name},
+            ) as span:
+                recording = span.is_recording()
+                if recording and message is not None:
+                    span.set_attribute("payload.input_chars", len(get_message_text(message)))
+                    if message.context_id:
+                        span.set_attribute("gen_ai.conversation.id", message.context_id)
+                output_chars = 0
+                generator = fn(*args, **kwargs)
+                value = None
+                try:
+                    while True:
+                        item = await generator.asend(value)
+                        if recording:
+                            # Answer text is yielded as strings or agent messages; metadata-only updates carry none
+                            text = item if isinstance(item, str) else getattr(item, "text", None)
+                            if text:
+                                if not output_chars:
+                                    span.add_event("first_output")
+                                output_chars += len(text)
+                        value = yield item
+                except StopAsyncIteration:
+                    pass
+                finally:
+                    await generator.aclose()
+                    if recording:
+                        span.set_attribute("payload.output_chars", output_chars)
+
+        return wrapper
+
+    return decorator
+
+
+def set_error(span: Span, error: BaseException | str) -> None:
+    """Mark a span as failed, for errors that are handled rather than raised through it."""
+    if isinstance(error, BaseException):
+        span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+def trace_run(run: Run, ignore: tuple[type, ...] = ()) -> Run:
+    """
+    Record a span for every chat model call and tool run inside a BeeAI run: the model,
+    token usage, prompt and answer sizes and time to first token of each LLM call, and
+    the input and output sizes of each tool. Tools of the types in `ignore` are left to
+    spans their callers record.
+
+    Nothing is attached when tracing is off or the current trace is not sampled, so the
+    run pays nothing for it.
+    """
+    if not _enabled or not trace.get_current_span().is_recording():
+        return run
+    spans: dict[str, Span] = {}
+    first_tokens: set[str] = set()
+
+    def handle(data: Any, meta: EventMeta) -> None:
+        creator = meta.creator
+        if meta.trace is None or not isinstance(creator, ChatModel | Tool) or isinstance(creator, ignore):
+            return
+        run_id = meta.trace.run_id
+        if meta.name == "start":
+            # Handlers run in a copy of the emitting task's context, so the current span is the caller's
+            spans[run_id] = _run_spans[run_id] = _start_span(creator, data)
+            return
+        span = spans.get(run_id)
+        if span is None:
+            return
+        if meta.name == "new_token":
+            if run_id not in first_tokens:
+                first_tokens.add(run_id)
+                span.add_event("first_token")
+        elif meta.name == "success":
+            _record_success(span, creator, data)
+        elif meta.name == "error":
+            set_error(span, data.error)
+        elif meta.name == "finish":
+            spans.pop(run_id).end()
+            _run_spans.pop(run_id, None)
+            first_tokens.discard(run_id)
+
+    return run.on(
+        lambda event: event.name in ("start", "new_token", "success", "error", "finish"),
+        handle,
+        EmitterOptions(match_nested=True, is_blocking=True),
+    )
+
+
+def _start_span(creator: ChatModel | Tool, data: Any) -> Span:
+    if isinstance(creator, ChatModel):
+        messages = data.input.messages
+        return tracer.start_span(
+            f"chat {creator.model_id}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "gen_ai.operation.name": "chat",
+                "gen_ai.provider.name": creator.provider_id,
+                "gen_ai.request.model": creator.model_id,
+                "payload.messages": len(messages),
+                "payload.prompt_chars": sum(_message_chars(message) for message in messages),
+                "payload.tools": len(data.input.tools or []),
+            },
+        )
+    return tracer.start_span(
+        f"execute_tool {creator.name}",
+        attributes={
+            "gen_ai.operation.name": "execute_tool",
+            "gen_ai.tool.name": creator.name,
+            "payload.input_chars": payload_size(data.input),
+        },
+    )
+
+
+def _message_chars(message: Any) -> int:
+    # Text, tool call arguments and tool results all count towards the prompt
+    return sum(
+        payload_size(getattr(part, "text", None) or getattr(part, "args", None) or getattr(part, "result", None) or "")
+        for part in message.content
+    )
+
+
+def _record_success(span: Span, creator: ChatModel | Tool, data: Any) -> None:
+    if isinstance(creator, ChatModel):
+        output = data.value
+        if output.usage is not None:
+            span.set_attribute("gen_ai.usage.input_tokens", output.usage.prompt_tokens)
+            span.set_attribute("gen_ai.usage.output_tokens", output.usage.completion_tokens)
+            span.set_attribute("gen_ai.usage.cached_input_tokens", output.usage.cached_prompt_tokens)
+        if output.finish_reason:
+            span.set_attribute("gen_ai.response.finish_reasons", [output.finish_reason])
+        span.set_attribute("payload.output_chars", len(output.get_text_content()))
+        span.set_attribute("payload.tool_calls", len(output.get_tool_calls()))
+    else:
+        span.set_attribute("payload.output_chars", len(data.output.get_text_content()))
+
+
+@contextmanager
+def within_run(context: BeeRunContext) -> Iterator[None]:
+    """Make the span recorded for a BeeAI run current, so spans started inside it nest under it."""
+    span = _run_spans.get(context.run_id)
+    if span is None:
+        yield
+        return
+    with trace.use_span(span):
+        yield
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from agentstack_agents import answer_cache
+from agentstack_agents.answer_cache import AnswerCache, MemoryBackend, SQLiteBackend
+
+
+def collect(cache: AnswerCache, key: str, produce) -> "asyncio.Task[list[str]]":
+    async def run() -> list[str]:
+        return [chunk async for chunk in cache.stream_or_compute(key, produce)]
+
+    return asyncio.ensure_future(run())
+
+
+def test_concurrent_streams_share_one_generation() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        runs = 0
+        step = asyncio.Event()
+
+        async def produce():
+            nonlocal runs
+            runs += 1
+            for chunk in ["The ", "copay ", "is $30."]:
+                await step.wait()
+                step.clear()
+                yield chunk
+
+        first = collect(cache, "k", produce)
+        step.set()
+        await asyncio.sleep(0.01)
+        # Joins after the first chunk: gets it replayed, then the rest live
+        second = collect(cache, "k", produce)
+        for _ in range(2):
+            await asyncio.sleep(0.01)
+            step.set()
+        assert await first == await second == ["The ", "copay ", "is $30."]
+        assert runs == 1
+        assert (cache.stats.misses, cache.stats.coalesced) == (1, 1)
+        # Cached once complete, and served whole
+        assert await collect(cache, "k", produce) == ["The copay is $30."]
+        assert runs == 1 and cache.stats.hits == 1
+
+    asyncio.run(run())
+
+
+def test_failed_stream_reaches_every_caller_and_is_not_cached() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        release = asyncio.Event()
+
+        async def produce():
+            yield "partial"
+            await release.wait()
+            raise ConnectionError("LLM went away")
+
+        callers = [collect(cache, "k", produce) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        release.set()
+        for caller in callers:
+            with pytest.raises(ConnectionError):
+                await caller
+        assert cache.get("k") is None
+
+    asyncio.run(run())
+
+
+def test_cancelled_follower_does_not_stop_the_generation() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        release = asyncio.Event()
+
+        async def produce():
+            yield "a"
+            await release.wait()
+            yield "b"
+
+        leaving, staying = collect(cache, "k", produce), collect(cache, "k", produce)
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        release.set()
+        assert await staying == ["a", "b"]
+        assert cache.get("k") == "ab"
+
+    asyncio.run(run())
+
+
+def test_stream_joins_a_non_streaming_computation() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        release = asyncio.Event()
+
+        async def compute() -> str:
+            await release.wait()
+            return "whole answer"
+
+        async def produce():
+            raise AssertionError("should have joined the running computation")
+            yield
+
+        whole = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        streamed = collect(cache, "k", produce)
+        await asyncio.sleep(0.01)
+        release.set()
+        assert await whole == "whole answer"
+        assert await streamed == ["whole answer"]
+
+    asyncio.run(run())
+
+
+def test_key_ignores_case_spacing_and_punctuation() -> None:
+    key = AnswerCache.make_key("Is an MRI covered?", "gpt-4o", "v1")
+    assert AnswerCache.make_key("  is an mri   COVERED ", "gpt-4o", "v1") == key
+    # Amounts keep their symbols
+    assert AnswerCache.make_key("Is $30 the copay?", "m", "v") != AnswerCache.make_key("Is 30% the copay?", "m", "v")
+
+
+@pytest.mark.parametrize(
+    "other",
+    [
+        ("Is an MRI covered?", "gpt-4o-mini", "v1", ""),
+        ("Is an MRI covered?", "gpt-4o", "v2", ""),
+        ("Is an MRI covered?", "gpt-4o", "v1", "http://localhost:11434/v1"),
+        ("Is a CT scan covered?", "gpt-4o", "v1", ""),
+    ],
+)
+def test_model_version_and_endpoint_get_their_own_key(other: tuple[str, str, str, str]) -> None:
+    assert AnswerCache.make_key(*other) != AnswerCache.make_key("Is an MRI covered?", "gpt-4o", "v1", "")
+
+
+def test_concurrent_requests_share_one_computation() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        calls = 0
+
+        async def compute() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        assert await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(3))) == ["answer"] * 3
+        assert await cache.get_or_compute("k", compute) == "answer"
+        assert calls == 1
+        assert (cache.stats.misses, cache.stats.coalesced, cache.stats.hits) == (1, 2, 1)
+        assert cache.snapshot()["inflight"] == 0
+
+    asyncio.run(run())
+
+
+def test_failures_are_not_cached() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        outcomes = [TimeoutError("LLM timed out"), "answer"]
+
+        async def compute() -> str:
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with pytest.raises(TimeoutError):
+            await cache.get_or_compute("k", compute)
+        assert await cache.get_or_compute("k", compute) == "answer"
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_cancel_the_computation() -> None:
+    async def run() -> None:
+        cache = AnswerCache(MemoryBackend())
+        release = asyncio.Event()
+
+        async def compute() -> str:
+            await release.wait()
+            return "answer"
+
+        leaving = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        staying = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        leaving.cancel()
+        release.set()
+        assert await staying == "answer"
+        assert cache.get("k") == "answer"
+
+    asyncio.run(run())
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request: pytest.FixtureRequest, tmp_path: Path) -> MemoryBackend | SQLiteBackend:
+    if request.param == "memory":
+        return MemoryBackend(max_entries=2)
+    return SQLiteBackend(tmp_path / "answers.sqlite", max_entries=2)
+
+
+def test_backend_entries_expire(backend: MemoryBackend | SQLiteBackend, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = time.time()
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now)
+    backend.set("k", "answer", ttl_seconds=60)
+    assert backend.get("k") == "answer"
+    now += 61
+    assert backend.get("k") is None
+
+
+def test_backend_evicts_the_least_recently_used(
+    backend: MemoryBackend | SQLiteBackend, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # A clock that always moves forward, so SQLite's last_used ordering is deterministic
+    clock = iter(range(1_000_000, 2_000_000))
+    monkeypatch.setattr(answer_cache.time, "time", lambda: next(clock))
+    backend.set("a", "1", ttl_seconds=3600)
+    backend.set("b", "2", ttl_seconds=3600)
+    assert backend.get("a") == "1"
+    backend.set("c", "3", ttl_seconds=3600)
+    assert (backend.get("a"), backend.get("b"), backend.get("c")) == ("1", None, "3")
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from agentstack_agents.cost_sharing import CostShareTable
+from agentstack_agents.extraction_cache import load_extraction
+
+SBC = Path(__file__).resolve().parents[1] / "agentstack_agents" / "2026AnthemgHIPSBC.pdf"
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory: pytest.TempPathFactory) -> CostShareTable:
+    extraction = load_extraction(SBC, cache_dir=tmp_path_factory.mktemp("cache"))
+    return CostShareTable.from_pages(extraction.pages)
+
+
+def test_plan_wide_amounts_are_parsed(table: CostShareTable) -> None:
+    rows = {entry.service: entry for entry, _ in table.entries}
+    assert rows["Overall deductible"].in_network == "$1,700 individual / $3,400 family"
+    assert rows["Out-of-pocket limit"].out_of_network == "$5,200 individual / $10,400 family"
+
+
+def test_repeated_row_names_resolve_to_their_own_event(table: CostShareTable) -> None:
+    events = [entry.event for entry, _ in table.entries if entry.service == "Physician/surgeon fees"]
+    assert events == ["Outpatient surgery", "Hospital stay"]
+
+
+@pytest.mark.parametrize(
+    ("question", "service"),
+    [
+        ("How much is a specialist visit?", "Specialist visit"),
+        ("What's the copay for urgent care?", "Urgent care"),
+        ("How much is an ER visit?", "Emergency room care"),
+        ("What is my deductible?", "Overall deductible"),
+        ("What is the out of pocket maximum?", "Out-of-pocket limit"),
+    ],
+)
+def test_plain_cost_questions_are_answered_from_the_table(table: CostShareTable, question: str, service: str) -> None:
+    assert [entry.service for entry in table.lookup(question)] == [service]
+    answer = table.answer(question)
+    assert answer.startswith(service) and "Source: Summary of Benefits and Coverage, page" in answer
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # Yes/no questions
+        "Does the deductible apply to urgent care?",
+        "Is a specialist visit covered?",
+        "Do I pay coinsurance for an ER visit?",
+        # Conditions the table cannot reason about
+        "What is the copay for urgent care if I have not met my deductible?",
+        "How much do I pay for a specialist before the deductible is met?",
+        # Not about cost, or not about one service
+        "Which specialists are in network?",
+        "What are my costs?",
+    ],
+)
+def test_other_questions_defer_to_the_llm(table: CostShareTable, question: str) -> None:
+    assert table.answer(question) is None
+
+
+def test_split_rows_and_empty_limitations() -> None:
+    pages = [
+        "If you visit a health care provider's office or clinic "
+        "Specialist visit $40 copay/visit $80 copay/visit ---none--- "
+        "Preventive care/screening/immunization Office Visit No charge Other Outpatient 30% coinsurance "
+        "Some limitation text. If you have a test"
+    ]
+    rows = {entry.service: entry for entry, _ in CostShareTable.from_pages(pages).entries}
+    assert rows["Specialist visit"].in_network == "$40 copay/visit"
+    assert rows["Specialist visit"].limitations == ""
+    # Sub-rows with different labels cannot be paired from plain text, so the row is left to the LLM
+    assert "Preventive care/screening/immunization" not in rows
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pytest
+
+from agentstack_agents.extraction_cache import Extraction, read_cache_file, write_cache_file
+from agentstack_agents.retrieval import Passage
+
+
+def test_cache_file_round_trip(tmp_path: Path) -> None:
+    extraction = Extraction(
+        sha256="ab" * 32,
+        pages=["Summary of Benefits – naïve café", "", "Deductible $1,500 💊"],
+        passages=[
+            Passage(page=1, section="", text="Summary of Benefits – naïve café"),
+            Passage(page=3, section="Costs", text="Deductible $1,500"),
+            Passage(page=3, section="Costs", text="💊 Tier 1 drugs"),
+        ],
+    )
+    path = tmp_path / "cache" / "plan.sbcx"
+    write_cache_file(path, extraction)
+    assert read_cache_file(path) == extraction
+    # Written atomically: no temporary file is left next to it
+    assert [p.name for p in path.parent.iterdir()] == ["plan.sbcx"]
+
+
+def test_foreign_file_is_rejected(tmp_path: Path) -> None:
+    path = tmp_path / "plan.sbcx"
+    path.write_bytes(b"NOPE" + bytes(16))
+    with pytest.raises(ValueError):
+        read_cache_file(path)
@@ -0,0 +1,91 @@
+import pytest
+
+from agentstack_agents.retrieval import BM25Index, Passage, select_passages, split_into_passages, tokenize
+
+PAGES = [
+    "Important Questions Answers\nWhat is the overall deductible? $1,700 individual / $3,400 family",
+    "If you visit a health care provider's office or clinic\n"
+    "Primary care visit to treat an injury or illness $20 copay\n"
+    "Specialist visit $40 copay\n"
+    "If you have a test\n"
+    "Diagnostic test (x-ray, blood work) 20% coinsurance",
+    "Excluded Services & Other Covered Services\nCosmetic surgery, dental care (adult), hearing aids, infertility treatment",
+]
+
+
+@pytest.fixture
+def passages() -> list[Passage]:
+    return split_into_passages(PAGES)
+
+
+@pytest.fixture
+def index(passages: list[Passage]) -> BM25Index:
+    return BM25Index([passage.text for passage in passages])
+
+
+def select(query: str, passages: list[Passage], index: BM25Index, **overrides) -> list[Passage] | None:
+    settings = {"top_k": 8, "token_budget": 1000, "min_coverage": 0.5} | overrides
+    return select_passages(query, passages, index, **settings)
+
+
+def test_tokenize_drops_stop_words_and_folds_plurals() -> None:
+    assert tokenize("How much are my copays for X-rays?") == ["copay", "x", "ray"]
+    # Short words and double-s endings are not plurals
+    assert tokenize("bus class") == ["bus", "class"]
+
+
+def test_passages_follow_page_and_section_boundaries(passages: list[Passage]) -> None:
+    assert [(passage.page, passage.section[:20]) for passage in passages] == [
+        (1, "Important Questions "),
+        (2, "If you visit a healt"),
+        (2, "If you have a test"),
+        (3, "Excluded Services & "),
+    ]
+    assert passages[2].render().startswith("[Page 2 | If you have a test]\n")
+
+
+def test_long_sections_are_split_by_word_count() -> None:
+    page = "Excluded Services\n" + "\n".join(f"service number {i} is excluded" for i in range(10))
+    split = split_into_passages([page], max_words=12)
+    assert len(split) > 1
+    assert all(len(passage.text.split()) <= 12 for passage in split)
+    assert {passage.section for passage in split} == {"Excluded Services"}
+
+
+def test_search_ranks_the_matching_passage_first(index: BM25Index) -> None:
+    assert index.search("specialist copay")[0][1] == 1
+    assert index.search("acupuncture") == []
+
+
+def test_selected_passages_come_back_in_document_order(passages: list[Passage], index: BM25Index) -> None:
+    selected = select("Is cosmetic surgery excluded, and what is the deductible?", passages, index)
+    assert selected is not None
+    assert [passage.page for passage in selected] == [1, 3]
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        # Only stop words
+        "What is it?",
+        # Too broad to pick passages for
+        "Tell me about my plan coverage",
+        # Nothing in the document matches
+        "acupuncture chiropractor",
+        # One of three content terms is covered, below the 50% minimum
+        "specialist acupuncture chiropractor",
+    ],
+)
+def test_unconfident_queries_fall_back_to_the_full_document(
+    query: str, passages: list[Passage], index: BM25Index
+) -> None:
+    assert select(query, passages, index) is None
+
+
+def test_passages_over_the_token_budget_are_skipped(passages: list[Passage], index: BM25Index) -> None:
+    query = "specialist visit deductible"
+    assert len(select(query, passages, index)) == 2
+    # The office-visit passage alone is larger than this budget, so only the deductible passage fits
+    selected = select(query, passages, index, token_budget=30, min_coverage=0.3)
+    assert [passage.page for passage in selected] == [1]
+    assert select(query, passages, index, token_budget=5) is None
@@ -0,0 +1,421 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Protocol
+
+# Also imported by mcpserver.py, which runs as a plain script
+try:
+    from .provider_directory import INDEXED_FIELDS, ProviderDirectory, normalize
+    from .proximity import MILES_PER_DEGREE_LATITUDE, haversine_miles, load_zip_centroids, normalize_zip
+except ImportError:
+    from provider_directory import INDEXED_FIELDS, ProviderDirectory, normalize
+    from proximity import MILES_PER_DEGREE_LATITUDE, haversine_miles, load_zip_centroids, normalize_zip
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent / "doctors.json"
+
+# Bump whenever the schema changes so existing databases are rebuilt
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE doctors (
+    id INTEGER PRIMARY KEY,
+    record TEXT NOT NULL,
+    state TEXT,
+    city TEXT,
+    specialty TEXT,
+    board_certified TEXT,
+    years_experience INTEGER,
+    latitude REAL,
+    longitude REAL
+);
+CREATE TABLE doctor_languages (doctor INTEGER NOT NULL, language TEXT NOT NULL);
+CREATE TABLE doctor_hospitals (doctor INTEGER NOT NULL, hospital TEXT NOT NULL);
+CREATE TABLE zip_centroids (zip_code TEXT PRIMARY KEY, latitude REAL, longitude REAL) WITHOUT ROWID;
+"""
+
+# Created after the bulk insert, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX doctors_state_city ON doctors (state, city);
+CREATE INDEX doctors_city ON doctors (city);
+CREATE INDEX doctors_specialty ON doctors (specialty);
+CREATE INDEX doctors_experience ON doctors (years_experience DESC, id);
+CREATE INDEX doctors_location ON doctors (latitude, longitude);
+CREATE INDEX doctor_languages_language ON doctor_languages (language, doctor);
+CREATE INDEX doctor_hospitals_hospital ON doctor_hospitals (hospital, doctor);
+"""
+
+# Filters answered from a column of the doctors table, and those answered from a side table
+COLUMN_FILTERS = {"state", "city", "specialty", "board_certified"}
+SIDE_TABLE_FILTERS = {"language": ("doctor_languages", "language"), "hospital": ("doctor_hospitals", "hospital")}
+
+
+class DirectoryStore(Protocol):
+    """What the MCP tools need from a provider directory backend."""
+
+    def match(self, sort_by_experience: bool = False, **filters: str | bool | None) -> list[int]: ...
+
+    def fetch(self, positions: list[int]) -> list[dict]: ...
+
+    def near(self, zip_code: str, radius_miles: float) -> list[tuple[float, int]]: ...
+
+
+def iter_json_array(path: Path, chunk_size: int = 1 << 20) -> Iterator[dict]:
+    """
+    Yield the elements of a top-level JSON array one at a time, reading the file in
+    chunks, so a multi-gigabyte directory never has to be held in memory at once.
+    """
+    decoder = json.JSONDecoder()
+    with path.open(encoding="utf-8") as f:
+        buffer = ""
+        position = 0
+        started = False
+        while True:
+            chunk = f.read(chunk_size)
+            at_eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+            if not started:
+                stripped = buffer.lstrip()
+                if not stripped and not at_eof:
+                    continue
+                if not stripped.startswith("["):
+                    raise ValueError(f"{path} does not contain a JSON array")
+                position = len(buffer) - len(stripped) + 1
+                started = True
+
+            while True:
+                # Skip the separators between elements
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+                if position >= len(buffer):
+                    break
+                if buffer[position] == "]":
+                    return
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    if at_eof:
+                        raise
+                    # The element continues in the next chunk
+                    break
+                if end == len(buffer) and not at_eof:
+                    # A bare number could still continue in the next chunk
+                    break
+                yield value
+                position = end
+
+            if at_eof:
+                raise ValueError(f"{path} ends before its JSON array is closed")
+
+
+def bulk_load(source: Path, database: Path, batch_size: int = 10_000) -> int:
+    """
+    Import a JSON array of doctors into a fresh SQLite directory and atomically
+    replace `database` with it. Returns the number of doctors imported.
+    """
+    database.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = database.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    centroids = load_zip_centroids()
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO zip_centroids VALUES (?, ?, ?)",
+            ((zip_code, lat, lon) for zip_code, (lat, lon) in centroids.items()),
+        )
+
+        count = 0
+        doctors, languages, hospitals = [], [], []
+        for position, doc in enumerate(iter_json_array(source)):
+            point = centroids.get(normalize_zip(doc["address"].get("zip_code", "")), (None, None))
+            doctors.append(
+                (
+                    position,
+                    json.dumps(doc, separators=(",", ":")),
+                    *(normalize(INDEXED_FIELDS[field](doc)[0]) for field in ("state", "city", "specialty", "board_certified")),
+                    doc.get("years_experience", 0),
+                    *point,
+                )
+            )
+            languages.extend((position, normalize(value)) for value in INDEXED_FIELDS["language"](doc))
+            hospitals.extend((position, normalize(value)) for value in INDEXED_FIELDS["hospital"](doc))
+            count += 1
+            if len(doctors) >= batch_size:
+                _insert_batch(connection, doctors, languages, hospitals)
+                doctors, languages, hospitals = [], [], []
+        _insert_batch(connection, doctors, languages, hospitals)
+
+        connection.executescript(INDEXES)
+        connection.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        connection.commit()
+    finally:
+        connection.close()
+
+    # Atomic rename so running servers never open a half-built database
+    os.replace(tmp_path, database)
+    return count
+
+
+def _insert_batch(connection: sqlite3.Connection, doctors: list, languages: list, hospitals: list) -> None:
+    connection.executemany("INSERT INTO doctors VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", doctors)
+    connection.executemany("INSERT INTO doctor_languages VALUES (?, ?)", languages)
+    connection.executemany("INSERT INTO doctor_hospitals VALUES (?, ?)", hospitals)
+
+
+def read_only_uri(path: Path) -> str:
+    """SQLite URI opening `path` read-only; `as_uri` escapes "?", "#" and "%" in the path."""
+    return Path(path).resolve().as_uri() + "?mode=ro"
+
+
+class SQLiteDirectory:
+    """
+    Provider directory served from an indexed SQLite file. Only the rows a query
+    touches are read, so memory use does not grow with the size of the directory.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        # Read-only; the bulk loader swaps in a new file instead of writing to this one
+        self._uri = read_only_uri(path)
+        # One connection per thread, so queries from different threads never wait on each other
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._connection()
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM doctors")[0][0]
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # The lock only guards opening and closing, never a query
+            with self._lock:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+                connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+                self._connections.append(connection)
+            self._local.connection = connection
+        return connection
+
+    def _query(self, sql: str, parameters: tuple | list = ()) -> list[tuple]:
+        return self._connection().execute(sql, parameters).fetchall()
+
+    def close(self) -> None:
+        # Other threads' connections are closed here too; they are not used after the snapshot is retired
+        with self._lock:
+            self._closed = True
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+
+    def match(self, sort_by_experience: bool = False, **filters: str | bool | None) -> list[int]:
+        clauses, parameters = [], []
+        for field, value in filters.items():
+            if value is None or value == "":
+                continue
+            if field in COLUMN_FILTERS:
+                clauses.append(f"{field} = ?")
+            else:
+                table, column = SIDE_TABLE_FILTERS[field]
+                clauses.append(f"id IN (SELECT doctor FROM {table} WHERE {column} = ?)")
+            parameters.append(normalize(value))
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        order = "years_experience DESC, id" if sort_by_experience else "id"
+        return [row[0] for row in self._query(f"SELECT id FROM doctors {where} ORDER BY {order}", parameters)]
+
+    def fetch(self, positions: list[int]) -> list[dict]:
+        records: dict[int, str] = {}
+        # Batches stay well under SQLite's limit on bound parameters
+        for start in range(0, len(positions), 500):
+            batch = positions[start : start + 500]
+            placeholders = ",".join("?" * len(batch))
+            records.update(self._query(f"SELECT id, record FROM doctors WHERE id IN ({placeholders})", batch))
+        return [json.loads(records[position]) for position in positions]
+
+    def near(self, zip_code: str, radius_miles: float) -> list[tuple[float, int]]:
+        rows = self._query("SELECT latitude, longitude FROM zip_centroids WHERE zip_code = ?", (normalize_zip(zip_code),))
+        if not rows:
+            raise KeyError(zip_code)
+        center = rows[0]
+
+        # Bounding box through the location index, then the exact distance for the candidates inside it
+        lat_span = radius_miles / MILES_PER_DEGREE_LATITUDE
+        lon_span = radius_miles / (MILES_PER_DEGREE_LATITUDE * max(math.cos(math.radians(center[0])), 0.01))
+        candidates = self._query(
+            "SELECT id, latitude, longitude FROM doctors WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?",
+            (center[0] - lat_span, center[0] + lat_span, center[1] - lon_span, center[1] + lon_span),
+        )
+        results = []
+        for position, lat, lon in candidates:
+            distance = haversine_miles(center, (lat, lon))
+            if distance <= radius_miles:
+                results.append((distance, position))
+        results.sort()
+        return results
+
+
+def database_is_current(source: Path, database: Path) -> bool:
+    if not database.exists():
+        return False
+    if source.exists() and source.stat().st_mtime_ns > database.stat().st_mtime_ns:
+        return False
+    with sqlite3.connect(read_only_uri(database), uri=True) as connection:
+        return connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+
+
+def file_signature(paths: list[Path]) -> tuple:
+    """Cheap change detector: modification time, size and inode of each path."""
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+            signature.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class DirectoryWatcher:
+    """
+    Holds the current directory snapshot and swaps in a new one when its files change.
+
+    A background thread polls the files' signatures and builds the replacement
+    snapshot off to the side; the swap is a single reference assignment, so queries
+    already running keep using the snapshot they started with. A replaced snapshot
+    is closed `grace_seconds` later, once those queries are long done.
+    """
+
+    def __init__(
+        self,
+        open_snapshot: Callable[[], DirectoryStore],
+        paths: list[Path],
+        interval: float,
+        grace_seconds: float = 60,
+    ) -> None:
+        self.open_snapshot = open_snapshot
+        self.paths = paths
+        self.interval = interval
+        self.grace_seconds = grace_seconds
+        self.reloads = 0
+        self._snapshot = open_snapshot()
+        # Taken after opening, which may have rewritten the database, so that is not seen as a change
+        self._signature = file_signature(paths)
+        self._retired: list[tuple[float, DirectoryStore]] = []
+        self._stop = threading.Event()
+        self._thread = None
+        if interval > 0:
+            self._thread = threading.Thread(target=self._poll, name="directory-watcher", daemon=True)
+            self._thread.start()
+
+    @property
+    def current(self) -> DirectoryStore:
+        return self._snapshot
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._close_retired(time.monotonic() - self.grace_seconds)
+            signature = file_signature(self.paths)
+            if signature == self._signature:
+                continue
+            started = time.perf_counter()
+            try:
+                snapshot = self.open_snapshot()
+            except Exception as e:
+                # Most likely a file still being written; try again on the next poll
+                logger.warning("Directory reload failed, keeping the current snapshot: %s", e)
+                continue
+            self._retired.append((time.monotonic(), self._snapshot))
+            self._snapshot = snapshot
+            # Opening may have re-imported the source into the database; don't reload for that again
+            self._signature = file_signature(self.paths)
+            self.reloads += 1
+            logger.info("Reloaded provider directory in %.0f ms", (time.perf_counter() - started) * 1000)
+
+    def _close_retired(self, before: float) -> None:
+        while self._retired and self._retired[0][0] <= before:
+            _, snapshot = self._retired.pop(0)
+            # The in-memory backend holds no resources
+            if close := getattr(snapshot, "close", None):
+                close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._close_retired(math.inf)
+
+
+def settings_from_env() -> tuple[str, Path, Path]:
+    """Backend name, JSON source and SQLite path from the PROVIDER_DIRECTORY_* variables."""
+    backend = os.getenv("PROVIDER_DIRECTORY_BACKEND", "sqlite").lower()
+    source = Path(os.getenv("PROVIDER_DIRECTORY_SOURCE") or DEFAULT_SOURCE)
+    database = Path(
+        os.getenv("PROVIDER_DIRECTORY_DB") or Path.home() / ".cache" / "provider_agent" / "directory.sqlite"
+    )
+    return backend, source, database
+
+
+def watched_paths() -> list[Path]:
+    backend, source, database = settings_from_env()
+    return [source, database] if backend == "sqlite" else [source]
+
+
+def open_directory_from_env() -> DirectoryWatcher:
+    """
+    Open the configured directory backend behind a watcher:
+    PROVIDER_DIRECTORY_BACKEND (sqlite or memory), PROVIDER_DIRECTORY_SOURCE,
+    PROVIDER_DIRECTORY_DB and PROVIDER_DIRECTORY_POLL_SECONDS (0 disables reloads).
+    """
+    backend, source, database = settings_from_env()
+    interval = float(os.getenv("PROVIDER_DIRECTORY_POLL_SECONDS", 30))
+
+    if backend == "memory":
+        centroids = load_zip_centroids()
+        return DirectoryWatcher(
+            lambda: ProviderDirectory(list(iter_json_array(source)), centroids), [source], interval
+        )
+    if backend != "sqlite":
+        raise ValueError(f"Unknown PROVIDER_DIRECTORY_BACKEND {backend!r}")
+
+    def open_sqlite() -> SQLiteDirectory:
+        # Import the JSON source when the database is missing, outdated or from an older schema.
+        # The lock keeps the MCP processes of one host from all importing the same file at once.
+        if not database_is_current(source, database):
+            database.parent.mkdir(parents=True, exist_ok=True)
+            with open(database.with_suffix(".lock"), "w") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                if not database_is_current(source, database):
+                    logger.info("Importing %s into %s", source, database)
+                    bulk_load(source, database)
+        return SQLiteDirectory(database)
+
+    return DirectoryWatcher(open_sqlite, [source, database], interval)
+
+
+if __name__ == "__main__":
+    # Bulk-load a directory, e.g. after the nightly network file lands:
+    # python -m agentstack_agents.directory_store [source.json [directory.sqlite]]
+    _, default_source, default_database = settings_from_env()
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else default_source
+    database = Path(sys.argv[2]) if len(sys.argv) > 2 else default_database
+    started = time.perf_counter()
+    count = bulk_load(source, database)
+    print(f"Imported {count} doctors from {source} into {database} in {time.perf_counter() - started:.1f} s")
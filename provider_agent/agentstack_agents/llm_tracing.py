@@ -0,0 +1,86 @@
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
+from opentelemetry import trace
+from opentelemetry.trace import Span, SpanKind
+
+from .tracing import payload_size, set_error, tracer
+
+
+class LLMTracingHandler(AsyncCallbackHandler):
+    """
+    LangChain callbacks that record a span for every chat model call of the agent, with
+    the model, token usage, prompt and answer sizes and time to first token, the same
+    attributes the BeeAI agents record.
+    """
+
+    def __init__(self) -> None:
+        self.spans: dict[UUID, Span] = {}
+        self.first_tokens: set[UUID] = set()
+
+    async def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        # Nothing to record when tracing is off or this trace is not sampled
+        if not trace.get_current_span().is_recording():
+            return
+        metadata = metadata or {}
+        model = metadata.get("ls_model_name") or (serialized or {}).get("name", "unknown")
+        prompt = [message for batch in messages for message in batch]
+        self.spans[run_id] = tracer.start_span(
+            f"chat {model}",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "gen_ai.operation.name": "chat",
+                "gen_ai.provider.name": metadata.get("ls_provider", "openai"),
+                "gen_ai.request.model": model,
+                "payload.messages": len(prompt),
+                # Tool results come back as message content, tool calls as additional arguments
+                "payload.prompt_chars": sum(
+                    payload_size(message.content) + payload_size(getattr(message, "tool_calls", None) or "")
+                    for message in prompt
+                ),
+            },
+        )
+
+    async def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self.spans.get(run_id)
+        if span is not None and run_id not in self.first_tokens:
+            self.first_tokens.add(run_id)
+            span.add_event("first_token")
+
+    async def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self.spans.pop(run_id, None)
+        self.first_tokens.discard(run_id)
+        if span is None:
+            return
+        generations = [generation for batch in response.generations for generation in batch]
+        message = getattr(generations[0], "message", None) if generations else None
+        usage = getattr(message, "usage_metadata", None)
+        if usage:
+            span.set_attribute("gen_ai.usage.input_tokens", usage.get("input_tokens", 0))
+            span.set_attribute("gen_ai.usage.output_tokens", usage.get("output_tokens", 0))
+            span.set_attribute("gen_ai.usage.cached_input_tokens", usage.get("input_token_details", {}).get("cache_read", 0))
+        span.set_attribute("payload.output_chars", sum(len(generation.text) for generation in generations))
+        span.set_attribute("payload.tool_calls", len(getattr(message, "tool_calls", None) or []))
+        span.end()
+
+    async def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        span = self.spans.pop(run_id, None)
+        self.first_tokens.discard(run_id)
+        if span is not None:
+            set_error(span, error)
+            span.end()
+
+
+# Shared by every request; spans are kept per LangChain run id
+llm_tracing = LLMTracingHandler()
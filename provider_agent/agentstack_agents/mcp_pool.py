@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+from datetime import timedelta
+from typing import Any
+
+import anyio
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import Connection, create_session
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult, Tool
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from .tracing import payload_size, tracer
+
+logger = logging.getLogger(__name__)
+
+
+class PooledSession:
+    """
+    One long-lived MCP session. The session is opened and closed by its own background
+    task because the stdio transport must be entered and exited in the same task.
+    """
+
+    def __init__(self, name: str, connection: Connection) -> None:
+        self.name = name
+        self.connection = connection
+        self.session: ClientSession | None = None
+        self.healthy = False
+        self._task: asyncio.Task | None = None
+        self._closing = asyncio.Event()
+
+    async def start(self, timeout: float) -> None:
+        if self._task is not None and not self._task.done():
+            # Starting again would orphan the running server process; close it first
+            raise RuntimeError(f"MCP session {self.name} is already running")
+        ready: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        # Spawning the server process and initializing the session
+        with tracer.start_as_current_span("mcp.session.start", attributes={"mcp.session": self.name}):
+            self._task = asyncio.create_task(self._run(ready), name=f"mcp-session-{self.name}")
+            try:
+                await asyncio.wait_for(asyncio.shield(ready), timeout)
+            except BaseException:
+                await self.close()
+                raise
+        self.healthy = True
+
+    async def _run(self, ready: asyncio.Future[None]) -> None:
+        try:
+            async with create_session(self.connection) as session:
+                await session.initialize()
+                self.session = session
+                ready.set_result(None)
+                await self._closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            elif not isinstance(e, asyncio.CancelledError):
+                logger.warning("MCP session %s ended: %s", self.name, e)
+            raise
+        finally:
+            self.session = None
+            self.healthy = False
+
+    async def ping(self, timeout: float) -> bool:
+        if self.session is None:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        self.healthy = False
+        self._closing.set()
+        if self._task is not None:
+            # Give the server process a moment to exit cleanly before cancelling
+            try:
+                await asyncio.wait_for(self._task, 5)
+            except (Exception, asyncio.TimeoutError):
+                # Failed or overran the grace period; _run already logged why
+                pass
+            except asyncio.CancelledError:
+                # The session task was cancelled elsewhere; only the caller's own cancellation propagates
+                if asyncio.current_task().cancelling():
+                    raise
+            finally:
+                self._task = None
+
+
+class MCPSessionPool:
+    """
+    A fixed number of persistent MCP sessions shared by every request.
+
+    Tool calls are spread round-robin over the healthy sessions (an MCP session
+    multiplexes concurrent requests). Sessions that fail a periodic ping or drop
+    their connection mid-call are restarted, and a call that lost its connection
+    is retried once.
+    """
+
+    def __init__(
+        self,
+        connection: Connection,
+        size: int = int(os.getenv("PROVIDER_MCP_POOL_SIZE", 2)),
+        call_timeout: float = float(os.getenv("PROVIDER_MCP_CALL_TIMEOUT", 30)),
+        health_interval: float = float(os.getenv("PROVIDER_MCP_HEALTH_INTERVAL", 30)),
+        start_timeout: float = 30,
+    ) -> None:
+        self.connection = connection
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self.start_timeout = start_timeout
+        self.sessions = [PooledSession(f"{i}", connection) for i in range(max(1, size))]
+        self.restarts = 0
+        self._tools: list[Tool] | None = None
+        self._next = 0
+        self._start_lock = asyncio.Lock()
+        self._restart_locks = [asyncio.Lock() for _ in self.sessions]
+        self._health_task: asyncio.Task | None = None
+
+    async def start(self) -> "MCPSessionPool":
+        """Spawn every session and read the tool schemas once. Safe to call repeatedly."""
+        async with self._start_lock:
+            if self._tools is not None:
+                return self
+            try:
+                results = await asyncio.gather(
+                    *(session.start(self.start_timeout) for session in self.sessions), return_exceptions=True
+                )
+                errors = [result for result in results if isinstance(result, BaseException)]
+                if errors:
+                    raise errors[0]
+                tools = (await asyncio.wait_for(self.sessions[0].session.list_tools(), self.start_timeout)).tools
+            except BaseException:
+                # Close every session that did start, so no server process is left behind and the next attempt starts from scratch
+                await asyncio.gather(*(pooled.close() for pooled in self.sessions))
+                raise
+            self._tools = tools
+            self._health_task = asyncio.create_task(self._health_loop(), name="mcp-pool-health")
+            logger.info("Started %d MCP sessions with tools %s", len(self.sessions), [tool.name for tool in self._tools])
+        return self
+
+    async def get_tools(self) -> list[BaseTool]:
+        """LangChain tools that call through the pool instead of opening a session per call."""
+        await self.start()
+        return [convert_mcp_tool_to_langchain_tool(self, tool) for tool in self._tools]
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None) -> CallToolResult:
+        # Same signature as ClientSession.call_tool, so the pool can stand in for a session
+        await self.start()
+        with tracer.start_as_current_span(
+            f"tools/call {name}",
+            kind=SpanKind.CLIENT,
+            attributes={"mcp.method.name": "tools/call", "gen_ai.tool.name": name},
+        ) as span:
+            if span.is_recording():
+                span.set_attribute("payload.input_chars", payload_size(arguments or {}))
+            for attempt in range(2):
+                index = await self._pick()
+                session = self.sessions[index].session
+                span.set_attribute("mcp.session", str(index))
+                try:
+                    result = await session.call_tool(name, arguments, read_timeout_seconds=timedelta(seconds=self.call_timeout))
+                except (McpError, anyio.ClosedResourceError, anyio.BrokenResourceError) as e:
+                    # A crashed server either closes our write stream or fails the pending request
+                    lost = not isinstance(e, McpError) or e.error.code == CONNECTION_CLOSED
+                    if not lost or attempt:
+                        raise
+                    self.sessions[index].healthy = False
+                    logger.warning("MCP session %s lost its connection during %s; retrying", index, name)
+                    span.add_event("retry", {"mcp.session": str(index)})
+                    await self._restart(index)
+                    continue
+                if span.is_recording():
+                    span.set_attribute("payload.output_chars", sum(len(getattr(item, "text", "")) for item in result.content))
+                    if result.isError:
+                        span.set_status(Status(StatusCode.ERROR, "tool returned an error"))
+                return result
+        raise AssertionError("unreachable")
+
+    async def _pick(self) -> int:
+        for _ in range(len(self.sessions)):
+            index = self._next % len(self.sessions)
+            self._next += 1
+            if self.sessions[index].healthy:
+                return index
+        # Nothing healthy: bring the next session back before using it
+        index = self._next % len(self.sessions)
+        await self._restart(index)
+        return index
+
+    async def _restart(self, index: int) -> None:
+        pooled = self.sessions[index]
+        async with self._restart_locks[index]:
+            if pooled.healthy and await pooled.ping(5):
+                # Another caller already restarted it
+                return
+            await pooled.close()
+            await pooled.start(self.start_timeout)
+            self.restarts += 1
+            logger.info("Restarted MCP session %s", index)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for index, pooled in enumerate(self.sessions):
+                if not await pooled.ping(5):
+                    try:
+                        await self._restart(index)
+                    except Exception as e:
+                        logger.warning("Could not restart MCP session %s: %s", index, e)
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                # Expected from the health task; the caller's own cancellation still propagates
+                if asyncio.current_task().cancelling():
+                    raise
+            finally:
+                self._health_task = None
+        await asyncio.gather(*(pooled.close() for pooled in self.sessions))
+        self._tools = None
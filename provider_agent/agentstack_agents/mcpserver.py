@@ -1,41 +1,131 @@
-import json
-from pathlib import Path
+from typing import Literal
 
 from mcp.server.fastmcp import FastMCP
 
+# The server is normally launched as a script, so fall back to an absolute import
+try:
+    from .directory_store import open_directory_from_env
+    from .provider_directory import paginate, shape
+    from .proximity import MAX_RADIUS_MILES
+except ImportError:
+    from directory_store import open_directory_from_env
+    from provider_directory import paginate, shape
+    from proximity import MAX_RADIUS_MILES
+
 # Initialize the server
 mcp = FastMCP("doctorserver")
 
-# Load Data
-data_path = Path(__file__).resolve().parent / "doctors.json"
-doctors: list = json.loads(data_path.read_text())
+# Open the directory store once; it swaps in a new snapshot by itself when the data changes
+directory = open_directory_from_env()
 
 
 @mcp.tool()
-def list_doctors(state: str | None = None, city: str | None = None) -> list[dict]:
-    """This tool returns a list of doctors practicing in a specific location. The search is case-insensitive.
+def list_doctors(
+    state: str | None = None,
+    city: str | None = None,
+    specialty: str | None = None,
+    language: str | None = None,
+    hospital: str | None = None,
+    board_certified: bool | None = None,
+    sort_by_experience: bool = False,
+    limit: int = 20,
+    cursor: str | None = None,
+    detail: Literal["summary", "full"] = "summary",
+    fields: list[str] | None = None,
+) -> dict:
+    """This tool returns a page of doctors practicing in a specific location. The search is case-insensitive.
 
     Args:
         state: The two-letter state code (e.g., "CA" for California).
         city: The name of the city or town (e.g., "Boston").
+        specialty: Optional medical specialty (e.g., "Cardiology", "Dermatology").
+        language: Optional language the doctor speaks (e.g., "Spanish").
+        hospital: Optional hospital affiliation (e.g., "Emory University Hospital").
+        board_certified: Optional; true for board-certified doctors only, false for the others.
+        sort_by_experience: Return the most experienced doctors first.
+        limit: Maximum number of doctors per page (default 20).
+        cursor: The "next_cursor" of a previous call, to fetch the following page.
+        detail: "summary" (name, specialty, city, phone) or "full" for complete records.
+        fields: Optional list of fields to return instead, e.g. ["name", "languages", "address.zip_code"].
 
     Returns:
-        A JSON string representing a list of doctors matching the criteria.
-        If no criteria are provided, an error message is returned.
-        Example: '[{"name": "Dr John James", "specialty": "Cardiology", ...}]'
+        A JSON object with the matching doctors, the total number of matches and the cursor of the next page.
+        If no location is provided, an error message is returned.
+        Example: '{"doctors": [{"name": "Dr John James", "specialty": "Cardiology", ...}], "total": 42, "next_cursor": "20"}'
     """
-    # Input validation: ensure at least one search term is given.
+    # Input validation: ensure at least one location term is given.
     if not state and not city:
-        return [{"error": "Please provide a state or a city."}]
+        return {"error": "Please provide a state or a city."}
+
+    # Use one snapshot for the whole call, even if a reload lands meanwhile
+    store = directory.current
+    positions = store.match(
+        sort_by_experience=sort_by_experience,
+        state=state,
+        city=city,
+        specialty=specialty,
+        language=language,
+        hospital=hospital,
+        board_certified=board_certified,
+    )
+    # Only the requested page is materialized, and only in the requested shape
+    page, next_cursor = paginate(positions, limit, cursor)
+    return {
+        "doctors": [shape(doc, detail, fields) for doc in store.fetch(page)],
+        "total": len(positions),
+        "next_cursor": next_cursor,
+    }
+
+
+@mcp.tool()
+def find_doctors_near_zip(
+    zip_code: str,
+    radius_miles: float = 25,
+    specialty: str | None = None,
+    language: str | None = None,
+    board_certified: bool | None = None,
+    limit: int = 20,
+    detail: Literal["summary", "full"] = "summary",
+    fields: list[str] | None = None,
+) -> list[dict]:
+    """This tool returns doctors within a distance of a US ZIP code, nearest first.
+
+    Args:
+        zip_code: The five-digit US ZIP code to search around (e.g., "30309").
+        radius_miles: Maximum distance from the ZIP code in miles (default 25, at most 500).
+        specialty: Optional medical specialty (e.g., "Cardiology").
+        language: Optional language the doctor speaks (e.g., "Spanish").
+        board_certified: Optional; true for board-certified doctors only.
+        limit: Maximum number of doctors to return (default 20).
+        detail: "summary" (name, specialty, city, phone) or "full" for complete records.
+        fields: Optional list of fields to return instead, e.g. ["name", "languages", "address.zip_code"].
+
+    Returns:
+        A JSON string representing a list of doctors, each with a "distance_miles" field.
+        If the ZIP code is unknown or the radius is not positive, an error message is returned.
+        Example: '[{"name": "Dr John James", "distance_miles": 3.2, ...}]'
+    """
+    # Reject nonsense and clamp huge radii, which would otherwise scan the whole grid
+    if not radius_miles > 0:
+        return [{"error": "Please provide a radius greater than 0 miles."}]
+    radius_miles = min(radius_miles, MAX_RADIUS_MILES)
+
+    store = directory.current
+    try:
+        nearby = store.near(zip_code, radius_miles)
+    except KeyError:
+        return [{"error": f"Unknown ZIP code {zip_code!r}."}]
 
-    target_state = state.strip().lower() if state else None
-    target_city = city.strip().lower() if city else None
+    # Apply the attribute filters through the directory indexes, then keep distance order
+    if specialty or language or board_certified is not None:
+        allowed = set(store.match(specialty=specialty, language=language, board_certified=board_certified))
+        nearby = [(distance, position) for distance, position in nearby if position in allowed]
 
+    nearby = nearby[: max(1, limit)]
+    docs = store.fetch([position for _, position in nearby])
     return [
-        doc
-        for doc in doctors
-        if (not target_state or doc["address"]["state"].lower() == target_state)
-        and (not target_city or doc["address"]["city"].lower() == target_city)
+        {**shape(doc, detail, fields), "distance_miles": round(distance, 1)}
+        for (distance, _), doc in zip(nearby, docs)
     ]
 
 
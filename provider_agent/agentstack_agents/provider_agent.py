@@ -1,6 +1,12 @@
 import asyncio
+import hashlib
+import json
+import logging
 import os
 import sys
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Annotated
 
@@ -11,40 +17,62 @@ from agentstack_sdk.a2a.types import AgentMessage
 from agentstack_sdk.server import Server
 from agentstack_sdk.server.context import RunContext
 from langchain.agents import create_agent
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_mcp_adapters.sessions import StdioConnection
 from langchain_openai import ChatOpenAI
+from mcp.types import CallToolResult
+from opentelemetry import trace
+
+from .answer_cache import AnswerCache
+from .directory_store import file_signature, watched_paths
+from .llm_tracing import llm_tracing
+from .mcp_pool import MCPSessionPool
+from .query_parser import ProviderQuery, parse_provider_query, render_answer
+from .tracing import configure_tracing, traced_agent
+
+logger = logging.getLogger(__name__)
+
+
+def directory_version() -> str:
+    """
+    Version of the provider directory for the answer cache. Derived from the files' signatures
+    rather than their content, so it stays cheap for very large directories and follows hot reloads.
+    """
+    return hashlib.sha256(repr(file_signature(watched_paths())).encode()).hexdigest()
+
+
+# One pool of long-lived MCP server processes, shared by every request
+mcp_pool = MCPSessionPool(
+    StdioConnection(
+        transport="stdio",
+        command=sys.executable,
+        args=[str(Path(__file__).resolve().parent / "mcpserver.py")],
+        # The MCP client only passes a minimal environment on, so forward the directory settings
+        env={key: value for key, value in os.environ.items() if key.startswith("PROVIDER_DIRECTORY_")},
+    )
+)
 
 
 class ProviderAgent:
     # Create a Langchain agent to bring onto the AGent Stack Platform as an A2A Server
-    def __init__(self, llm) -> None:
-        # Store the LLM and prepare the MCP client for provider lookup
+    def __init__(self, llm, pool: MCPSessionPool = mcp_pool) -> None:
+        # Store the LLM and the pool of MCP sessions used for provider lookup
         self.llm = llm
-        server_path = Path(__file__).resolve().parent / "mcpserver.py"
-        self.mcp_client = MultiServerMCPClient(
-            {
-                "find_healthcare_providers": StdioConnection(
-                    transport="stdio",
-                    command=sys.executable,
-                    args=[str(server_path)],
-                )
-            }
-        )
-
+        self.pool = pool
         self.agent = None
 
     async def initialize(self):
         """Initialize the agent asynchronously."""
-        # Fetch available MCP tools and build the LangChain agent around them
-        tools = await self.mcp_client.get_tools()
+        # Fetch the MCP tools (schemas are read once per pool) and build the LangChain agent around them
+        tools = await self.pool.get_tools()
         self.agent = create_agent(
             self.llm,
             tools,
             name="HealthcareProviderAgent",
             system_prompt=(
                 "Your task is to find and list providers using the available MCP tool(s). "
-                "Call the MCP tool to retrieve providers and ground your response strictly on its output."
+                "Call the MCP tool to retrieve providers and ground your response strictly on its output. "
+                "Tools return a compact summary of each provider; ask for detail=\"full\" or specific fields "
+                "only when the user needs more, and follow next_cursor only if more results are needed."
             ),
         )
         return self
@@ -62,18 +90,122 @@ class ProviderAgent:
                         "content": prompt,
                     }
                 ]
-            }
+            },
+            # MCP tool calls are traced by the pool, LLM calls by this handler
+            config={"callbacks": [llm_tracing]},
         )
         return response["messages"][-1].content
 
-# Create an instance of the server
+# Compiled agents are reused across requests with the same LLM configuration
+_agents: OrderedDict[tuple[str, str, str], ProviderAgent] = OrderedDict()
+_agents_lock = asyncio.Lock()
+AGENT_CACHE_SIZE = int(os.getenv("PROVIDER_AGENT_CACHE_SIZE", 8))
+
+
+async def get_provider_agent(llm_config) -> ProviderAgent:
+    """Return the cached agent for an LLM configuration, building it on first use."""
+    key = (
+        llm_config.api_model,
+        llm_config.api_base,
+        hashlib.sha256((llm_config.api_key or "").encode()).hexdigest(),
+    )
+    async with _agents_lock:
+        agent = _agents.get(key)
+        if agent is not None:
+            _agents.move_to_end(key)
+            return agent
+
+        # Build the LangChain OpenAI client using platform-provided credentials
+        langchain_llm = ChatOpenAI(
+            model=llm_config.api_model,
+            base_url=llm_config.api_base,
+            api_key=llm_config.api_key,
+            temperature=0,
+        )
+        agent = await ProviderAgent(langchain_llm).initialize()
+        _agents[key] = agent
+        while len(_agents) > AGENT_CACHE_SIZE:
+            _agents.popitem(last=False)
+        return agent
+
+
+@dataclass
+class FastPathStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+FAST_PATH = os.getenv("PROVIDER_FAST_PATH", "true").lower() == "true"
+FAST_PATH_LIMIT = 10
+fast_path_stats = FastPathStats()
+
+
+def _tool_json(result: CallToolResult):
+    # FastMCP returns structured output, wrapping list results as {"result": [...]}
+    data = result.structuredContent
+    if data is None:
+        data = json.loads(result.content[0].text) if result.content else None
+    if isinstance(data, dict) and set(data) == {"result"}:
+        data = data["result"]
+    return data
+
+
+async def answer_structured(query: ProviderQuery, pool: MCPSessionPool = mcp_pool) -> str | None:
+    """
+    Answer a parsed lookup by calling the directory tool directly and filling a template.
+    Returns None when the tool reports an error, so the LLM agent can take over; the
+    caller does the same when the call itself fails.
+    """
+    filters = {
+        "specialty": query.specialty,
+        "language": query.language,
+        "board_certified": query.board_certified,
+        "limit": FAST_PATH_LIMIT,
+    }
+    if query.zip_code:
+        arguments = {"zip_code": query.zip_code, "radius_miles": query.radius_miles, **filters}
+        result = await pool.call_tool("find_doctors_near_zip", {k: v for k, v in arguments.items() if v is not None})
+        doctors = _tool_json(result)
+        if result.isError or not isinstance(doctors, list) or any("error" in doc for doc in doctors):
+            return None
+        return render_answer(query, doctors, len(doctors))
+
+    arguments = {"state": query.state, "city": query.city, "sort_by_experience": query.sort_by_experience, **filters}
+    result = await pool.call_tool("list_doctors", {k: v for k, v in arguments.items() if v is not None})
+    page = _tool_json(result)
+    if result.isError or not isinstance(page, dict) or "error" in page:
+        return None
+    return render_answer(query, page["doctors"], page["total"])
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warm the MCP sessions at startup so the first lookup does not pay for process spawn and imports
+    try:
+        await mcp_pool.start()
+    except Exception as e:
+        logger.warning("MCP warm-up failed, sessions will start on first use: %s", e)
+    try:
+        yield
+    finally:
+        await mcp_pool.close()
+
+
+# Create an instance of the server and the answer cache shared by every request
 server = Server()
+answer_cache = AnswerCache.from_env(Path.home() / ".cache" / "provider_agent" / "answers.sqlite")
 
 
 @server.agent(
     # Add a name to the agent server so it can be discoverable on Agent Stack by name and called via handoff tool by the healthcare agent
     name="ProviderAgent",
 )
+@traced_agent("ProviderAgent")
 async def provider_agent_wrapper(
     input: Message,
     context: RunContext,
@@ -99,23 +231,50 @@ async def provider_agent_wrapper(
         yield AgentMessage(text="No LLM configuration available from the extension.")
         return
 
-    # Build the LangChain OpenAI client using platform-provided credentials
-    langchain_llm = ChatOpenAI(
-        model=llm_config.api_model,
-        base_url=llm_config.api_base,
-        api_key=llm_config.api_key,
-        temperature=0,
-    )
+    # Plain lookups ("cardiologists in Atlanta, GA") are answered from the directory without the LLM
+    if FAST_PATH:
+        query = parse_provider_query(prompt)
+        response = None
+        if query:
+            try:
+                response = await answer_structured(query)
+            except Exception as e:
+                # A timed-out call or a dropped MCP session is just a miss; the LLM agent still answers
+                logger.warning("Provider fast path failed, falling back to the LLM agent: %s", e)
+        if response is not None:
+            fast_path_stats.hits += 1
+        else:
+            fast_path_stats.misses += 1
+        trace.get_current_span().set_attribute("provider.fast_path", response is not None)
+        logger.info(
+            "Provider fast path %s (hits %d, misses %d, hit rate %.0f%%)",
+            "hit" if response is not None else "miss",
+            fast_path_stats.hits,
+            fast_path_stats.misses,
+            fast_path_stats.hit_rate * 100,
+        )
+        if response is not None:
+            yield AgentMessage(text=response)
+            return
 
-    agent = await ProviderAgent(langchain_llm).initialize()
-    response = await agent.answer_query(prompt)
+    async def compute() -> str:
+        agent = await get_provider_agent(llm_config)
+        return await agent.answer_query(prompt)
+
+    # Repeated questions skip the MCP server and the LLM; identical ones in flight share a single run
+    if answer_cache:
+        key = AnswerCache.make_key(prompt, llm_config.api_model, directory_version(), llm_config.api_base)
+        response = await answer_cache.get_or_compute(key, compute)
+    else:
+        response = await compute()
     yield AgentMessage(text=response)
 
 # Run the server
 def run() -> None:
     host = os.getenv("HOST", "127.0.0.1")
     port = int(os.getenv("PORT", 8000))
-    server.run(host=host, port=port)
+    configure_tracing("ProviderAgent")
+    server.run(host=host, port=port, lifespan_fn=lifespan)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+import json
+from collections import defaultdict
+from pathlib import Path
+
+# Also imported by mcpserver.py, which runs as a plain script
+try:
+    from .proximity import ProviderLocator, load_zip_centroids
+except ImportError:
+    from proximity import ProviderLocator, load_zip_centroids
+
+# Filterable fields and how to read their (possibly multiple) values from a record
+INDEXED_FIELDS = {
+    "state": lambda doc: [doc["address"]["state"]],
+    "city": lambda doc: [doc["address"]["city"]],
+    "specialty": lambda doc: [doc["specialty"]],
+    "language": lambda doc: doc.get("languages", []),
+    "hospital": lambda doc: doc.get("hospital_affiliations", []),
+    "board_certified": lambda doc: [doc.get("board_certified", False)],
+}
+
+EMPTY: frozenset[int] = frozenset()
+
+# Compact form returned unless the caller asks for more; "address.city" style paths reach into nested fields
+SUMMARY_FIELDS = ["name", "specialty", "address.city", "phone"]
+
+
+def normalize(value: str | bool) -> str:
+    """Case- and whitespace-insensitive key used both when indexing and when querying."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return " ".join(value.lower().split())
+
+
+def project(doc: dict, fields: list[str]) -> dict:
+    """Copy only the requested (possibly dotted) fields of a record; unknown fields are skipped."""
+    projected: dict = {}
+    for path in fields:
+        value = doc
+        for key in path.split("."):
+            if not isinstance(value, dict) or key not in value:
+                break
+            value = value[key]
+        else:
+            projected[path.rsplit(".", 1)[-1]] = value
+    return projected
+
+
+def shape(doc: dict, detail: str = "summary", fields: list[str] | None = None) -> dict:
+    """Full record, an explicit projection, or the compact summary."""
+    if fields:
+        return project(doc, fields)
+    if detail == "full":
+        return doc
+    return project(doc, SUMMARY_FIELDS)
+
+
+def paginate(items: list, limit: int, cursor: str | None) -> tuple[list, str | None]:
+    """
+    Slice a result list for one page. The cursor is the opaque offset of the next page,
+    or None once the last page has been returned.
+    """
+    start = int(cursor) if cursor and cursor.isdigit() else 0
+    limit = max(1, limit)
+    page = items[start : start + limit]
+    next_start = start + len(page)
+    return page, str(next_start) if next_start < len(items) else None
+
+
+class ProviderDirectory:
+    """
+    Doctor records with inverted indexes built once at load time.
+
+    Every indexed field maps a normalized value to the set of record positions
+    that have it, so a compound filter is the intersection of a few posting sets
+    instead of a scan over the whole directory.
+    """
+
+    def __init__(self, doctors: list[dict], centroids: dict[str, tuple[float, float]] | None = None) -> None:
+        self.doctors = doctors
+        self.indexes: dict[str, dict[str, set[int]]] = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        for position, doc in enumerate(doctors):
+            for field, values in INDEXED_FIELDS.items():
+                for value in values(doc):
+                    self.indexes[field][normalize(value)].add(position)
+        self.indexes = {field: dict(postings) for field, postings in self.indexes.items()}
+
+        # Rank of each record when ordered by experience (most experienced first), for sorting matches
+        by_experience = sorted(range(len(doctors)), key=lambda i: -doctors[i].get("years_experience", 0))
+        self.experience_rank = [0] * len(doctors)
+        for rank, position in enumerate(by_experience):
+            self.experience_rank[position] = rank
+
+        # Grid index over the providers' ZIP code centroids for distance searches
+        self.locator = ProviderLocator(doctors, centroids if centroids is not None else load_zip_centroids())
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ProviderDirectory":
+        return cls(json.loads(path.read_text()))
+
+    def __len__(self) -> int:
+        return len(self.doctors)
+
+    def match(self, sort_by_experience: bool = False, **filters: str | bool | None) -> list[int]:
+        """
+        Positions of the records matching every given filter, in directory order
+        or most experienced first.
+        """
+        postings = [
+            self.indexes[field].get(normalize(value), EMPTY)
+            for field, value in filters.items()
+            if value is not None and value != ""
+        ]
+        if not postings:
+            positions = range(len(self.doctors))
+        else:
+            # Intersect starting from the smallest set so the work is bounded by the rarest filter
+            postings.sort(key=len)
+            matched = set(postings[0])
+            for posting in postings[1:]:
+                matched &= posting
+                if not matched:
+                    break
+            positions = matched
+
+        if sort_by_experience:
+            return sorted(positions, key=self.experience_rank.__getitem__)
+        return sorted(positions)
+
+    def fetch(self, positions: list[int]) -> list[dict]:
+        return [self.doctors[position] for position in positions]
+
+    def near(self, zip_code: str, radius_miles: float) -> list[tuple[float, int]]:
+        return self.locator.near(zip_code, radius_miles)
+
+    def search(self, sort_by_experience: bool = False, **filters: str | bool | None) -> list[dict]:
+        return self.fetch(self.match(sort_by_experience, **filters))
@@ -0,0 +1,92 @@
+import csv
+import gzip
+import math
+from collections import defaultdict
+from pathlib import Path
+
+# Latitude/longitude centroid of every US ZIP code, bundled so lookups never need the network
+# (derived from the MIT-licensed dataset of the `zipcodes` Python package, February 2025)
+ZIP_CENTROIDS_PATH = Path(__file__).resolve().parent / "zip_centroids.csv.gz"
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE_LATITUDE = 69.0
+# A radius query visits every grid cell in its bounding box, so radii are capped at this
+MAX_RADIUS_MILES = 500.0
+
+
+def normalize_zip(zip_code: str) -> str:
+    """Five-digit ZIP from inputs such as "2115", "02115" or "02115-3456"."""
+    return zip_code.strip().split("-")[0].zfill(5)
+
+
+def load_zip_centroids(path: Path = ZIP_CENTROIDS_PATH) -> dict[str, tuple[float, float]]:
+    with gzip.open(path, "rt", newline="") as f:
+        return {row["zip_code"]: (float(row["latitude"]), float(row["longitude"])) for row in csv.DictReader(f)}
+
+
+def haversine_miles(a: tuple[float, float], b: tuple[float, float]) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(h)))
+
+
+class GridIndex:
+    """
+    Points bucketed into square cells of `cell_degrees` latitude/longitude.
+
+    A radius query only measures the points in the cells overlapping the
+    query's bounding box, instead of every point in the index.
+    """
+
+    def __init__(self, points: list[tuple[float, float]], cell_degrees: float = 0.5) -> None:
+        self.points = points
+        self.cell_degrees = cell_degrees
+        self.cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for position, point in enumerate(points):
+            self.cells[self._cell(point)].append(position)
+        self.cells = dict(self.cells)
+
+    def _cell(self, point: tuple[float, float]) -> tuple[int, int]:
+        return math.floor(point[0] / self.cell_degrees), math.floor(point[1] / self.cell_degrees)
+
+    def within(self, center: tuple[float, float], radius_miles: float) -> list[tuple[float, int]]:
+        """(distance in miles, position) of every point within the radius, nearest first."""
+        lat_span = radius_miles / MILES_PER_DEGREE_LATITUDE
+        # Degrees of longitude shrink towards the poles; clamp so the box stays finite
+        lon_span = radius_miles / (MILES_PER_DEGREE_LATITUDE * max(math.cos(math.radians(center[0])), 0.01))
+        low = self._cell((center[0] - lat_span, center[1] - lon_span))
+        high = self._cell((center[0] + lat_span, center[1] + lon_span))
+
+        results = []
+        for row in range(low[0], high[0] + 1):
+            for column in range(low[1], high[1] + 1):
+                for position in self.cells.get((row, column), ()):
+                    distance = haversine_miles(center, self.points[position])
+                    if distance <= radius_miles:
+                        results.append((distance, position))
+        results.sort()
+        return results
+
+
+class ProviderLocator:
+    """Providers placed at their ZIP code centroid, for "near ZIP code" searches."""
+
+    def __init__(self, doctors: list[dict], centroids: dict[str, tuple[float, float]]) -> None:
+        self.centroids = centroids
+        # Providers whose ZIP code is unknown simply cannot be found by distance
+        self.positions: list[int] = []
+        points: list[tuple[float, float]] = []
+        for position, doc in enumerate(doctors):
+            point = centroids.get(normalize_zip(doc["address"].get("zip_code", "")))
+            if point is not None:
+                self.positions.append(position)
+                points.append(point)
+        self.index = GridIndex(points)
+
+    def near(self, zip_code: str, radius_miles: float) -> list[tuple[float, int]]:
+        """
+        (distance in miles, directory position) of providers within the radius, nearest first.
+        Raises KeyError for ZIP codes missing from the centroid table.
+        """
+        center = self.centroids[normalize_zip(zip_code)]
+        return [(distance, self.positions[point]) for distance, point in self.index.within(center, radius_miles)]
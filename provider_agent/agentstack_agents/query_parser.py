@@ -0,0 +1,185 @@
+import re
+from dataclasses import dataclass
+
+# Ways people name each specialty in the directory
+SPECIALTY_ALIASES: dict[str, tuple[str, ...]] = {
+    "Cardiology": ("cardiology", "cardiologist", "cardiologists", "heart doctor", "heart doctors"),
+    "Dermatology": ("dermatology", "dermatologist", "dermatologists", "skin doctor", "skin doctors"),
+    "Emergency Medicine": ("emergency medicine", "emergency physician", "emergency physicians"),
+    "Internal Medicine": ("internal medicine", "internist", "internists"),
+    "Neurology": ("neurology", "neurologist", "neurologists"),
+    "Obstetrics & Gynecology": (
+        "obstetrics gynecology", "obstetrics and gynecology", "ob gyn", "ob-gyn", "obgyn", "ob gyns", "ob-gyns",
+        "obgyns", "obstetrician", "obstetricians", "gynecologist", "gynecologists",
+    ),
+    "Oncology": ("oncology", "oncologist", "oncologists", "cancer doctor", "cancer doctors"),
+    "Orthopedic Surgery": (
+        "orthopedic surgery", "orthopedic surgeon", "orthopedic surgeons", "orthopedist", "orthopedists",
+        "orthopaedic surgeon", "orthopaedic surgeons",
+    ),
+    "Pediatrics": ("pediatrics", "pediatrician", "pediatricians", "paediatrician", "paediatricians"),
+    "Psychiatry": ("psychiatry", "psychiatrist", "psychiatrists"),
+}
+
+LANGUAGES = (
+    "english spanish mandarin cantonese chinese korean vietnamese tagalog french portuguese hindi gujarati "
+    "arabic russian german italian japanese polish urdu punjabi bengali farsi haitian creole"
+).split()
+
+STATES = {
+    "AL": "alabama", "AK": "alaska", "AZ": "arizona", "AR": "arkansas", "CA": "california",
+    "CO": "colorado", "CT": "connecticut", "DE": "delaware", "DC": "district of columbia", "FL": "florida",
+    "GA": "georgia", "HI": "hawaii", "ID": "idaho", "IL": "illinois", "IN": "indiana", "IA": "iowa",
+    "KS": "kansas", "KY": "kentucky", "LA": "louisiana", "ME": "maine", "MD": "maryland",
+    "MA": "massachusetts", "MI": "michigan", "MN": "minnesota", "MS": "mississippi", "MO": "missouri",
+    "MT": "montana", "NE": "nebraska", "NV": "nevada", "NH": "new hampshire", "NJ": "new jersey",
+    "NM": "new mexico", "NY": "new york", "NC": "north carolina", "ND": "north dakota", "OH": "ohio",
+    "OK": "oklahoma", "OR": "oregon", "PA": "pennsylvania", "RI": "rhode island", "SC": "south carolina",
+    "SD": "south dakota", "TN": "tennessee", "TX": "texas", "UT": "utah", "VT": "vermont",
+    "VA": "virginia", "WA": "washington", "WV": "west virginia", "WI": "wisconsin", "WY": "wyoming",
+}
+STATE_BY_NAME = {name: code for code, name in STATES.items()}
+
+# Abbreviations that are also everyday words only count as a state when written in capitals
+WORDLIKE_STATES = {"AL", "CO", "DE", "HI", "ID", "IN", "LA", "MA", "ME", "MO", "MS", "OH", "OK", "OR", "PA"}
+
+# Words that carry no constraint. A question with any other leftover word (a symptom, an insurer,
+# "best", "new patients", ...) means more than this parser understands, so it goes to the LLM.
+FILLER = frozenset(
+    "a an the any some all me my i im we us you your please can could would will do does is are there "
+    "what which who where how kind kinds type types sort of find finding search show list give get need "
+    "needs want looking look for see visit go to doctor doctors physician physicians provider providers "
+    "specialist specialists available options option near in around at within mile miles from "
+    "area that with and or hi hello thanks thank help recommend m s".split()
+)
+
+_STATE_PATTERN = "|".join(sorted([*(name for name in STATE_BY_NAME), *(code.lower() for code in STATES)], key=len, reverse=True))
+LOCATION = re.compile(
+    rf"\b(?:in|near|around|at)\s+(?P<city>[a-z][a-z.'-]*(?:\s+[a-z][a-z.'-]*){{0,3}}?)\s*,?\s+(?P<state>{_STATE_PATTERN})\b"
+)
+ZIP_CODE = re.compile(r"\b(?P<zip>\d{5})(?:-\d{4})?\b")
+RADIUS = re.compile(r"\bwithin\s+(?P<radius>\d{1,3})\s+miles?\b")
+LANGUAGE = re.compile(rf"\b(?:(?P<before>{'|'.join(LANGUAGES)})[\s-]+speaking|speaks?\s+(?P<after>{'|'.join(LANGUAGES)}))\b")
+EXPERIENCE = re.compile(r"\bmost\s+experienced\b|\bexperienced\b")
+BOARD_CERTIFIED = re.compile(r"\bboard[\s-]+certified\b")
+_SPECIALTY_PATTERN = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(alias) for alias in sorted({a for aliases in SPECIALTY_ALIASES.values() for a in aliases}, key=len, reverse=True))
+    + r")\b"
+)
+SPECIALTY_BY_ALIAS = {alias: specialty for specialty, aliases in SPECIALTY_ALIASES.items() for alias in aliases}
+
+
+@dataclass(frozen=True)
+class ProviderQuery:
+    """A provider lookup fully described by directory filters."""
+
+    city: str | None = None
+    state: str | None = None
+    zip_code: str | None = None
+    radius_miles: float = 25
+    specialty: str | None = None
+    language: str | None = None
+    board_certified: bool | None = None
+    sort_by_experience: bool = False
+
+    @property
+    def place(self) -> str:
+        return f"{self.city.title()}, {self.state}" if self.city else f"ZIP code {self.zip_code}"
+
+
+def _normalize(text: str) -> str:
+    # Same length as the input so match offsets line up with the original text
+    return re.sub(r"[^a-z0-9,.'-]", " ", text.lower().replace("&", " "))
+
+
+def parse_provider_query(text: str) -> ProviderQuery | None:
+    """
+    Parse common phrasings such as "cardiologists in Atlanta, GA", "Spanish-speaking
+    pediatrician near 33156" or "what doctors can I see in Houston Texas". Returns None
+    whenever any part of the question is not understood, so the LLM handles it.
+    """
+    normalized = _normalize(text)
+    if len(normalized) != len(text):
+        # Lowercasing changed the length (rare non-ASCII input); offsets would not line up
+        return None
+    consumed: list[tuple[int, int]] = []
+    fields: dict = {}
+
+    locations = list(LOCATION.finditer(normalized))
+    zips = list(ZIP_CODE.finditer(normalized))
+    if len(locations) + len(zips) != 1:
+        # No place, or several: ambiguous
+        return None
+
+    if locations:
+        match = locations[0]
+        state = match.group("state")
+        code = STATE_BY_NAME.get(state) or state.upper()
+        original = text[match.start("state") : match.end("state")]
+        if code in WORDLIKE_STATES and len(state) == 2 and not original.isupper():
+            return None
+        fields["city"] = " ".join(match.group("city").replace(",", " ").split())
+        fields["state"] = code
+        consumed.append(match.span())
+    else:
+        if EXPERIENCE.search(normalized):
+            # Distance searches are ordered by distance; let the LLM decide how to rank them
+            return None
+        fields["zip_code"] = zips[0].group("zip")
+        consumed.append(zips[0].span())
+        if radius := RADIUS.search(normalized):
+            fields["radius_miles"] = float(radius.group("radius"))
+            consumed.append(radius.span())
+
+    specialties = {SPECIALTY_BY_ALIAS[match.group(0)] for match in _SPECIALTY_PATTERN.finditer(normalized)}
+    if len(specialties) > 1:
+        return None
+    if specialties:
+        fields["specialty"] = specialties.pop()
+        consumed.extend(match.span() for match in _SPECIALTY_PATTERN.finditer(normalized))
+
+    languages = list(LANGUAGE.finditer(normalized))
+    if len({(m.group("before") or m.group("after")) for m in languages}) > 1:
+        return None
+    if languages:
+        fields["language"] = (languages[0].group("before") or languages[0].group("after")).title()
+        consumed.extend(match.span() for match in languages)
+
+    for pattern, field in ((EXPERIENCE, "sort_by_experience"), (BOARD_CERTIFIED, "board_certified")):
+        if found := list(pattern.finditer(normalized)):
+            fields[field] = True
+            consumed.extend(match.span() for match in found)
+
+    # Everything that is not a recognized filter must be filler
+    residual = list(normalized)
+    for start, end in consumed:
+        residual[start:end] = " " * (end - start)
+    leftover = re.findall(r"[a-z0-9]+", "".join(residual))
+    if any(word not in FILLER for word in leftover):
+        return None
+
+    return ProviderQuery(**fields)
+
+
+def render_answer(query: ProviderQuery, doctors: list[dict], total: int) -> str:
+    """Templated answer from the directory tool's summary records."""
+    description = f"{query.specialty} providers" if query.specialty else "providers"
+    if query.language:
+        description += f" who speak {query.language}"
+    if query.board_certified:
+        description = f"board-certified {description}"
+
+    if not doctors:
+        return f"I couldn't find any {description} in {query.place} in the provider directory."
+
+    where = f"within {query.radius_miles:g} miles of {query.place}" if query.zip_code else f"in {query.place}"
+    lines = [f"Here are the {description} {where}:"]
+    for doc in doctors:
+        line = f"- {doc.get('name')} — {doc.get('specialty')}, {doc.get('city')}, {doc.get('phone')}"
+        if "distance_miles" in doc:
+            line += f" ({doc['distance_miles']:g} miles away)"
+        lines.append(line)
+    if total > len(doctors):
+        lines.append(f"Showing {len(doctors)} of {total} matches.")
+    return "\n".join(lines)
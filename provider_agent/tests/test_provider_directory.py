@@ -0,0 +1,98 @@
+import pytest
+
+from agentstack_agents.provider_directory import ProviderDirectory, paginate, shape
+
+
+def doctor(name: str, specialty: str, city: str, state: str, years: int, **extra) -> dict:
+    return {
+        "name": name,
+        "specialty": specialty,
+        "address": {"street": "1 Main St", "city": city, "state": state, "zip_code": "00000"},
+        "phone": "(555) 555-0100",
+        "years_experience": years,
+        **extra,
+    }
+
+
+DOCTORS = [
+    doctor("Dr. A", "Cardiology", "Atlanta", "GA", 15, languages=["English", "Spanish"], board_certified=True),
+    doctor("Dr. B", "Dermatology", "Atlanta", "GA", 30, languages=["English"], hospital_affiliations=["Emory"]),
+    doctor("Dr. C", "Cardiology", "Boston", "MA", 22, languages=["Spanish"], board_certified=True),
+    doctor("Dr. D", "Cardiology", "Atlanta", "GA", 8, hospital_affiliations=["Emory", "Piedmont"]),
+    doctor("Dr. E", "Pediatrics", "New York", "NY", 12),
+]
+
+
+@pytest.fixture
+def directory() -> ProviderDirectory:
+    # No ZIP centroids: these tests only use the field indexes
+    return ProviderDirectory(DOCTORS, centroids={})
+
+
+def names(directory: ProviderDirectory, positions: list[int]) -> list[str]:
+    return [doc["name"] for doc in directory.fetch(positions)]
+
+
+def test_filters_ignore_case_and_spacing(directory: ProviderDirectory) -> None:
+    assert names(directory, directory.match(city="  atlanta ", specialty="CARDIOLOGY")) == ["Dr. A", "Dr. D"]
+    assert names(directory, directory.match(city="new  york")) == ["Dr. E"]
+
+
+def test_compound_filters_intersect(directory: ProviderDirectory) -> None:
+    assert names(directory, directory.match(specialty="Cardiology", language="Spanish")) == ["Dr. A", "Dr. C"]
+    assert names(directory, directory.match(state="GA", hospital="emory")) == ["Dr. B", "Dr. D"]
+    assert names(directory, directory.match(specialty="Cardiology", board_certified=False)) == ["Dr. D"]
+    assert directory.match(state="GA", specialty="Pediatrics") == []
+
+
+def test_unknown_values_match_nothing_and_unset_filters_are_ignored(directory: ProviderDirectory) -> None:
+    assert directory.match(city="Atlantis") == []
+    assert directory.match(state="GA", city=None, specialty="") == [0, 1, 3]
+    assert directory.match() == list(range(len(DOCTORS)))
+
+
+def test_sort_by_experience(directory: ProviderDirectory) -> None:
+    assert names(directory, directory.match(sort_by_experience=True, state="GA")) == ["Dr. B", "Dr. A", "Dr. D"]
+    assert names(directory, directory.match(state="GA")) == ["Dr. A", "Dr. B", "Dr. D"]
+
+
+def test_search_returns_the_records(directory: ProviderDirectory) -> None:
+    assert directory.search(city="Boston") == [DOCTORS[2]]
+
+
+def test_pages_follow_the_cursor_to_the_end() -> None:
+    items = list(range(5))
+    pages, cursor = [], None
+    while True:
+        page, cursor = paginate(items, 2, cursor)
+        pages.append(page)
+        if cursor is None:
+            break
+    assert pages == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.parametrize("cursor", [None, "", "abc", "-1"])
+def test_missing_or_malformed_cursor_starts_at_the_beginning(cursor: str | None) -> None:
+    assert paginate(list(range(5)), 2, cursor) == ([0, 1], "2")
+
+
+def test_page_edges() -> None:
+    # An exact last page has no next cursor, a cursor past the end gives an empty page
+    assert paginate(list(range(4)), 2, "2") == ([2, 3], None)
+    assert paginate(list(range(4)), 2, "9") == ([], None)
+    # A non-positive limit still returns one record at a time
+    assert paginate(list(range(4)), 0, None) == ([0], "1")
+
+
+def test_summary_is_the_default_shape() -> None:
+    assert shape(DOCTORS[0]) == {"name": "Dr. A", "specialty": "Cardiology", "city": "Atlanta", "phone": "(555) 555-0100"}
+    assert shape(DOCTORS[0], detail="full") is DOCTORS[0]
+
+
+def test_fields_project_dotted_paths_and_skip_unknown_ones() -> None:
+    fields = ["name", "address.zip_code", "languages", "address.country", "education.residency"]
+    assert shape(DOCTORS[0], detail="full", fields=fields) == {
+        "name": "Dr. A",
+        "zip_code": "00000",
+        "languages": ["English", "Spanish"],
+    }
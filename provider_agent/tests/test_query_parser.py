@@ -0,0 +1,85 @@
+import pytest
+
+from agentstack_agents.query_parser import ProviderQuery, parse_provider_query, render_answer
+
+
+@pytest.mark.parametrize(
+    ("question", "expected"),
+    [
+        ("Cardiologists in Atlanta, GA", ProviderQuery(city="atlanta", state="GA", specialty="Cardiology")),
+        ("what doctors can I see in Houston Texas?", ProviderQuery(city="houston", state="TX")),
+        (
+            "Find me an OB-GYN in New York, NY",
+            ProviderQuery(city="new york", state="NY", specialty="Obstetrics & Gynecology"),
+        ),
+        (
+            "Spanish-speaking pediatrician near 33156",
+            ProviderQuery(zip_code="33156", specialty="Pediatrics", language="Spanish"),
+        ),
+        (
+            "dermatologists within 10 miles of 02115",
+            ProviderQuery(zip_code="02115", radius_miles=10, specialty="Dermatology"),
+        ),
+        (
+            "most experienced board-certified heart doctor in Boston, MA",
+            ProviderQuery(
+                city="boston", state="MA", specialty="Cardiology", board_certified=True, sort_by_experience=True
+            ),
+        ),
+        (
+            "a neurologist who speaks Mandarin in San Francisco CA",
+            ProviderQuery(city="san francisco", state="CA", specialty="Neurology", language="Mandarin"),
+        ),
+    ],
+)
+def test_plain_lookups_are_parsed(question: str, expected: ProviderQuery) -> None:
+    assert parse_provider_query(question) == expected
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # A symptom, an insurer and a ranking the directory cannot express
+        "cardiologist in Atlanta, GA for chest pain",
+        "dermatologist in Denver, CO that takes Aetna",
+        "best pediatrician in Miami, FL",
+        # No place, or two places
+        "find me a cardiologist",
+        "cardiologists in Atlanta, GA or near 30309",
+        # Two specialties or two languages
+        "cardiologist or neurologist in Atlanta, GA",
+        "Spanish-speaking or French-speaking pediatrician near 33156",
+        # Distance searches are ranked by distance, not experience
+        "most experienced cardiologist near 30309",
+        # "in" written in lower case is a word, not Indiana
+        "doctors in Springfield in",
+    ],
+)
+def test_anything_else_goes_to_the_llm(question: str) -> None:
+    assert parse_provider_query(question) is None
+
+
+def test_wordlike_state_codes_count_in_capitals() -> None:
+    assert parse_provider_query("doctors in Springfield IN") == ProviderQuery(city="springfield", state="IN")
+
+
+def test_answer_lists_the_doctors_and_the_remaining_total() -> None:
+    query = ProviderQuery(city="atlanta", state="GA", specialty="Cardiology", language="Spanish")
+    doctors = [{"name": "Dr. A", "specialty": "Cardiology", "city": "Atlanta", "phone": "(555) 555-0100"}]
+    assert render_answer(query, doctors, total=3) == (
+        "Here are the Cardiology providers who speak Spanish in Atlanta, GA:\n"
+        "- Dr. A — Cardiology, Atlanta, (555) 555-0100\n"
+        "Showing 1 of 3 matches."
+    )
+
+
+def test_answer_for_a_distance_search_and_for_no_match() -> None:
+    query = ProviderQuery(zip_code="30309", radius_miles=10, board_certified=True)
+    doctors = [{"name": "Dr. A", "specialty": "Cardiology", "city": "Atlanta", "phone": "1", "distance_miles": 2.5}]
+    assert render_answer(query, doctors, total=1).splitlines() == [
+        "Here are the board-certified providers within 10 miles of ZIP code 30309:",
+        "- Dr. A — Cardiology, Atlanta, 1 (2.5 miles away)",
+    ]
+    assert render_answer(query, [], total=0) == (
+        "I couldn't find any board-certified providers in ZIP code 30309 in the provider directory."
+    )
@@ -0,0 +1,134 @@
+import asyncio
+import importlib.util
+import logging
+import os
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import httpx
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    """Delay requested by a Retry-After header, in seconds or as an HTTP date."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class SharedHTTPClient:
+    """
+    One keep-alive, connection-pooled httpx client per process, so repeated calls to the
+    same host reuse TCP/TLS connections instead of handshaking for every request.
+
+    The client is created on first use inside the running event loop and closed by
+    `aclose()` when the server shuts down. HTTP/2 is negotiated through httpx's
+    `http2` extra, which the package depends on.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = int(os.getenv("RESEARCH_HTTP_MAX_CONNECTIONS", 20)),
+        max_keepalive_connections: int = int(os.getenv("RESEARCH_HTTP_MAX_KEEPALIVE", 10)),
+        keepalive_expiry: float = float(os.getenv("RESEARCH_HTTP_KEEPALIVE_EXPIRY", 30)),
+        timeout: float = float(os.getenv("RESEARCH_HTTP_TIMEOUT", 15)),
+        connect_timeout: float = float(os.getenv("RESEARCH_HTTP_CONNECT_TIMEOUT", 5)),
+        retries: int = int(os.getenv("RESEARCH_HTTP_RETRIES", 3)),
+        backoff_base: float = float(os.getenv("RESEARCH_HTTP_BACKOFF_BASE", 0.25)),
+        backoff_max: float = float(os.getenv("RESEARCH_HTTP_BACKOFF_MAX", 4)),
+        http2: bool = os.getenv("RESEARCH_HTTP_HTTP2", "true").lower() == "true",
+    ) -> None:
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # h2 comes with httpx[http2]; an environment installed without it stays on pooled HTTP/1.1
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout, http2=self.http2)
+        return self._client
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from concurrent requests instead of synchronizing them
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request, retrying with jittered exponential backoff on 429/5xx responses
+        and transport errors. The last response (or error) is returned (or raised) as is.
+        One span covers the request including its retries and backoff.
+        """
+        target = httpx.URL(url)
+        with tracer.start_as_current_span(
+            method,
+            kind=SpanKind.CLIENT,
+            attributes={
+                "http.request.method": method,
+                # Without the query string, which may carry search terms or keys
+                "url.full": str(target.copy_with(query=None)),
+                "server.address": target.host,
+            },
+        ) as span:
+            for attempt in range(self.retries + 1):
+                span.set_attribute("http.request.resend_count", attempt)
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt == self.retries:
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.warning("%s %s failed (%s); retrying in %.2f s", method, url, e, delay)
+                else:
+                    if response.status_code not in RETRY_STATUS_CODES or attempt == self.retries:
+                        span.set_attributes({
+                            "http.response.status_code": response.status_code,
+                            "http.response.body.size": len(response.content),
+                        })
+                        if response.status_code >= 400:
+                            span.set_status(Status(StatusCode.ERROR, f"HTTP {response.status_code}"))
+                        return response
+                    retry_after = _retry_after_seconds(response)
+                    delay = min(self.backoff_max, retry_after) if retry_after is not None else self._backoff(attempt)
+                    logger.warning("%s %s returned %d; retrying in %.2f s", method, url, response.status_code, delay)
+                    await response.aclose()
+                await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Shared by every tool in the process
+shared_http = SharedHTTPClient()
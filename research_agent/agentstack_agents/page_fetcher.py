@@ -0,0 +1,282 @@
+import asyncio
+import codecs
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+
+import httpx
+from opentelemetry.trace import SpanKind
+
+from .answer_cache import AnswerCache, MemoryBackend
+from .http_client import SharedHTTPClient, shared_http
+from .search_batch import canonical_url
+from .search_cache import search_terms
+from .tracing import tracer
+
+logger = logging.getLogger(__name__)
+
+# Elements whose text is never page content
+SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form", "button", "iframe"})
+# Elements that end a block of text
+BLOCK_TAGS = frozenset({
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "br", "hr", "figcaption",
+})
+# Elements that hold the main content when a page marks it up
+MAIN_TAGS = frozenset({"main", "article"})
+# Void elements never get an end tag, so they must not change the nesting depth
+VOID_TAGS = frozenset({"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"})
+
+
+class TextExtractor(HTMLParser):
+    """
+    Incremental main-content extractor: feed it HTML as it arrives and read the text
+    blocks at the end. Navigation, scripts, forms and similar chrome are skipped; when
+    the page has <main> or <article> elements only their text is kept.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._in_title = False
+        # Tag that opened the skipped region, and how deeply it is nested in itself.
+        # Only that tag is counted, since HTML often leaves <li> or <p> unclosed.
+        self._skip_tag: str | None = None
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._current: list[str] = []
+        self._current_in_main = False
+        self._blocks: list[tuple[bool, str]] = []
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if tag in VOID_TAGS:
+            if tag in BLOCK_TAGS:
+                self._end_block()
+            return
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in SKIPPED_TAGS:
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag == "title":
+            self._in_title = True
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        if tag in MAIN_TAGS:
+            self._main_depth += 1
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in VOID_TAGS:
+            return
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+            return
+        if tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self._end_block()
+        if tag in MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag:
+            return
+        if self._in_title:
+            self.title += data
+            return
+        if not self._current:
+            self._current_in_main = self._main_depth > 0
+        self._current.append(data)
+
+    def _end_block(self) -> None:
+        text = " ".join("".join(self._current).split())
+        if text:
+            self._blocks.append((self._current_in_main, text))
+        self._current = []
+
+    def blocks(self) -> list[str]:
+        self._end_block()
+        main = [text for in_main, text in self._blocks if in_main]
+        return main or [text for _, text in self._blocks]
+
+
+def split_chunks(blocks: list[str], chunk_words: int) -> list[str]:
+    """Group consecutive text blocks into chunks of roughly `chunk_words` words."""
+    chunks: list[str] = []
+    current: list[str] = []
+    count = 0
+    for block in blocks:
+        words = block.split()
+        # Very long blocks are split on their own
+        while len(words) > chunk_words:
+            if current:
+                chunks.append(" ".join(current))
+                current, count = [], 0
+            chunks.append(" ".join(words[:chunk_words]))
+            words = words[chunk_words:]
+        if count + len(words) > chunk_words and current:
+            chunks.append(" ".join(current))
+            current, count = [], 0
+        current.extend(words)
+        count += len(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def relevant_chunks(chunks: list[str], query: str, limit: int) -> list[str]:
+    """
+    The `limit` chunks sharing the most query terms, in page order. Terms are matched
+    on their normalized stems, so "symptoms" in a query matches "symptom" in the page.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return chunks[:limit]
+    scored = []
+    for position, chunk in enumerate(chunks):
+        words = search_terms(chunk)
+        score = len(terms & words)
+        if score:
+            scored.append((score, position))
+    best = sorted(position for _, position in sorted(scored, key=lambda item: (-item[0], item[1]))[:limit])
+    return [chunks[position] for position in best]
+
+
+@dataclass
+class FetchedPage:
+    """Excerpts of one result page, or why it could not be read."""
+
+    url: str
+    title: str = ""
+    excerpts: list[str] = field(default_factory=list)
+    cached: bool = False
+    seconds: float = 0.0
+    error: str | None = None
+
+
+class PageFetcher:
+    """
+    Fetches result pages concurrently through the shared HTTP client and returns the
+    parts of their main text that are relevant to the search. Bodies are read as a
+    stream and parsed as they arrive, up to `max_bytes` per page. The whole fan-out
+    must finish within `budget_seconds`; pages still loading then are dropped.
+    Extracted page text is cached by canonical URL.
+    """
+
+    def __init__(
+        self,
+        http: SharedHTTPClient = shared_http,
+        max_bytes: int = int(os.getenv("RESEARCH_FETCH_MAX_BYTES", 512_000)),
+        timeout: float = float(os.getenv("RESEARCH_FETCH_TIMEOUT", 5)),
+        budget_seconds: float = float(os.getenv("RESEARCH_FETCH_BUDGET", 8)),
+        concurrency: int = int(os.getenv("RESEARCH_FETCH_CONCURRENCY", 4)),
+        chunk_words: int = int(os.getenv("RESEARCH_FETCH_CHUNK_WORDS", 120)),
+        chunks_per_page: int = int(os.getenv("RESEARCH_FETCH_CHUNKS_PER_PAGE", 3)),
+        cache_ttl_seconds: float = float(os.getenv("RESEARCH_PAGE_CACHE_TTL_SECONDS", 3600)),
+        cache_max_entries: int = int(os.getenv("RESEARCH_PAGE_CACHE_MAX_ENTRIES", 256)),
+    ) -> None:
+        self.http = http
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.budget_seconds = budget_seconds
+        self.concurrency = max(1, concurrency)
+        self.chunk_words = chunk_words
+        self.chunks_per_page = chunks_per_page
+        self.cache = AnswerCache(MemoryBackend(cache_max_entries), ttl_seconds=cache_ttl_seconds)
+
+    async def _download(self, url: str) -> str:
+        """Stream one page into the extractor and return its title and text blocks as JSON."""
+        extractor = TextExtractor()
+        received = 0
+        target = httpx.URL(url)
+        with tracer.start_as_current_span(
+            "GET",
+            kind=SpanKind.CLIENT,
+            attributes={"http.request.method": "GET", "url.full": str(target.copy_with(query=None)), "server.address": target.host},
+        ) as span:
+            async with self.http.client.stream("GET", url, follow_redirects=True, timeout=self.timeout) as response:
+                span.set_attribute("http.response.status_code", response.status_code)
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "text/html")
+                if "html" not in content_type and not content_type.startswith("text/"):
+                    raise ValueError(f"unsupported content type {content_type!r}")
+                decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+                async for data in response.aiter_bytes():
+                    data = data[: self.max_bytes - received]
+                    received += len(data)
+                    extractor.feed(decoder.decode(data))
+                    if received >= self.max_bytes:
+                        # Enough to find the main content; stop downloading the rest
+                        break
+                extractor.feed(decoder.decode(b"", final=True))
+            span.set_attribute("http.response.body.size", received)
+        extractor.close()
+        return json.dumps({"title": " ".join(extractor.title.split()), "blocks": extractor.blocks()})
+
+    async def fetch(self, url: str, query: str) -> FetchedPage:
+        started = time.perf_counter()
+        key = hashlib.sha256(canonical_url(url).encode()).hexdigest()
+        downloaded = False
+
+        async def download() -> str:
+            nonlocal downloaded
+            downloaded = True
+            # Total deadline per page; httpx's own timeout only bounds each read
+            return await asyncio.wait_for(self._download(url), self.timeout)
+
+        try:
+            page = json.loads(await self.cache.get_or_compute(key, download))
+        except Exception as e:
+            # One unreadable page (bad link, HTTP error, timeout, odd charset) must not fail the whole search
+            return FetchedPage(url, error=str(e) or type(e).__name__, seconds=time.perf_counter() - started)
+
+        chunks = split_chunks(page["blocks"], self.chunk_words)
+        return FetchedPage(
+            url,
+            title=page["title"],
+            excerpts=relevant_chunks(chunks, query, self.chunks_per_page),
+            cached=not downloaded,
+            seconds=time.perf_counter() - started,
+        )
+
+    async def fetch_many(self, urls: list[str], query: str) -> list[FetchedPage]:
+        """
+        Fetch pages concurrently; pages not finished within the budget come back with an
+        error so the caller can tell which results were not read.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(url: str) -> FetchedPage:
+            async with semaphore:
+                return await self.fetch(url, query)
+
+        tasks = [asyncio.ensure_future(fetch(url)) for url in urls]
+        if not tasks:
+            return []
+        done, pending = await asyncio.wait(tasks, timeout=self.budget_seconds)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.info("Stopped %d page fetch(es) at the %.1f s budget", len(pending), self.budget_seconds)
+        return [
+            task.result() if task in done else FetchedPage(url, error="fetch budget exceeded", seconds=self.budget_seconds)
+            for url, task in zip(urls, tasks)
+        ]
+
+    async def enrich(self, result: dict, query: str, top_n: int) -> list[FetchedPage]:
+        """Add the relevant excerpts of the top `top_n` organic results' pages to a search result in place."""
+        items = [item for item in result.get("organic", []) if item.get("link")][:top_n]
+        pages = await self.fetch_many([item["link"] for item in items], query)
+        for item, page in zip(items, pages):
+            if page.excerpts:
+                item["page_excerpts"] = page.excerpts
+        return pages
@@ -1,6 +1,9 @@
+import asyncio
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from typing import Annotated, Any
-import httpx
 from textwrap import dedent
 from pydantic import BaseModel, Field
 
@@ -25,10 +28,28 @@ from agentstack_sdk.a2a.extensions import (
     LLMServiceExtensionServer, LLMServiceExtensionSpec
 )
 from agentstack_sdk.server import Server
+from .http_client import SharedHTTPClient, shared_http
+from .page_fetcher import FetchedPage, PageFetcher
+from .search_batch import merge_results, unique_queries
+from .search_cache import SearchCache, SearchOutcome
 from .streaming_citation_parser import StreamingCitationParser
+from .tracing import configure_tracing, trace_run, traced_agent, tracer, within_run
 
-# Create an instance of the Agent Stack Server
+# Overridable so the agent can be pointed at a local stub server
+SERPER_SEARCH_URL = os.getenv("SERPER_SEARCH_URL", "https://google.serper.dev/search")
+SEARCH_RESULT_COUNT = 8
+# Searches a batch may contain, and how many of them run at once
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("RESEARCH_SEARCH_BATCH_MAX_QUERIES", 5))
+SEARCH_CONCURRENCY = int(os.getenv("RESEARCH_SEARCH_CONCURRENCY", 4))
+# Top results whose pages are read for excerpts after each search; off by default (snippets only)
+FETCH_PAGES = int(os.getenv("RESEARCH_FETCH_PAGES", 0))
+
+logger = logging.getLogger(__name__)
+
+# Create an instance of the Agent Stack Server and the search cache shared by every request
 server = Server()
+search_cache = SearchCache.from_env()
+page_fetcher = PageFetcher()
 
 # Create the input schema for the google search tool the agent will use
 class GoogleSearchToolInput(BaseModel):
@@ -40,24 +61,128 @@ class GoogleSearchTool(Tool[GoogleSearchToolInput, ToolRunOptions, JSONToolOutpu
     description = "Search Google using Serper API for current information"
     input_schema = GoogleSearchToolInput
     
-    def __init__(self, api_key: str, options: dict[str, Any] | None = None):
+    def __init__(
+        self,
+        api_key: str,
+        options: dict[str, Any] | None = None,
+        http: SharedHTTPClient = shared_http,
+        cache: SearchCache | None = search_cache,
+        pages: PageFetcher | None = page_fetcher,
+        fetch_pages: int = FETCH_PAGES,
+    ):
         self.api_key = api_key
+        # Pooled keep-alive client shared across searches instead of a new connection per call
+        self.http = http
+        # Results for equivalent queries are reused; every search this tool ran is kept for the trajectory
+        self.search_cache = cache
+        self.outcomes: list[SearchOutcome] = []
+        # Excerpts from the top result pages give the agent more than snippets to answer from
+        self.pages = pages
+        self.fetch_pages = fetch_pages
+        self.fetched_pages: list[FetchedPage] = []
         super().__init__(options)
     
     def _create_emitter(self) -> Emitter:
         return Emitter.root().child(namespace=["tool", "serper"], creator=self)
     
-    async def _run(self, input: GoogleSearchToolInput, options: ToolRunOptions | None, context: BeeRunContext) -> JSONToolOutput:
-        # Call Serper's search API and return JSON results to the agent
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                "https://google.serper.dev/search",
+    async def search(self, query: str) -> SearchOutcome:
+        with tracer.start_as_current_span("search", attributes={"payload.query_chars": len(query)}) as span:
+            outcome = await self._search(query)
+            span.set_attributes({
+                "search.cache_hit": outcome.hit,
+                "search.result_count": len(outcome.result.get("organic", [])),
+            })
+            return outcome
+
+    async def _search(self, query: str) -> SearchOutcome:
+        async def fetch() -> dict:
+            # Call Serper's search API and return JSON results to the agent
+            response = await self.http.post(
+                SERPER_SEARCH_URL,
                 headers={"X-API-KEY": self.api_key, "Content-Type": "application/json"},
-                json={"q": input.query, "num": 8},
-                timeout=15.0
+                json={"q": query, "num": SEARCH_RESULT_COUNT},
             )
             response.raise_for_status()
-            return JSONToolOutput(response.json())
+            return response.json()
+
+        if self.search_cache:
+            outcome = await self.search_cache.search(query, SEARCH_RESULT_COUNT, fetch)
+        else:
+            started = time.perf_counter()
+            result = await fetch()
+            outcome = SearchOutcome(query, result, hit=False, seconds=time.perf_counter() - started)
+        self.outcomes.append(outcome)
+        return outcome
+
+    async def read_pages(self, result: dict, query: str) -> dict:
+        """Add excerpts of the top result pages to a search result, when page fetching is enabled."""
+        if self.pages and self.fetch_pages > 0:
+            with tracer.start_as_current_span("read_pages") as span:
+                pages = await self.pages.enrich(result, query, self.fetch_pages)
+                span.set_attributes({
+                    "pages.fetched": len(pages),
+                    "pages.read": sum(1 for page in pages if page.excerpts),
+                    "pages.cached": sum(1 for page in pages if page.cached),
+                })
+            self.fetched_pages.extend(pages)
+        return result
+
+    async def _run(self, input: GoogleSearchToolInput, options: ToolRunOptions | None, context: BeeRunContext) -> JSONToolOutput:
+        # Search, HTTP and page fetch spans nest under this tool's span
+        with within_run(context):
+            outcome = await self.search(input.query)
+            return JSONToolOutput(await self.read_pages(outcome.result, input.query))
+
+# Create the input schema for the batched search tool
+class GoogleSearchBatchToolInput(BaseModel):
+    queries: list[str] = Field(
+        description="Different search queries covering separate aspects of the question",
+        min_length=1,
+        max_length=SEARCH_BATCH_MAX_QUERIES,
+    )
+
+# Create the batched search tool, which runs several searches concurrently in one agent step
+class GoogleSearchBatchTool(Tool[GoogleSearchBatchToolInput, ToolRunOptions, JSONToolOutput]):
+    name = "google_search_batch"
+    description = (
+        f"Run up to {SEARCH_BATCH_MAX_QUERIES} Google searches at once and get one merged, de-duplicated "
+        "result list. Prefer this over several google_search calls when a question has several aspects."
+    )
+    input_schema = GoogleSearchBatchToolInput
+
+    def __init__(self, search_tool: GoogleSearchTool, concurrency: int = SEARCH_CONCURRENCY, options: dict[str, Any] | None = None):
+        # Searches go through the single-search tool so they share its cache, HTTP client and outcome log
+        self.search_tool = search_tool
+        self.concurrency = max(1, concurrency)
+        super().__init__(options)
+
+    def _create_emitter(self) -> Emitter:
+        return Emitter.root().child(namespace=["tool", "serper", "batch"], creator=self)
+
+    async def _run(self, input: GoogleSearchBatchToolInput, options: ToolRunOptions | None, context: BeeRunContext) -> JSONToolOutput:
+        with within_run(context):
+            return await self._search_batch(input.queries)
+
+    async def _search_batch(self, queries: list[str]) -> JSONToolOutput:
+        queries = unique_queries(queries)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def search(query: str) -> SearchOutcome:
+            async with semaphore:
+                return await self.search_tool.search(query)
+
+        outcomes = await asyncio.gather(*(search(query) for query in queries), return_exceptions=True)
+        succeeded = [(query, outcome.result) for query, outcome in zip(queries, outcomes) if isinstance(outcome, SearchOutcome)]
+        failed = [(query, outcome) for query, outcome in zip(queries, outcomes) if isinstance(outcome, BaseException)]
+        if not succeeded:
+            # Nothing to merge; surface the first failure like a single search would
+            raise failed[0][1]
+
+        merged = merge_results(succeeded)
+        if failed:
+            logger.warning("%d of %d batched searches failed: %s", len(failed), len(queries), failed)
+            merged["failed_queries"] = [{"query": query, "error": str(error)} for query, error in failed]
+        return JSONToolOutput(await self.search_tool.read_pages(merged, " ".join(query for query, _ in succeeded)))
 
 # Add a name to the agent server so it can be discoverable on Agent Stack by name and called via handoff tool by the healthcare agent
 @server.agent(
@@ -78,6 +203,10 @@ class GoogleSearchTool(Tool[GoogleSearchToolInput, ToolRunOptions, JSONToolOutpu
             AgentDetailTool(
                 name="Google Search", 
                 description="Intelligent web search powered by Google via Serper API. Automatically extracts optimal search terms from conversational queries."
+            ),
+            AgentDetailTool(
+                name="Google Search Batch",
+                description="Runs several Google searches concurrently and merges their results, dropping pages found more than once."
             )
         ],
         framework="BeeAI Framework",
@@ -96,6 +225,7 @@ class GoogleSearchTool(Tool[GoogleSearchToolInput, ToolRunOptions, JSONToolOutpu
         )
     ],
 )
+@traced_agent("ResearchAgent")
 async def google_search_agent(
     input: Message,
     context: RunContext,
@@ -150,14 +280,18 @@ async def google_search_agent(
         llm_client.set_context(llm)
         
         # Build a RequirementAgent wired with the Google search tool
+        search_tool = GoogleSearchTool(api_key)
         agent = RequirementAgent(
             llm=llm_client,
-            tools=[GoogleSearchTool(api_key)],
-            instructions="You are a healthcare research agent tasked with providing information about health conditions. Use the google_search tool to find information on the web about options, symptoms, treatments, and procedures. Cite your sources in your responses. Output all of the information you find.",
+            tools=[search_tool, GoogleSearchBatchTool(search_tool)],
+            instructions="You are a healthcare research agent tasked with providing information about health conditions. Use the google_search_batch tool to search the web for options, symptoms, treatments, and procedures in one step, with one query per aspect of the question; use google_search for a single follow-up search. When top results include page_excerpts taken from the page itself, rely on them over the short snippets. Cite your sources in your responses. Output all of the information you find.",
         )
         
         search_results = None
         search_count = 0
+        # Outcomes and pages already shown in the trajectory; a batched step adds several at once
+        reported_outcomes = 0
+        reported_pages = 0
         response_text = ""
         citation_parser = StreamingCitationParser()
         
@@ -168,7 +302,7 @@ async def google_search_agent(
                 response_text += data.delta
         
         # Run the agent loop, streaming both content and citations
-        async for event, meta in agent.run(user_query).on("final_answer", handle_final_answer_stream):
+        async for event, meta in trace_run(agent.run(user_query)).on("final_answer", handle_final_answer_stream):
             if meta.name == "final_answer":
                 if isinstance(event, RequirementAgentFinalAnswerEvent) and event.delta:
                     clean_text, new_citations = citation_parser.process_chunk(event.delta)
@@ -181,23 +315,39 @@ async def google_search_agent(
             if meta.name == "success" and event.state.steps:
                 step = event.state.steps[-1]
                 
-                if step.tool and step.tool.name == "serper_search":
+                if step.tool and step.tool.name in (GoogleSearchTool.name, GoogleSearchBatchTool.name):
                     search_count += 1
-                    search_query = step.input.get("query", "Unknown")
+                    search_queries = step.input.get("queries") or [step.input.get("query", "Unknown")]
                     
                     # Surface search queries and result counts to the trajectory UI
                     yield trajectory.trajectory_metadata(
                         title=f"Search #{search_count}", 
-                        content=f"Query: '{search_query}'"
+                        content="Query: " + ", ".join(f"'{query}'" for query in search_queries)
                     )
                     
                     search_results = step.output.result
                     
                     if search_results:
                         num_results = len(search_results.get('organic', []))
+                        outcomes = search_tool.outcomes[reported_outcomes:]
+                        reported_outcomes = len(search_tool.outcomes)
+                        sources = []
+                        for outcome in outcomes:
+                            if outcome.hit:
+                                sources.append(f"from cache in {outcome.seconds * 1000:.0f} ms, saved {outcome.saved_seconds * 1000:.0f} ms")
+                            else:
+                                sources.append(f"live search in {outcome.seconds * 1000:.0f} ms")
+                        source = f" ({'; '.join(sources)})" if sources else ""
+                        pages = search_tool.fetched_pages[reported_pages:]
+                        reported_pages = len(search_tool.fetched_pages)
+                        if pages:
+                            read = sum(1 for page in pages if page.excerpts)
+                            cached = sum(1 for page in pages if page.cached)
+                            slowest = max(page.seconds for page in pages)
+                            source += f". Read {read}/{len(pages)} top pages in {slowest * 1000:.0f} ms ({cached} cached)"
                         yield trajectory.trajectory_metadata(
                             title=f"Results #{search_count}", 
-                            content=f"Found {num_results} results"
+                            content=f"Found {num_results} results{source}"
                         )
         
         if final_text := citation_parser.finalize():
@@ -208,6 +358,18 @@ async def google_search_agent(
                 title="Complete", 
                 content=f"Performed {search_count} search(es) with {len(citation_parser.citations)} citation(s)"
             )
+
+        if search_cache and search_tool.outcomes:
+            hits = sum(1 for outcome in search_tool.outcomes if outcome.hit)
+            saved = sum(outcome.saved_seconds for outcome in search_tool.outcomes)
+            stats = search_cache.stats
+            yield trajectory.trajectory_metadata(
+                title="Search Cache",
+                content=(
+                    f"{hits}/{len(search_tool.outcomes)} search(es) served from cache, saving {saved * 1000:.0f} ms. "
+                    f"Overall hit rate {stats.hit_rate:.0%}, {stats.saved_seconds:.1f} s saved."
+                ),
+            )
         
         response_message = AgentMessage(
             text=response_text,
@@ -222,12 +384,22 @@ async def google_search_agent(
         yield error_msg
         await context.store(AgentMessage(text=error_msg))
 
+@asynccontextmanager
+async def lifespan(app):
+    # Close the pooled HTTP connections (also used for page fetches) when the server shuts down
+    try:
+        yield
+    finally:
+        await shared_http.aclose()
+
 # Run the server
 def run():
+    configure_tracing("ResearchAgent")
     server.run(
         host = os.environ.get("HOST", "127.0.0.1"),
         port = int(os.environ.get("PORT", 8000)),
-        context_store=PlatformContextStore()
+        context_store=PlatformContextStore(),
+        lifespan_fn=lifespan,
     )
 
 
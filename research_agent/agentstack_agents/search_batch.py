@@ -0,0 +1,73 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from .search_cache import normalize_search_query
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = frozenset({"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"})
+
+
+def canonical_url(url: str) -> str:
+    """
+    Form of a URL used to spot the same page returned by different searches: scheme and
+    host lowercased, "www." and default ports dropped, tracking parameters and fragments
+    removed, remaining parameters sorted and trailing slashes ignored.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme, host, path, urlencode(query), ""))
+
+
+def unique_queries(queries: list[str]) -> list[str]:
+    """Drop queries that normalize to one already in the list, keeping the first wording."""
+    seen: set[str] = set()
+    unique = []
+    for query in queries:
+        key = normalize_search_query(query)
+        if query.strip() and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+
+def merge_results(results: list[tuple[str, dict]]) -> dict:
+    """
+    One result set from several Serper responses. Organic results are interleaved by rank
+    (every query's first hit, then every second hit, ...) and a page found by several
+    queries appears once, listing all the queries that found it.
+    """
+    organic: list[dict] = []
+    by_url: dict[str, dict] = {}
+    ranked = [(query, result.get("organic", [])) for query, result in results]
+    for rank in range(max((len(items) for _, items in ranked), default=0)):
+        for query, items in ranked:
+            if rank >= len(items):
+                continue
+            item = items[rank]
+            key = canonical_url(item.get("link", "")) if item.get("link") else None
+            if key and key in by_url:
+                by_url[key]["queries"].append(query)
+                continue
+            merged = {**item, "position": len(organic) + 1, "queries": [query]}
+            organic.append(merged)
+            if key:
+                by_url[key] = merged
+
+    merged_result: dict = {"queries": [query for query, _ in results], "organic": organic}
+    # Keep each query's direct answer, if Serper returned one
+    answers = [
+        {"query": query, **result[field]}
+        for query, result in results
+        for field in ("answerBox", "knowledgeGraph")
+        if isinstance(result.get(field), dict)
+    ]
+    if answers:
+        merged_result["answers"] = answers
+    return merged_result
@@ -0,0 +1,105 @@
+import json
+import re
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .answer_cache import AnswerCache
+
+# Words that say little about which passage of a page is relevant to a health query
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or should the to what "
+    "when where which who why will with you your about".split()
+)
+
+
+def _words(text: str) -> list[str]:
+    # Fold simple plurals ("symptoms" -> "symptom") but leave short words alone
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in re.findall(r"[a-z0-9]+", text.lower())
+    ]
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    Case-, punctuation- and plural-insensitive form of a search query, so "Shingles symptoms?"
+    and "shingles symptom" share a cache entry. Question words and word order are kept:
+    "why does shingles hurt" and "when does shingles hurt" are different searches.
+    """
+    return " ".join(_words(query))
+
+
+def search_terms(text: str) -> set[str]:
+    """Content words of `text`, for matching a query against page passages."""
+    words = _words(text)
+    return {word for word in words if word not in STOP_WORDS} or set(words)
+
+
+@dataclass
+class SearchStats:
+    hits: int = 0
+    misses: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class SearchOutcome:
+    """One search as seen by the caller: the results and whether the cache served them."""
+
+    query: str
+    result: dict
+    hit: bool
+    seconds: float
+    saved_seconds: float = 0.0
+
+
+@dataclass
+class SearchCache:
+    """
+    Search results cached by normalized query and result count. Each entry remembers
+    how long the original search took, so hits can report the latency they saved.
+    """
+
+    cache: AnswerCache
+    stats: SearchStats = field(default_factory=SearchStats)
+
+    @classmethod
+    def from_env(cls) -> "SearchCache | None":
+        """SEARCH_CACHE_BACKEND (memory, sqlite or off), SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_PATH."""
+        cache = AnswerCache.from_env(
+            Path.home() / ".cache" / "research_agent" / "search.sqlite",
+            prefix="SEARCH_CACHE",
+            default_ttl_seconds=6 * 3600,
+        )
+        return cls(cache) if cache else None
+
+    async def search(self, query: str, num: int, fetch: Callable[[], Awaitable[dict]]) -> SearchOutcome:
+        key = AnswerCache.make_key(normalize_search_query(query), "serper", f"num={num}")
+        started = time.perf_counter()
+        fetched = False
+
+        async def compute() -> str:
+            nonlocal fetched
+            fetched = True
+            fetch_started = time.perf_counter()
+            result = await fetch()
+            return json.dumps({"seconds": time.perf_counter() - fetch_started, "result": result})
+
+        # Identical searches already in flight share the one upstream call
+        entry = json.loads(await self.cache.get_or_compute(key, compute))
+        elapsed = time.perf_counter() - started
+
+        if fetched:
+            self.stats.misses += 1
+            return SearchOutcome(query, entry["result"], hit=False, seconds=elapsed)
+        saved = max(0.0, entry["seconds"] - elapsed)
+        self.stats.hits += 1
+        self.stats.saved_seconds += saved
+        return SearchOutcome(query, entry["result"], hit=True, seconds=elapsed, saved_seconds=saved)
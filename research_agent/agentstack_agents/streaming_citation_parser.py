@@ -1,3 +1,4 @@
+import re
 from enum import Enum
 from agentstack_sdk.a2a.extensions.ui.citation import Citation
 
@@ -10,22 +11,27 @@ class State(Enum):
     DONE = "done"
 
 
+# Characters that change the state while inside link text or a link location
+LINK_TEXT_STOP = re.compile(r"[\[\]\n]")
+LINK_LOCATION_STOP = re.compile(r"[)\n]")
+
+
 class StreamingCitationParser:
     """
     State machine parser that extracts markdown citations while streaming.
 
     Streams clean text immediately and extracts citation metadata when complete
     links are detected.
+
+    Every character is examined once: plain text is found with `str.find` and link
+    parts with precompiled regexes, and the pieces of a link still being parsed are
+    kept in lists instead of a re-sliced buffer. Work is therefore linear in the
+    length of the stream however it is chunked, and every link completed in a
+    chunk is emitted with that chunk.
     """
 
     def __init__(self):
-        self.buffer = ""
-        self.state = State.INITIAL
-        self.maybe_link_start = 0
-        self.link_text = ""
-        self.link_url = ""
-        self.citations = []
-        self.clean_position = 0  # Position in the clean (output) text
+        self.reset()
 
     def process_chunk(self, chunk: str) -> tuple[str, list[Citation]]:
         """
@@ -34,146 +40,121 @@ class StreamingCitationParser:
         Returns:
             Tuple of (clean_text_to_stream, new_citations)
         """
-        self.buffer += chunk
-        output = ""
+        output: list[str] = []
         new_citations = []
+        i = 0
+        end = len(chunk)
 
-        i = self.maybe_link_start
-
-        while i < len(self.buffer):
-            char = self.buffer[i]
-
+        while i < end:
             if self.state == State.INITIAL:
-                if char == "[":
-                    # Found potential link start
-                    # Stream everything before this point
-                    output += self.buffer[self.maybe_link_start : i]
-                    self.maybe_link_start = i
-                    self.link_text = ""
-                    self.link_url = ""
-                    self.state = State.LINK_TEXT
-                    i += 1
-                else:
-                    i += 1
+                start = chunk.find("[", i)
+                if start < 0:
+                    self._emit(output, chunk[i:])
+                    break
+                # Stream everything before the potential link
+                self._emit(output, chunk[i:start])
+                self._start_link()
+                i = start + 1
 
             elif self.state == State.LINK_TEXT:
+                match = LINK_TEXT_STOP.search(chunk, i)
+                stop = match.start() if match else end
+                self._raw.append(chunk[i:stop])
+                self._text.append(chunk[i:stop])
+                if not match:
+                    break
+                char = chunk[stop]
                 if char == "]":
+                    self._raw.append(char)
                     self.state = State.LINK_MIDDLE
-                    i += 1
-                elif char == "\n":
-                    # Newline breaks the link, back to initial
-                    self.state = State.INITIAL
-                    self.maybe_link_start = i
+                    i = stop + 1
                 elif char == "[":
-                    # Nested bracket, restart
-                    output += self.buffer[self.maybe_link_start : i]
-                    self.maybe_link_start = i
-                    self.link_text = ""
-                    i += 1
+                    # Nested bracket: the text so far is plain text, restart the link here
+                    self._emit(output, "".join(self._raw))
+                    self._start_link()
+                    i = stop + 1
                 else:
-                    self.link_text += char
-                    i += 1
+                    # Newline breaks the link, the newline itself is plain text
+                    self._drop_link()
+                    i = stop
 
             elif self.state == State.LINK_MIDDLE:
-                if char == "(":
+                if chunk[i] == "(":
+                    self._raw.append("(")
                     self.state = State.LINK_LOCATION
                     i += 1
                 else:
-                    # Not a link after all, back to initial
-                    self.state = State.INITIAL
-                    self.maybe_link_start = i
+                    # Not a link after all, reprocess this character as plain text
+                    self._drop_link()
 
             elif self.state == State.LINK_LOCATION:
-                if char == ")":
-                    # Complete link found!
-                    self.state = State.DONE
-                    i += 1
-                    break  # Process the complete link
-                elif char == "\n":
-                    # Newline breaks the link
-                    self.state = State.INITIAL
-                    self.maybe_link_start = i
+                match = LINK_LOCATION_STOP.search(chunk, i)
+                stop = match.start() if match else end
+                self._raw.append(chunk[i:stop])
+                self._url.append(chunk[i:stop])
+                if not match:
+                    break
+                if chunk[stop] == ")":
+                    # Complete link found
+                    new_citations.append(self._complete_link(output))
+                    i = stop + 1
                 else:
-                    self.link_url += char
-                    i += 1
+                    # Newline breaks the link
+                    self._drop_link()
+                    i = stop
 
-        # Handle DONE state - we found a complete link
-        if self.state == State.DONE:
-            # Calculate citation position BEFORE adding link text to output
-            citation_start = self.clean_position + len(output)
-            citation_end = citation_start + len(self.link_text)
-            
-            # Stream the link text only (not the markdown syntax)
-            output += self.link_text
-
-            new_citations.append(
-                Citation(
-                    url=self.link_url,
-                    title=self.link_url.split("/")[-1].replace("-", " ").title() or self.link_text[:50],
-                    description=self.link_text[:100] + ("..." if len(self.link_text) > 100 else ""),
-                    start_index=citation_start,
-                    end_index=citation_end,
-                )
-            )
-
-            self.citations.extend(new_citations)
-
-            # Drop the processed markdown link from buffer
-            self.buffer = self.buffer[i:]
-
-            # Reset for next link
-            self.state = State.INITIAL
-            self.maybe_link_start = 0
-            self.link_text = ""
-            self.link_url = ""
-        else:
-            # Keep unprocessed part in buffer
-            # Only output up to maybe_link_start if we're in middle of parsing
-            if self.state == State.INITIAL:
-                # Can safely output everything processed
-                if i > self.maybe_link_start:
-                    output += self.buffer[self.maybe_link_start : i]
-                    self.buffer = self.buffer[i:]
-                    self.maybe_link_start = 0
-            else:
-                # In middle of parsing a potential link
-                # Keep buffer from maybe_link_start onwards
-                self.buffer = self.buffer[self.maybe_link_start :]
-                self.maybe_link_start = 0
-
-        # Update clean position
-        self.clean_position += len(output)
-
-        return output, new_citations
+        self.citations.extend(new_citations)
+        return "".join(output), new_citations
+
+    def _emit(self, output: list[str], text: str) -> None:
+        output.append(text)
+        self.clean_position += len(text)
+
+    def _start_link(self) -> None:
+        self.state = State.LINK_TEXT
+        self._raw = ["["]
+        self._text = []
+        self._url = []
+
+    def _drop_link(self) -> None:
+        self.state = State.INITIAL
+        self._raw = []
+        self._text = []
+        self._url = []
+
+    def _complete_link(self, output: list[str]) -> Citation:
+        link_text = "".join(self._text)
+        link_url = "".join(self._url)
+        citation_start = self.clean_position
+
+        # Stream the link text only (not the markdown syntax)
+        self._emit(output, link_text)
+        self._drop_link()
+
+        return Citation(
+            url=link_url,
+            title=link_url.split("/")[-1].replace("-", " ").title() or link_text[:50],
+            description=link_text[:100] + ("..." if len(link_text) > 100 else ""),
+            start_index=citation_start,
+            end_index=citation_start + len(link_text),
+        )
 
     def finalize(self) -> str:
         """
         Process any remaining buffer content.
 
         Returns:
-            Tuple of (remaining_clean_text, all_citations)
+            The markdown of an unfinished link, streamed as regular text
         """
-        output = ""
-
-        # If we're in middle of parsing, treat it as regular text
-        if self.state != State.INITIAL and self.buffer:
-            output = self.buffer
-            self.buffer = ""
-        elif self.state == State.INITIAL and self.buffer:
-            output = self.buffer[self.maybe_link_start :]
-            self.buffer = ""
-
-        self.state = State.INITIAL
-        self.maybe_link_start = 0
-
+        output = "".join(self._raw) if self.state != State.INITIAL else ""
+        self._drop_link()
         return output
 
     def reset(self):
         """Reset parser state for reuse."""
-        self.buffer = ""
         self.state = State.INITIAL
-        self.maybe_link_start = 0
-        self.link_text = ""
-        self.link_url = ""
+        self._raw: list[str] = []  # Markdown of the link being parsed, as received
+        self._text: list[str] = []
+        self._url: list[str] = []
         self.citations = []
-        self.clean_position = 0
\ No newline at end of file
+        self.clean_position = 0  # Position in the clean (output) text
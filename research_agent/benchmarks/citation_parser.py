@@ -0,0 +1,211 @@
+"""
+Benchmark for StreamingCitationParser against the previous implementation, kept below
+as LegacyCitationParser. Run from the research_agent directory:
+
+    uv run python benchmarks/citation_parser.py [--repeat 3]
+
+It times both parsers on long, citation-dense answers delivered as realistic
+token-sized deltas and as one-character deltas. The property-based test in
+tests/test_streaming_citation_parser.py checks that both parsers produce the same
+text and citations.
+"""
+
+import argparse
+import sys
+import time
+from enum import Enum
+
+from agentstack_sdk.a2a.extensions.ui.citation import Citation
+
+from agentstack_agents.streaming_citation_parser import StreamingCitationParser
+
+
+class LegacyState(Enum):
+    INITIAL = "initial"
+    LINK_TEXT = "link_text"
+    LINK_MIDDLE = "link_middle"
+    LINK_LOCATION = "link_location"
+    DONE = "done"
+
+
+class LegacyCitationParser:
+    """The parser as it was before the linear-time rewrite, unchanged apart from naming."""
+
+    def __init__(self):
+        self.buffer = ""
+        self.state = LegacyState.INITIAL
+        self.maybe_link_start = 0
+        self.link_text = ""
+        self.link_url = ""
+        self.citations = []
+        self.clean_position = 0
+
+    def process_chunk(self, chunk: str) -> tuple[str, list[Citation]]:
+        self.buffer += chunk
+        output = ""
+        new_citations = []
+
+        i = self.maybe_link_start
+
+        while i < len(self.buffer):
+            char = self.buffer[i]
+
+            if self.state == LegacyState.INITIAL:
+                if char == "[":
+                    output += self.buffer[self.maybe_link_start : i]
+                    self.maybe_link_start = i
+                    self.link_text = ""
+                    self.link_url = ""
+                    self.state = LegacyState.LINK_TEXT
+                    i += 1
+                else:
+                    i += 1
+
+            elif self.state == LegacyState.LINK_TEXT:
+                if char == "]":
+                    self.state = LegacyState.LINK_MIDDLE
+                    i += 1
+                elif char == "\n":
+                    self.state = LegacyState.INITIAL
+                    self.maybe_link_start = i
+                elif char == "[":
+                    output += self.buffer[self.maybe_link_start : i]
+                    self.maybe_link_start = i
+                    self.link_text = ""
+                    i += 1
+                else:
+                    self.link_text += char
+                    i += 1
+
+            elif self.state == LegacyState.LINK_MIDDLE:
+                if char == "(":
+                    self.state = LegacyState.LINK_LOCATION
+                    i += 1
+                else:
+                    self.state = LegacyState.INITIAL
+                    self.maybe_link_start = i
+
+            elif self.state == LegacyState.LINK_LOCATION:
+                if char == ")":
+                    self.state = LegacyState.DONE
+                    i += 1
+                    break
+                elif char == "\n":
+                    self.state = LegacyState.INITIAL
+                    self.maybe_link_start = i
+                else:
+                    self.link_url += char
+                    i += 1
+
+        if self.state == LegacyState.DONE:
+            citation_start = self.clean_position + len(output)
+            citation_end = citation_start + len(self.link_text)
+            output += self.link_text
+            new_citations.append(
+                Citation(
+                    url=self.link_url,
+                    title=self.link_url.split("/")[-1].replace("-", " ").title() or self.link_text[:50],
+                    description=self.link_text[:100] + ("..." if len(self.link_text) > 100 else ""),
+                    start_index=citation_start,
+                    end_index=citation_end,
+                )
+            )
+            self.citations.extend(new_citations)
+            self.buffer = self.buffer[i:]
+            self.state = LegacyState.INITIAL
+            self.maybe_link_start = 0
+            self.link_text = ""
+            self.link_url = ""
+        else:
+            if self.state == LegacyState.INITIAL:
+                if i > self.maybe_link_start:
+                    output += self.buffer[self.maybe_link_start : i]
+                    self.buffer = self.buffer[i:]
+                    self.maybe_link_start = 0
+            else:
+                self.buffer = self.buffer[self.maybe_link_start :]
+                self.maybe_link_start = 0
+
+        self.clean_position += len(output)
+        return output, new_citations
+
+    def finalize(self) -> str:
+        output = ""
+        if self.state != LegacyState.INITIAL and self.buffer:
+            output = self.buffer
+            self.buffer = ""
+        elif self.state == LegacyState.INITIAL and self.buffer:
+            output = self.buffer[self.maybe_link_start :]
+            self.buffer = ""
+        self.state = LegacyState.INITIAL
+        self.maybe_link_start = 0
+        return output
+
+
+def run_parser(parser_class, chunks: list[str]) -> tuple[str, list[Citation]]:
+    """
+    Stream chunks through a parser. After a chunk that completed a link, empty chunks
+    are fed until no further link completes, which the legacy parser needs to parse
+    the rest of that chunk; for the current parser this costs one no-op call.
+    """
+    parser = parser_class()
+    pieces = []
+    for chunk in chunks:
+        output, citations = parser.process_chunk(chunk)
+        pieces.append(output)
+        while citations:
+            output, citations = parser.process_chunk("")
+            pieces.append(output)
+    pieces.append(parser.finalize())
+    return "".join(pieces), parser.citations
+
+
+def dense_answer(paragraphs: int) -> str:
+    """A long answer in the style the research agent produces, with a citation in most sentences."""
+    sentence = (
+        "Type 2 diabetes is managed with diet, exercise and medication "
+        "[according to the CDC](https://www.cdc.gov/diabetes/managing/index-{n}.html), "
+        "and [Mayo Clinic notes](https://www.mayoclinic.org/diseases-conditions/type-2-diabetes/{n}) "
+        "that regular monitoring matters.\n"
+    )
+    return "".join(sentence.format(n=n) for n in range(paragraphs))
+
+
+def split_tokens(text: str, size: int) -> list[str]:
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+def time_parser(parser_class, chunks: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_parser(parser_class, chunks)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark(repeat: int) -> None:
+    scenarios = [
+        ("2k citations, 4-char deltas", split_tokens(dense_answer(1000), 4)),
+        ("2k citations, 1-char deltas", split_tokens(dense_answer(1000), 1)),
+        ("200 citations, one chunk", [dense_answer(100)]),
+        ("10k citations, 16-char deltas", split_tokens(dense_answer(5000), 16)),
+    ]
+    print(f"{'scenario':32} {'chars':>9} {'legacy ms':>10} {'new ms':>10} {'speedup':>8}")
+    for name, chunks in scenarios:
+        legacy = time_parser(LegacyCitationParser, chunks, repeat)
+        new = time_parser(StreamingCitationParser, chunks, repeat)
+        chars = sum(map(len, chunks))
+        print(f"{name:32} {chars:>9} {legacy * 1000:>10.1f} {new * 1000:>10.1f} {legacy / new:>7.1f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per scenario (best is reported)")
+    args = parser.parse_args()
+    benchmark(args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
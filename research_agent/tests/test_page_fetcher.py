@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agentstack_agents.http_client import SharedHTTPClient
+from agentstack_agents.page_fetcher import PageFetcher
+
+# The early paragraph fits in the first few KB; the late one only comes after ~200 KB of filler
+EARLY = "<p>Early paragraph about migraine triggers and treatment.</p>"
+FILLER = "<p>" + "filler text " * 50 + "</p>"
+LATE = "<p>Late paragraph about migraine aura and prevention.</p>"
+ARTICLE = f"<html><head><title>Migraine</title></head><body><main>{EARLY}{FILLER * 300}{LATE}</main></body></html>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path == "/slow":
+            time.sleep(1)
+        body = ARTICLE.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The fetcher hangs up once it has read enough
+            pass
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def stub_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def fetch_many(urls: list[str], query: str, **options):
+    async def run():
+        http = SharedHTTPClient(retries=0)
+        try:
+            return await PageFetcher(http, **options).fetch_many(urls, query)
+        finally:
+            await http.aclose()
+
+    return asyncio.run(run())
+
+
+def test_reads_whole_page_under_the_byte_limit(stub_url):
+    [page] = fetch_many([f"{stub_url}/article"], "migraine aura", max_bytes=1_000_000)
+    assert page.error is None
+    assert page.title == "Migraine"
+    assert any("Late paragraph" in excerpt for excerpt in page.excerpts)
+
+
+def test_stops_reading_at_max_bytes(stub_url):
+    [page] = fetch_many([f"{stub_url}/article"], "migraine aura", max_bytes=4_000)
+    assert page.error is None
+    assert any("Early paragraph" in excerpt for excerpt in page.excerpts)
+    assert not any("Late paragraph" in excerpt for excerpt in page.excerpts)
+
+
+def test_pages_past_the_budget_are_dropped(stub_url):
+    started = time.perf_counter()
+    fast, slow = fetch_many([f"{stub_url}/article", f"{stub_url}/slow"], "migraine", budget_seconds=0.5)
+    assert time.perf_counter() - started < 1
+    assert fast.error is None and fast.excerpts
+    assert slow.error == "fetch budget exceeded"
+    assert not slow.excerpts
+
+
+def test_bad_url_does_not_fail_the_other_pages(stub_url):
+    good, bad = fetch_many([f"{stub_url}/article", "http://exa\x00mple.com/"], "migraine")
+    assert good.error is None and good.excerpts
+    assert bad.error
+    assert not bad.excerpts
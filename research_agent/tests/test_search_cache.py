@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from agentstack_agents.answer_cache import AnswerCache, MemoryBackend
+from agentstack_agents.search_cache import SearchCache, normalize_search_query
+
+
+@pytest.mark.parametrize(
+    ("first", "second"),
+    [
+        ("why does shingles hurt", "when does shingles hurt"),
+        ("should I stop statins", "how I stop statins"),
+        ("dog bite human", "human bite dog"),
+        ("what is a migraine", "migraine"),
+    ],
+)
+def test_different_questions_do_not_share_a_key(first: str, second: str) -> None:
+    assert normalize_search_query(first) != normalize_search_query(second)
+
+
+@pytest.mark.parametrize(
+    ("first", "second"),
+    [
+        ("Shingles symptoms?", "shingles symptom"),
+        ("  Why does   SHINGLES hurt!", "why does shingles hurt"),
+        ("statins, side-effects", "statin side effect"),
+    ],
+)
+def test_case_punctuation_whitespace_and_plurals_are_folded(first: str, second: str) -> None:
+    assert normalize_search_query(first) == normalize_search_query(second)
+
+
+def test_search_serves_only_the_same_question_from_cache() -> None:
+    calls: list[str] = []
+
+    def fetcher(query: str):
+        async def fetch() -> dict:
+            calls.append(query)
+            return {"organic": [{"title": query}]}
+
+        return fetch
+
+    async def run() -> None:
+        cache = SearchCache(AnswerCache(MemoryBackend()))
+        first = await cache.search("why does shingles hurt", 5, fetcher("why"))
+        other = await cache.search("when does shingles hurt", 5, fetcher("when"))
+        again = await cache.search("Why does shingles hurt?", 5, fetcher("why again"))
+        assert (first.hit, other.hit, again.hit) == (False, False, True)
+        assert other.result["organic"][0]["title"] == "when"
+        assert again.result == first.result
+
+    asyncio.run(run())
+    assert calls == ["why", "when"]
@@ -0,0 +1,20 @@
+from pathlib import Path
+
+import pytest
+
+# Each agent is built and deployed from its own directory, so modules they share are copied into each one
+REPO = Path(__file__).resolve().parents[2]
+SHARED = {
+    "tracing.py": ["healthcare_agent", "policy_agent", "provider_agent", "research_agent"],
+    "answer_cache.py": ["policy_agent", "provider_agent", "research_agent"],
+}
+
+
+@pytest.mark.parametrize("module", sorted(SHARED))
+def test_copies_are_identical(module: str) -> None:
+    copies = {agent: REPO / agent / "agentstack_agents" / module for agent in SHARED[module]}
+    if not all(path.exists() for path in copies.values()):
+        pytest.skip("not run from a full checkout")
+    reference = copies["research_agent"].read_text()
+    differing = [agent for agent, path in copies.items() if path.read_text() != reference]
+    assert not differing, f"{module} differs from research_agent's copy in: {', '.join(differing)}"
@@ -0,0 +1,52 @@
+from hypothesis import given, settings
+from hypothesis import strategies as st
+
+from agentstack_agents.streaming_citation_parser import StreamingCitationParser
+from benchmarks.citation_parser import LegacyCitationParser, run_parser
+
+# Fragments that exercise every state transition of the parser, including malformed links
+FRAGMENTS = [
+    "plain text ", "word", " ", "\n", "[", "]", "(", ")", "[1]", "[see here]", "](", "[a](",
+    "[Mayo Clinic](https://www.mayoclinic.org/diseases-conditions/diabetes)",
+    "[CDC](https://www.cdc.gov/diabetes/about/)", "[](https://example.com/a-b)", "[text]()",
+    "[nested [link](https://x.org/y)", "[broken\nlink](https://x.org)", "[t](https://x.org/\nz)",
+    "[t] (https://x.org)", "[t](https://x.org/(paren)", "é", "✓ ", "[long " + "x" * 120 + "](u/v)",
+]
+
+markdown = st.lists(
+    st.sampled_from(FRAGMENTS) | st.text(alphabet="[]()\n ab/-é", max_size=4), max_size=30
+).map("".join)
+
+
+@st.composite
+def streams(draw) -> tuple[str, list[str]]:
+    """Markdown and the same text split at random chunk boundaries, empty chunks included."""
+    text = draw(markdown)
+    cuts = sorted(draw(st.lists(st.integers(0, len(text)), max_size=len(text) + 3)))
+    bounds = [0, *cuts, len(text)]
+    return text, [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def summarize(result) -> tuple[str, list[dict]]:
+    text, citations = result
+    return text, [citation.model_dump() for citation in citations]
+
+
+@settings(max_examples=500, deadline=None)
+@given(streams())
+def test_matches_legacy_parser_at_any_chunk_boundaries(stream):
+    text, chunks = stream
+    # The legacy parser mis-parses links split across chunks, so it gets the whole text at once
+    expected = run_parser(LegacyCitationParser, [text])
+    assert summarize(run_parser(StreamingCitationParser, chunks)) == summarize(expected)
+
+
+@settings(max_examples=200, deadline=None)
+@given(markdown)
+def test_every_link_in_one_chunk_is_emitted_by_that_chunk(text):
+    # Unlike the legacy parser, one call reports every link the chunk completes
+    parser = StreamingCitationParser()
+    output, citations = parser.process_chunk(text)
+    expected_text, expected_citations = run_parser(LegacyCitationParser, [text])
+    assert [citation.model_dump() for citation in citations] == [c.model_dump() for c in expected_citations]
+    assert output + parser.finalize() == expected_text